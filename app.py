@@ -1,12 +1,32 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from datetime import date
+import tempfile
+from datetime import date, timedelta
+
+from src.config import set_config_provider, StreamlitSecretsProvider
+
+# The dashboard reads its credentials from .streamlit/secrets.toml
+set_config_provider(StreamlitSecretsProvider())
 
 # Import your actual services
 from src.services.user_service import UserService
 from src.services.subscription_service import SubscriptionService
 from src.services.payment_service import PaymentService
+from src.services.sync_service import SyncService
+from src.services.billing_service import BillingService, ISSUES as BILLING_ISSUES
+from src.services.renewal_service import RenewalService
+from src.services.dataset_service import DatasetService
+from src.services.journal_service import JournalService
+from src.services.search_index import DEFAULT_LIMIT as SEARCH_LIMIT
+from src.services.export_service import ExportService, FORMATS as EXPORT_FORMATS, TABLES as EXPORT_TABLES
+from src.dao.User_dao import UserDAO
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.aggregate_dao import AggregateDAO
+from functools import partial
+from src.dao.fanout import fan_out
+from src.dao.instrumentation import start_trace, end_trace
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Subscription Tracker", layout="wide", page_icon="💳")
@@ -71,55 +91,146 @@ st.markdown("""
 
 
 # --- Service Initialization ---
-user_service = UserService()
-subscription_service = SubscriptionService()
-payment_service = PaymentService()
+@st.cache_resource
+def get_services():
+    """Builds the services once per process; every session shares them and the underlying Supabase client."""
+    return UserService(), SubscriptionService(), PaymentService(), BillingService(), ExportService()
 
+user_service, subscription_service, payment_service, billing_service, export_service = get_services()
 
-# --- Caching ---
-@st.cache_data(ttl=300) # Cache data for 5 minutes
-def load_data():
-    """Fetches all data from the services and caches the result."""
-    users = user_service.user_dao.get_all_users()
-    subscriptions = subscription_service.subscription_dao.get_all_subscriptions()
-    payments = payment_service.payment_dao.get_all_payments()
-    return users, subscriptions, payments
 
+@st.cache_resource
+def get_replica():
+    """The local read replica and DAOs bound to it, or None when it is disabled."""
+    sync = SyncService.from_settings()
+    if sync is None:
+        return None
+    client = sync.replica
+    return sync, UserDAO(client), SubscriptionDAO(client), PaymentsDAO(client), AggregateDAO(client)
+
+replica = get_replica()
+
+
+@st.cache_resource
+def get_renewals():
+    """Renewal/expiry index shared by all sessions; follows this process's subscription writes."""
+    return RenewalService()
+
+renewals = get_renewals()
+
+
+@st.cache_resource
+def get_datasets():
+    """Columnar snapshot of the three tables shared read-only by all sessions (src/services/dataset_service.py)."""
+    if replica:
+        _, user_dao, subscription_dao, payment_dao, _ = replica
+        return DatasetService(user_dao, subscription_dao, payment_dao)
+    return DatasetService(user_service.user_dao, subscription_service.subscription_dao, payment_service.payment_dao)
+
+datasets = get_datasets()
+
+
+@st.cache_resource
+def get_journal():
+    """
+    Local write-ahead journal with its background replicator, or None when it
+    is disabled. With it, the add forms return as soon as the write is on disk.
+    """
+    journal = JournalService.from_settings()
+    return journal.start() if journal else None
+
+journal = get_journal()
+
+
+# --- Debug Panel ---
+# Records every DAO call made while rendering this run; shown at the bottom of the sidebar.
+debug_mode = st.sidebar.toggle("🔍 Query debug panel", help="Show the database calls made to render this page.")
+debug_token = start_trace("dashboard render" if debug_mode else None)
 
-# --- Main App ---
-st.title("💳 Subscription Tracker Dashboard")
-st.markdown("An elegant solution to manage users, subscriptions, and payments seamlessly.")
 
-try:
-    users, subscriptions, payments = load_data()
-except Exception as e:
-    st.error(f"🔌 Failed to connect to the database. Please check your services and secrets.toml file. Error: {e}")
-    st.stop()
+# --- Data Loading ---
+# Reads are cached by the DAOs themselves (src/dao/query_cache.py, 5 minute TTL)
+# and every write drops only the entries it affects, so nothing here clears caches.
+# Each page loads only what it shows, so a page's cost does not depend on the others.
+def read_daos():
+    """
+    DAOs to read from. With the replica enabled, only the changes since the
+    last sync are fetched and every read is served locally.
+    """
+    if replica:
+        sync, user_dao, subscription_dao, payment_dao, aggregate_dao = replica
+        sync.refresh()
+        return user_dao, subscription_dao, payment_dao, aggregate_dao
+    return (user_service.user_dao, subscription_service.subscription_dao,
+            payment_service.payment_dao, payment_service.aggregate_dao)
 
-# Create mappings for user-friendly selectboxes
-user_map = {user['name']: user['id'] for user in users}
-subscription_map = {}
-if users and subscriptions:
-    user_id_to_name = {u['id']: u['name'] for u in users}
-    subscription_map = {f"{sub['name']} (User: {user_id_to_name.get(sub['user_id'], 'N/A')})": sub['id'] for sub in subscriptions}
 
+def load(*calls):
+    """Runs a page's independent queries concurrently; stops the page if the database is unreachable."""
+    try:
+        return fan_out(*calls)
+    except Exception as e:
+        st.error(f"🔌 Failed to connect to the database. Please check your services and secrets.toml file. Error: {e}")
+        st.stop()
 
-# --- Main Navigation Tabs ---
-dash_tab, user_tab, sub_tab, payment_tab, insight_tab = st.tabs([
-    "🏠 Dashboard", "👤 User Management", "📦 Subscription Hub", "💸 Payment Center", "💡 Analytics"
-])
 
+def load_dataset():
+    """
+    The shared snapshot with the selectbox options, name lookups and per-user /
+    per-subscription rows already computed; sessions only read it.
+    """
+    read_daos()  # brings the replica up to date first
+    return load(datasets.get)[0]
+
+
+def search_select(label, index, key, all_label=None):
+    """
+    Type-ahead picker: the search box is matched against the shared index on
+    the server and only the top matches are sent to the selectbox. Returns the
+    chosen id, or None for `all_label` / when nothing matches.
+    """
+    query = st.text_input(f"🔎 {label}", key=f"{key}_query", placeholder="Type to search by name or email")
+    ids = index.search(query, SEARCH_LIMIT)
+    if all_label:
+        ids = [None, *ids]
+    elif not ids:
+        st.info("No matches.")
+        return None
+    return st.selectbox(
+        label, ids, key=key, label_visibility="collapsed",
+        format_func=lambda i: all_label if i is None else index.label(i),
+    )
+
+
+def section(options, key):
+    """Sub-page switcher; unlike st.tabs, only the selected section runs."""
+    return st.radio("Section", options, key=key, horizontal=True, label_visibility="collapsed")
+
+
+# --- Dashboard Page ---
+def dashboard_page():
+    # Totals and counts come from the database's aggregates and only the users'
+    # names are read, so this page never loads the payments table
+    user_dao, _, payment_dao, aggregate_dao = read_daos()
+    users, metrics, per_user, recent = load(
+        partial(user_dao.get_all_users, columns=["id", "name"]),
+        aggregate_dao.get_dashboard_metrics,
+        aggregate_dao.get_subscriptions_per_user,
+        partial(payment_dao.get_recent_payments, 5),
+    )
+    names = {u["id"]: u["name"] for u in users}
+    subscription_counts = (
+        pd.Series({user_id: count for user_id, count in per_user.items() if count > 0}, dtype="int64")
+        .groupby(lambda user_id: names.get(user_id, "N/A")).sum()
+        .sort_values(ascending=False)
+    )
 
-# --- Dashboard Tab ---
-with dash_tab:
     st.header("🚀 At a Glance")
     col1, col2, col3, col4 = st.columns(4)
-    with col1: st.metric("👥 Total Users", len(users))
-    with col2: st.metric("📦 Active Subscriptions", len(subscriptions))
-    with col3: st.metric("💳 Payments Recorded", len(payments))
-    with col4:
-        completed_payments = sum(float(p["amount"]) for p in payments if p["status"] == "Completed")
-        st.metric("💰 Total Revenue", f"₹ {completed_payments:,.2f}")
+    with col1: st.metric("👥 Total Users", metrics["user_count"])
+    with col2: st.metric("📦 Active Subscriptions", metrics["subscription_count"])
+    with col3: st.metric("💳 Payments Recorded", metrics["payment_count"])
+    with col4: st.metric("💰 Total Revenue", f"₹ {float(metrics['total_revenue']):,.2f}")
 
     st.markdown("<hr>", unsafe_allow_html=True)
     
@@ -127,29 +238,62 @@ with dash_tab:
     with col1:
         with st.container(border=True):
             st.subheader("📈 Subscriptions per User")
-            if subscriptions:
-                sub_df = pd.DataFrame(subscriptions)
-                user_names_map = {u['id']: u['name'] for u in users}
-                sub_df['user_name'] = sub_df['user_id'].map(user_names_map)
-                st.bar_chart(sub_df['user_name'].value_counts(), color="#7792E3")
+            if not subscription_counts.empty:
+                st.bar_chart(subscription_counts, color="#7792E3")
             else:
                 st.info("No subscription data available.")
     with col2:
         with st.container(border=True):
             st.subheader("🕒 Recent Payments")
-            if payments:
-                df = pd.DataFrame(payments).sort_values("payment_date", ascending=False).head(5)
-                st.dataframe(df, use_container_width=True, hide_index=True)
+            if recent:
+                st.dataframe(pd.DataFrame(recent), use_container_width=True, hide_index=True)
             else:
                 st.info("No payments recorded yet.")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        upcoming_renewals(names)
+    with col2:
+        recently_expired(names)
 
-# --- User Management Tab ---
-with user_tab:
+
+@st.fragment
+def upcoming_renewals(names):
+    # A fragment: moving the slider reruns only this panel
+    with st.container(border=True):
+        st.subheader("⏰ Upcoming Renewals")
+        renewal_days = st.slider("Renewing within (days)", 1, 60, 7, key="renewal_days")
+        due = renewals.due_within(renewal_days)
+        if due:
+            st.dataframe(pd.DataFrame([
+                {"renews": s["next_renewal"], "subscription": s["name"], "user": names.get(s["user_id"], "N/A"), "cost": s["cost"]}
+                for s in due
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"No renewals in the next {renewal_days} days.")
+
+
+@st.fragment
+def recently_expired(names):
     with st.container(border=True):
-        add_user_tab, list_user_tab, delete_user_tab = st.tabs(["➕ Add User", "👥 List Users", "❌ Delete User"])
+        st.subheader("⌛ Recently Expired")
+        expired_days = st.slider("Expired in the last (days)", 1, 90, 30, key="expired_days")
+        expired = renewals.expired_since(date.today() - timedelta(days=expired_days))
+        if expired:
+            st.dataframe(pd.DataFrame([
+                {"ended": s["end_date"], "subscription": s["name"], "user": names.get(s["user_id"], "N/A")}
+                for s in expired
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"No subscriptions ended in the last {expired_days} days.")
+
+
+# --- User Management Page ---
+def user_page():
+    with st.container(border=True):
+        choice = section(["➕ Add User", "👥 List Users", "❌ Delete User"], key="user_section")
         
-        with add_user_tab:
+        if choice == "➕ Add User":
             st.subheader("Create a New User Profile")
             with st.form("add_user_form"):
                 name = st.text_input("Full Name")
@@ -157,47 +301,48 @@ with user_tab:
                 if st.form_submit_button("✅ Create User"):
                     if not name or not email: st.error("Name and Email are required.")
                     elif not user_service.is_valid_email(email): st.error("Invalid email format.")
-                    elif user_service.user_dao.get_user_by_email(email): st.error("Email already exists.")
-                    else:
-                        if user_service.user_dao.create_user(name, email):
-                            st.success(f"User '{name}' added successfully!")
-                            st.cache_data.clear()
-                            st.rerun()
-                        else: st.error("Failed to add user.")
+                    elif journal:
+                        journal.create_user(name, email)
+                        st.success(f"User '{name}' saved; it will appear once synced.")
+                    elif user_service.user_dao.create_user_if_new(name, email):
+                        st.success(f"User '{name}' added successfully!")
+                        st.rerun()
+                    else: st.error("Email already exists.")
 
-        with list_user_tab:
+        elif choice == "👥 List Users":
             st.subheader("Registered User Accounts")
-            st.dataframe(pd.DataFrame(users), use_container_width=True, hide_index=True)
+            st.dataframe(load_dataset().users, use_container_width=True, hide_index=True)
 
-        with delete_user_tab:
+        else:
             st.subheader("Remove a User")
-            if not users:
+            dataset = load_dataset()
+            if not len(dataset.user_search):
                 st.warning("No users available to delete.")
             else:
-                user_to_delete = st.selectbox("Select User to Remove", options=user_map.keys())
-                if st.button("🗑️ Delete User", type="primary"):
-                    user_id = user_map[user_to_delete]
-                    if subscription_service.subscription_dao.get_subscriptions_by_user(user_id):
+                user_id = search_select("Select User to Remove", dataset.user_search, key="delete_user")
+                if user_id is not None and st.button("🗑️ Delete User", type="primary"):
+                    status = user_service.user_dao.delete_user_if_unsubscribed(user_id)
+                    if status == "deleted":
+                        st.success(f"User '{dataset.user_names.get(user_id)}' deleted successfully.")
+                        st.rerun()
+                    elif status == "has_subscriptions":
                         st.warning("⚠️ User still has active subscriptions. Please remove them first.")
-                    else:
-                        if user_service.user_dao.delete_user(user_id):
-                            st.success(f"User '{user_to_delete}' deleted successfully.")
-                            st.cache_data.clear()
-                            st.rerun()
-                        else: st.error("Failed to delete user.")
+                    else: st.error("Failed to delete user.")
 
-# --- Subscription Management Tab ---
-with sub_tab:
+# --- Subscription Management Page ---
+def subscription_page():
     with st.container(border=True):
-        add_sub_tab, view_sub_tab = st.tabs(["➕ Add Subscription", "📜 View Subscriptions"])
+        choice = section(["➕ Add Subscription", "📜 View Subscriptions"], key="subscription_section")
+        dataset = load_dataset()
 
-        with add_sub_tab:
+        if choice == "➕ Add Subscription":
             st.subheader("Add Subscription for a User")
-            if not users:
+            if not len(dataset.user_search):
                 st.warning("Please add a user before adding subscriptions.")
             else:
+                # Outside the form so the search updates while typing
+                user_id = search_select("Select User", dataset.user_search, key="subscription_user")
                 with st.form("add_subscription_form"):
-                    user_name = st.selectbox("Select User", options=user_map.keys())
                     sub_name = st.text_input("Subscription Name (e.g., Netflix, Spotify)")
                     col1, col2 = st.columns(2)
                     with col1:
@@ -208,42 +353,53 @@ with sub_tab:
                         end_date = st.date_input("End Date")
 
                     if st.form_submit_button("✅ Add Subscription"):
-                        user_id = user_map[user_name]
-                        success = subscription_service.subscription_dao.add_subscription(
+                        if user_id is None:
+                            st.error("Select a user first.")
+                        elif journal:
+                            journal.add_subscription(user_id, sub_name, plan_type, cost, str(start_date), str(end_date))
+                            st.success(f"Subscription '{sub_name}' saved; it will appear once synced.")
+                        elif subscription_service.subscription_dao.add_subscription(
                             user_id=user_id, name=sub_name, plan_type=plan_type, cost=cost,
                             start_date=str(start_date), end_date=str(end_date), status="Active"
-                        )
-                        if success:
-                            st.success(f"Subscription '{sub_name}' added for {user_name}.")
-                            st.cache_data.clear()
+                        ):
+                            st.success(f"Subscription '{sub_name}' added for {dataset.user_names.get(user_id)}.")
                             st.rerun()
                         else: st.error("Failed to add subscription.")
         
-        with view_sub_tab:
-            st.subheader("View Subscriptions by User")
-            if not users:
-                st.warning("No users available.")
-            else:
-                user_to_view = st.selectbox("Select a User", options=user_map.keys())
-                user_id = user_map[user_to_view]
-                user_subs = subscription_service.subscription_dao.get_subscriptions_by_user(user_id)
-                if user_subs:
-                    st.dataframe(pd.DataFrame(user_subs), use_container_width=True, hide_index=True)
-                else:
-                    st.info(f"{user_to_view} has no subscriptions.")
-
-# --- Payment Management Tab ---
-with payment_tab:
+        else:
+            view_subscriptions(dataset)
+
+
+@st.fragment
+def view_subscriptions(dataset):
+    # Picking another user reruns only this fragment
+    st.subheader("View Subscriptions by User")
+    if not len(dataset.user_search):
+        st.warning("No users available.")
+        return
+    user_id = search_select("Select a User", dataset.user_search, key="view_subscriptions_user")
+    if user_id is None:
+        return
+    user_subs = dataset.subscriptions_of(user_id)
+    if not user_subs.empty:
+        st.dataframe(user_subs.drop(columns="user_name"), use_container_width=True, hide_index=True)
+    else:
+        st.info(f"{dataset.user_names.get(user_id)} has no subscriptions.")
+
+# --- Payment Management Page ---
+def payment_page():
     with st.container(border=True):
-        add_pay_tab, view_pay_tab = st.tabs(["💸 Add Payment", "📑 View Payments"])
+        choice = section(["💸 Add Payment", "📑 View Payments"], key="payment_section")
+        dataset = load_dataset()
 
-        with add_pay_tab:
+        if choice == "💸 Add Payment":
             st.subheader("Record a New Payment")
-            if not subscriptions:
+            if not len(dataset.subscription_search):
                 st.warning("Please add a subscription before recording a payment.")
             else:
+                # Outside the form so the search updates while typing
+                sub_id = search_select("Select Subscription", dataset.subscription_search, key="payment_subscription")
                 with st.form("add_payment_form"):
-                    sub_choice = st.selectbox("Select Subscription", options=subscription_map.keys())
                     col1, col2 = st.columns(2)
                     with col1:
                         amount = st.number_input("Amount (₹)", min_value=0.0, format="%.2f")
@@ -252,49 +408,169 @@ with payment_tab:
                         status = st.selectbox("Status", ["Completed", "Pending", "Failed"])
                         
                     if st.form_submit_button("✅ Record Payment"):
-                        sub_id = subscription_map[sub_choice]
-                        if payment_service.payment_dao.insert_payment(sub_id, amount, method, status):
+                        if sub_id is None:
+                            st.error("Select a subscription first.")
+                        elif journal:
+                            journal.insert_payment(sub_id, amount, method, status)
+                            st.success(f"Payment of ₹{amount} saved; it will appear once synced.")
+                        elif payment_service.payment_dao.insert_payment_checked(sub_id, amount, method, status):
                             st.success(f"Payment of ₹{amount} recorded for the selected subscription.")
-                            st.cache_data.clear()
                             st.rerun()
                         else: st.error("Failed to add payment.")
 
-        with view_pay_tab:
-            st.subheader("View Payments for a Subscription")
-            if not subscriptions:
-                st.warning("No subscriptions available.")
-            else:
-                sub_to_view = st.selectbox("Select Subscription", options=subscription_map.keys())
-                sub_id = subscription_map[sub_to_view]
-                sub_payments = payment_service.payment_dao.get_payments_by_subscription(sub_id)
-                if sub_payments:
-                    st.dataframe(pd.DataFrame(sub_payments), use_container_width=True, hide_index=True)
-                else:
-                    st.info(f"No payments found for the selected subscription.")
-
-# --- Analytics Tab ---
-with insight_tab:
+        else:
+            view_payments(dataset)
+
+
+@st.fragment
+def view_payments(dataset):
+    # The payments list and billing check rerun on their own when another subscription is picked
+    st.subheader("View Payments for a Subscription")
+    if not len(dataset.subscription_search):
+        st.warning("No subscriptions available.")
+        return
+    sub_id = search_select("Select Subscription", dataset.subscription_search, key="view_payments_subscription")
+    if sub_id is None:
+        return
+    sub_payments = dataset.payments_of(sub_id)
+    if not sub_payments.empty:
+        st.dataframe(sub_payments.drop(columns="user_id"), use_container_width=True, hide_index=True)
+    else:
+        st.info(f"No payments found for the selected subscription.")
+
+    st.subheader("🧾 Billing Check")
+    cycles = billing_service.check_subscription(sub_id)
+    if cycles.empty:
+        st.info("No billing cycles are due yet for this subscription.")
+    else:
+        issues = cycles[cycles["status"].isin(BILLING_ISSUES)]
+        if issues.empty:
+            st.success(f"All {len(cycles)} billing cycles are paid on time.")
+        else:
+            counts = issues["status"].value_counts()
+            st.warning(", ".join(f"{count} {status}" for status, count in counts.items() if count) + " cycle(s).")
+        st.dataframe(
+            cycles[["cycle", "due_date", "expected_amount", "paid_date", "paid_amount", "days_late", "status"]],
+            use_container_width=True, hide_index=True,
+        )
+
+# --- Analytics Page ---
+def analytics_page():
     with st.container(border=True):
         st.header("💡 User Spending Analysis")
-        if not users:
+        dataset = load_dataset()
+        if not len(dataset.user_search):
             st.warning("No users available for analysis.")
         else:
-            user_to_analyze = st.selectbox("Select a User to Analyze", options=user_map.keys())
-            user_id = user_map[user_to_analyze]
-            user_subs = subscription_service.subscription_dao.get_subscriptions_by_user(user_id)
-            if not user_subs:
-                st.info(f"{user_to_analyze} has no subscriptions to analyze.")
-            else:
-                payments_data = []
-                for sub in user_subs:
-                    for payment in payment_service.payment_dao.get_payments_by_subscription(sub["id"]):
-                        if payment['status'] == 'Completed':
-                            payments_data.append({"subscription": sub["name"], "amount": float(payment["amount"])})
-                
-                if not payments_data:
-                    st.info(f"No completed payments found for {user_to_analyze}.")
-                else:
-                    df = pd.DataFrame(payments_data)
-                    total_spend = df['amount'].sum()
-                    st.metric(label=f"Total Spend for {user_to_analyze}", value=f"₹ {total_spend:,.2f}")
-                    st.bar_chart(df.groupby('subscription')['amount'].sum(), color="#FF4B4B")
\ No newline at end of file
+            spending_analysis(dataset)
+
+
+@st.fragment
+def spending_analysis(dataset):
+    user_id = search_select("Select a User to Analyze", dataset.user_search, key="analyze_user")
+    if user_id is None:
+        return
+    user_to_analyze = dataset.user_names.get(user_id)
+    user_subs = dataset.subscriptions_of(user_id)
+    # One summary row per subscription, kept current by triggers (sql/spend_summary.sql)
+    spend = load(partial(read_daos()[3].get_subscription_spend, user_id))[0]
+    if user_subs.empty:
+        st.info(f"{user_to_analyze} has no subscriptions to analyze.")
+    else:
+        sub_names = dict(zip(user_subs["id"].tolist(), user_subs["name"].tolist()))
+        payments_data = [
+            {"subscription": sub_names.get(sub_id, f"#{sub_id}"), "amount": row["completed_total"]}
+            for sub_id, row in spend.items() if row["completed_total"]
+        ]
+        
+        if not payments_data:
+            st.info(f"No completed payments found for {user_to_analyze}.")
+        else:
+            df = pd.DataFrame(payments_data)
+            total_spend = df['amount'].sum()
+            st.metric(label=f"Total Spend for {user_to_analyze}", value=f"₹ {total_spend:,.2f}")
+            st.bar_chart(df.groupby('subscription')['amount'].sum(), color="#FF4B4B")
+
+
+# --- Export ---
+@st.fragment
+def export_panel():
+    """Streams a table to a temporary file page by page, then offers it for download."""
+    with st.expander("⬇️ Export data"):
+        table = st.selectbox("Table", EXPORT_TABLES, index=2, key="export_table")
+        fmt = st.radio("Format", EXPORT_FORMATS, horizontal=True, key="export_format")
+        # The picker needs the shared dataset, so it is only loaded once asked for;
+        # otherwise this sidebar panel would read every table on every page
+        user_id = None
+        if st.toggle("Only one user", key="export_by_user"):
+            user_id = search_select("User", load_dataset().user_search, key="export_user")
+        status = st.selectbox("Status", ["Any", "Completed", "Pending", "Failed", "Active"], key="export_status")
+        dates = st.date_input("Payment / start date range", value=(), key="export_dates")
+        if st.button("Prepare export", key="export_prepare"):
+            filters = {
+                "user_id": user_id,
+                "status": None if status == "Any" else status,
+                "since": dates[0].isoformat() if len(dates) > 0 else None,
+                "until": dates[1].isoformat() if len(dates) > 1 else None,
+            }
+            with st.spinner("Exporting..."), tempfile.TemporaryFile() as f:
+                report = export_service.export(table, f, fmt, **filters)
+                f.seek(0)
+                # Streamlit serves downloads from memory, so only the finished file is held there
+                st.download_button(
+                    f"💾 Download {report.rows:,} rows", f.read(), file_name=f"{table}.{fmt}",
+                    mime="text/csv" if fmt == "csv" else "application/octet-stream", key="export_download",
+                )
+        st.caption("For full nightly dumps use `python -m src.cli.main export`.")
+
+
+@st.fragment(run_every=10)
+def journal_status():
+    """Replication lag of the write-ahead journal, refreshed on its own."""
+    metrics = journal.metrics()
+    if metrics["pending"]:
+        st.caption(f"📝 {metrics['pending']} write(s) waiting to sync · oldest {metrics['lag_seconds']:,.0f}s")
+    else:
+        st.caption("📝 All writes synced")
+    if metrics["last_error"]:
+        st.warning(f"Sync is retrying in {metrics['retry_in']:.0f}s: {metrics['last_error']}")
+    if metrics["conflicts"] or metrics["rejected"]:
+        st.caption(f"{metrics['conflicts']} conflict(s), {metrics['rejected']} rejected; "
+                   "see `python -m src.cli.main journal list`.")
+
+
+# --- Main App ---
+st.title("💳 Subscription Tracker Dashboard")
+st.markdown("An elegant solution to manage users, subscriptions, and payments seamlessly.")
+
+# Only the selected page runs (st.tabs would run every tab's code on each rerun)
+PAGES = {
+    "🏠 Dashboard": dashboard_page,
+    "👤 User Management": user_page,
+    "📦 Subscription Hub": subscription_page,
+    "💸 Payment Center": payment_page,
+    "💡 Analytics": analytics_page,
+}
+page = st.radio("Navigation", list(PAGES), key="page", horizontal=True, label_visibility="collapsed")
+with st.sidebar:
+    export_panel()
+    if journal:
+        journal_status()
+PAGES[page]()
+
+
+# --- Debug Panel (output) ---
+debug_trace = end_trace(debug_token)
+if debug_trace is not None:
+    with st.sidebar:
+        totals = debug_trace.totals()
+        st.metric("DAO calls", totals["calls"], f"{totals['cached']} cached", delta_color="off")
+        st.metric("Time in DAOs", f"{totals['duration_ms']:,.1f} ms")
+        st.caption(f"{totals['rows']:,} rows · {totals['bytes'] / 1024:,.1f} KiB returned")
+        for issue in debug_trace.n_plus_one():
+            hint = f" Use {issue['suggestion']} instead." if issue["suggestion"] else ""
+            st.warning(f"N+1: `{issue['signature']}` called {issue['count']} times.{hint}")
+        calls = pd.DataFrame(debug_trace.to_dict()["calls"])
+        if not calls.empty:
+            st.dataframe(calls[["method", "duration_ms", "rows", "bytes", "cached"]], use_container_width=True, hide_index=True)
+        st.download_button("⬇️ Export trace (JSON)", debug_trace.to_json(indent=2), file_name="dao-trace.json", mime="application/json")
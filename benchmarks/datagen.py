@@ -0,0 +1,69 @@
+"""
+Synthetic users, subscriptions and payments for the benchmarks.
+
+A scale is the number of payment rows; users and subscriptions are sized
+from it (about one user per 16 payments, one to three subscriptions per
+user, 70% monthly). Monthly subscriptions get one payment per month since
+they started, yearly ones one per year. The output is deterministic for
+a given seed.
+"""
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+SERVICES = [
+    ("Netflix", 649.0), ("Spotify", 119.0), ("Prime Video", 299.0), ("Disney+ Hotstar", 299.0),
+    ("YouTube Premium", 129.0), ("iCloud", 75.0), ("Notion", 800.0), ("GitHub Copilot", 830.0),
+]
+METHODS = ["UPI", "Credit Card", "Debit Card", "Net Banking"]
+STATUSES = ["Completed"] * 90 + ["Pending"] * 7 + ["Failed"] * 3
+TODAY = date(2025, 6, 30)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    return date(year, month % 12 + 1, min(day.day, 28))
+
+
+def generate(payments: int, seed: int = 42) -> Dict[str, List[Dict]]:
+    """Returns {table: rows} with ids set, ready for FakeSupabase(tables=...)."""
+    rng = random.Random(seed)
+    tables: Dict[str, List[Dict]] = {"users": [], "subscriptions": [], "payments": []}
+    user_count = max(1, payments // 16)
+
+    for user_id in range(1, user_count + 1):
+        tables["users"].append({"id": user_id, "name": f"User {user_id}", "email": f"user{user_id}@example.com"})
+
+    sub_id = 0
+    for user_id in range(1, user_count + 1):
+        for name, cost in rng.sample(SERVICES, rng.randint(1, 3)):
+            sub_id += 1
+            monthly = rng.random() < 0.7
+            start = TODAY - timedelta(days=rng.randint(30, 730))
+            tables["subscriptions"].append({
+                "id": sub_id, "user_id": user_id, "name": name,
+                "plan_type": "monthly" if monthly else "yearly",
+                "cost": cost if monthly else round(cost * 10, 2),
+                "start_date": start.isoformat(),
+                "end_date": _add_months(start, 12 if monthly else 24).isoformat(),
+                "status": "Active",
+            })
+
+    payment_id = 0
+    for sub in tables["subscriptions"]:
+        step = 1 if sub["plan_type"] == "monthly" else 12
+        due = date.fromisoformat(sub["start_date"])
+        while due <= TODAY and payment_id < payments:
+            payment_id += 1
+            tables["payments"].append({
+                "id": payment_id, "subscription_id": sub["id"], "amount": sub["cost"],
+                "payment_date": f"{due.isoformat()}T10:00:00+00:00",
+                "method": rng.choice(METHODS), "status": rng.choice(STATUSES),
+            })
+            due = _add_months(due, step)
+        if payment_id >= payments:
+            break
+    return tables
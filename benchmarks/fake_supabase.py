@@ -0,0 +1,107 @@
+"""
+In-process stand-in for Supabase/PostgREST used by the benchmarks.
+
+Wraps the in-memory backend and charges a configurable network latency
+for every request the DAOs make: table queries and rpc calls each count
+as one round trip. The server-side function and trigger stand-ins run
+their own table queries; those happen "inside the database" and are not
+counted.
+Keyset page queries (id > x order by id limit n) use a sorted id index,
+like the primary key index would, so large tables stay cheap to page.
+Like PostgREST, a select returns at most `max_rows` rows.
+"""
+import bisect
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.backends.base import Query, Response
+from src.backends.memory import MemoryClient
+from src.dao.pagination import DEFAULT_MAX_ROWS
+
+
+class FakeSupabase(MemoryClient):
+    """MemoryClient that sleeps latency_ms (+/- jitter_ms) per round trip and counts them."""
+
+    max_rows = DEFAULT_MAX_ROWS
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        super().__init__(tables)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.round_trips = 0
+        self.rows_returned = 0
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.functions = {name: self._remote(func) for name, func in self.functions.items()}
+        self.triggers = {table: [self._server_side(func) for func in funcs] for table, funcs in self.triggers.items()}
+        self._id_index: Dict[str, tuple] = {}
+
+    def reset_counters(self) -> None:
+        with self._stats_lock:
+            self.round_trips = 0
+            self.rows_returned = 0
+
+    def _round_trip(self, response: Response) -> Response:
+        rows = response.data if isinstance(response.data, list) else [response.data] if response.data else []
+        with self._stats_lock:
+            self.round_trips += 1
+            self.rows_returned += len(rows)
+            delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return response
+
+    def _server_side(self, func):
+        def call(client, *args, **params):
+            outer = getattr(self._local, "in_rpc", False)
+            self._local.in_rpc = True
+            try:
+                return func(client, *args, **params)
+            finally:
+                self._local.in_rpc = outer
+        return call
+
+    def _remote(self, func):
+        server_side = self._server_side(func)
+
+        def call(client, **params):
+            return self._round_trip(Response(server_side(client, **params))).data
+        return call
+
+    def _ids(self, table: str, stored: List[Dict]) -> Optional[List]:
+        """Ids of a table in storage order, or None if they are not ascending."""
+        version = (len(stored), stored[-1]["id"] if stored else None)
+        cached = self._id_index.get(table)
+        if cached is None or cached[0] != version:
+            ids = [row["id"] for row in stored]
+            cached = (version, ids if all(a < b for a, b in zip(ids, ids[1:])) else None)
+            self._id_index[table] = cached
+        return cached[1]
+
+    def _keyset_page(self, query: Query) -> Optional[Response]:
+        """Answers `select ... where id > x order by id limit n` without a scan."""
+        if (query.action != "select" or query.ordering != [("id", False)] or query.count
+                or query.single_row or query.offset or query.limit_count is None
+                or any(op != "gt" or column != "id" for op, column, _ in query.filters)):
+            return None
+        with self._lock:
+            stored = self._tables.setdefault(query.table, [])
+            ids = self._ids(query.table, stored)
+            if ids is None:
+                return None
+            start = bisect.bisect_right(ids, query.filters[0][2]) if query.filters else 0
+            page = stored[start:start + query.limit_count]
+            return Response(self._select(Query(self, query.table).select(query.columns), page))
+
+    def _execute(self, query: Query) -> Response:
+        response = self._keyset_page(query)
+        if response is None:
+            response = super()._execute(query)
+        if getattr(self._local, "in_rpc", False):
+            return response
+        if query.action == "select" and isinstance(response.data, list):
+            response.data = response.data[:self.max_rows]
+        return self._round_trip(response)
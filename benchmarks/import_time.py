@@ -0,0 +1,48 @@
+"""
+Measures how long it takes to import the CLI and which heavy packages it
+pulls in. Each run uses a fresh interpreter so nothing is cached in
+sys.modules.
+
+    python benchmarks/import_time.py [module ...]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("streamlit", "pandas", "pyarrow", "supabase", "postgrest", "httpx")
+RUNS = 7
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int = RUNS) -> dict:
+    samples, heavy = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        samples.append(result["seconds"] * 1000)
+        heavy = result["heavy"]
+    return {"module": module, "median_ms": statistics.median(samples), "min_ms": min(samples), "heavy_imports": heavy}
+
+
+def main(modules):
+    for module in modules or ["src.cli.main"]:
+        result = measure(module)
+        print(f"{result['module']:<25} median {result['median_ms']:7.1f} ms   min {result['min_ms']:7.1f} ms   "
+              f"heavy imports: {', '.join(result['heavy_imports']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,221 @@
+"""
+Benchmarks the dashboard and CLI data paths against an in-process fake
+Supabase (benchmarks/fake_supabase.py) filled with synthetic data.
+
+    python benchmarks/run.py --scale 10k --latency-ms 20
+    python benchmarks/run.py --scale 100k --save-baseline
+    python benchmarks/run.py --scale 10k --check          # exit 1 on regressions
+
+Every run starts with an empty query cache, so the numbers are for cold
+reads. Latency percentiles come from plain runs; peak memory comes from
+one extra run under tracemalloc, which would otherwise slow them down.
+Results are compared with benchmarks/baseline.json when it has an entry
+for the same scenario, scale and latency.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+from typing import Callable, Dict, List
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.datagen import SCALES, generate  # noqa: E402
+from benchmarks.fake_supabase import FakeSupabase  # noqa: E402
+from src.config import reset_supabase, set_supabase  # noqa: E402
+from src.dao.fanout import fan_out  # noqa: E402
+from src.dao.query_cache import query_cache  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SCENARIOS = ("load_data", "calculate_total_spend", "analytics_loop", "bulk_insert")
+TOLERANCE = 0.10  # slower than baseline by more than this is a regression
+MIN_CHANGE = {"p50_ms": 1.0, "p95_ms": 1.0, "peak_mb": 0.5}  # ignore differences below these
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+# --- Scenarios ---
+class Scenarios:
+    """Each scenario is a zero-argument callable doing what the app or CLI does."""
+
+    def __init__(self, user_count: int, analytics_users: int = 20, insert_rows: int = 1000):
+        # Imported here so the fake client is installed before the DAOs need it
+        from src.services.import_service import ImportService, ImportReport
+        from src.services.payment_service import PaymentService
+        from src.services.subscription_service import SubscriptionService
+        from src.services.user_service import UserService
+
+        self.users, self.subscriptions, self.payments = UserService(), SubscriptionService(), PaymentService()
+        self.imports = ImportService()
+        self._report = ImportReport
+        self.user_count = user_count
+        self.analytics_users = analytics_users
+        self.insert_rows = insert_rows
+        self._next_user = 0
+
+    def _pick_user(self) -> int:
+        self._next_user = self._next_user % self.user_count + 1
+        return self._next_user
+
+    def load_data(self):
+        """Same queries as load_data() in app.py."""
+        return fan_out(
+            partial(self.users.user_dao.get_all_users, shape="rows"),
+            partial(self.subscriptions.subscription_dao.get_all_subscriptions, columns=["id", "user_id", "name"], shape="rows"),
+            partial(self.payments.payment_dao.get_all_payments, shape="rows"),
+            self.payments.aggregate_dao.get_dashboard_metrics,
+            self.payments.aggregate_dao.get_subscriptions_per_user,
+        )
+
+    def calculate_total_spend(self):
+        """SubscriptionService.calculate_total_spend with the prompt answered."""
+        with mock.patch("builtins.input", return_value=str(self._pick_user())), contextlib.redirect_stdout(io.StringIO()):
+            self.subscriptions.calculate_total_spend()
+
+    def analytics_loop(self):
+        """The Analytics tab, for several users in a row."""
+        for _ in range(self.analytics_users):
+            self.payments.aggregate_dao.get_subscription_spend(self._pick_user())
+
+    def bulk_insert(self):
+        """One import batch of payments."""
+        batch = [
+            (n, {"subscription_id": 1, "amount": 199.0, "payment_date": None, "method": "UPI", "status": "Completed"})
+            for n in range(1, self.insert_rows + 1)
+        ]
+        self.imports.insert_batch("payments", batch, self._report(table="payments"))
+
+    def all(self) -> Dict[str, Callable]:
+        return {name: getattr(self, name) for name in SCENARIOS}
+
+
+# --- Measuring ---
+def measure(func: Callable, client: FakeSupabase, runs: int, warm: bool = False) -> Dict:
+    func()  # warm-up: imports, lazily built objects
+    timings, round_trips, rows = [], [], []
+    for _ in range(runs):
+        if not warm:
+            query_cache.clear()
+        client.reset_counters()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+        round_trips.append(client.round_trips)
+        rows.append(client.rows_returned)
+
+    if not warm:
+        query_cache.clear()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "round_trips": max(round_trips),
+        "rows": max(rows),
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def compare(key: str, result: Dict, baseline: Dict) -> List[str]:
+    """Returns a description of each metric that got worse than the baseline."""
+    base = baseline.get(key)
+    if not base:
+        return []
+    problems = []
+    for metric in ("p50_ms", "p95_ms", "peak_mb"):
+        worse = result[metric] - base.get(metric, result[metric])
+        if worse > MIN_CHANGE[metric] and result[metric] > base[metric] * (1 + TOLERANCE):
+            problems.append(f"{metric} {base[metric]:.2f} -> {result[metric]:.2f}")
+    if result["round_trips"] > base.get("round_trips", result["round_trips"]):
+        problems.append(f"round_trips {base['round_trips']} -> {result['round_trips']}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="payment rows to generate (default: 10k)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated round-trip latency (default: 20)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="run only these scenarios (repeatable)")
+    parser.add_argument("--warm", action="store_true", help="keep the query cache between runs")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if anything regressed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    tables = generate(SCALES[args.scale])
+    sizes = {table: len(rows) for table, rows in tables.items()}
+    client = FakeSupabase(tables, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    del tables
+    # Seeded rows bypass the triggers, so the spend summaries start empty
+    client.rpc("rebuild_spend_summary").execute()
+    set_supabase(client)
+
+    scenarios = Scenarios(user_count=sizes["users"]).all()
+    selected = args.scenario or list(scenarios)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results, regressions = {}, {}
+    try:
+        for name in selected:
+            key = f"{name}@{args.scale}/{args.latency_ms:g}ms"
+            try:
+                results[key] = measure(scenarios[name], client, args.runs, warm=args.warm)
+            except Exception as e:
+                # e.g. a QueryTimeout at large scales; reported instead of stopping the suite
+                regressions[key] = [f"failed: {type(e).__name__}: {e}"]
+                continue
+            problems = compare(key, results[key], baseline)
+            if problems:
+                regressions[key] = problems
+    finally:
+        reset_supabase()
+
+    if args.json:
+        print(json.dumps({"sizes": sizes, "results": results, "regressions": regressions}, indent=2))
+    else:
+        print(f"rows: {sizes}  latency: {args.latency_ms:g} ms  runs: {args.runs}")
+        print(f"{'scenario':<42} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'trips':>6} {'rows':>8} {'peak MB':>8}")
+        for key, problems in regressions.items():
+            if key not in results:
+                print(f"{key:<42} {problems[0]}")
+        for key, r in results.items():
+            flag = "  REGRESSION: " + "; ".join(regressions[key]) if key in regressions else ""
+            print(f"{key:<42} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['round_trips']:>6} {r['rows']:>8} {r['peak_mb']:>8.2f}{flag}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
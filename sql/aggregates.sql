@@ -0,0 +1,64 @@
+-- Server-side aggregates used by src/dao/aggregate_dao.py.
+-- Run once in the Supabase SQL editor. Python stand-ins for local
+-- backends live in src/backends/functions.py and must stay in sync.
+-- Status values are compared case-insensitively.
+-- Results with a row per user or subscription are capped at PostgREST's
+-- max-rows like any read, so they are ordered by id and read in .range()
+-- pages (iter_rpc in src/dao/pagination.py).
+
+create or replace function revenue_by_status()
+returns table (status text, payment_count bigint, total_amount numeric)
+language sql stable as $$
+    select p.status, count(*), coalesce(sum(p.amount), 0)
+    from payments p
+    group by p.status
+    order by p.status;
+$$;
+
+create or replace function subscriptions_per_user()
+returns table (user_id bigint, subscription_count bigint)
+language sql stable as $$
+    select s.user_id, count(*)
+    from subscriptions s
+    group by s.user_id
+    order by s.user_id;
+$$;
+
+create or replace function spend_per_subscription(
+    p_subscription_ids bigint[] default null,
+    p_status text default 'Completed'
+)
+returns table (subscription_id bigint, total_spend numeric)
+language sql stable as $$
+    select p.subscription_id, coalesce(sum(p.amount), 0)
+    from payments p
+    where (p_subscription_ids is null or p.subscription_id = any(p_subscription_ids))
+      and (p_status is null or lower(p.status) = lower(p_status))
+    group by p.subscription_id
+    order by p.subscription_id;
+$$;
+
+create or replace function spend_per_user(
+    p_user_id bigint default null,
+    p_status text default 'Completed'
+)
+returns table (user_id bigint, total_spend numeric)
+language sql stable as $$
+    select s.user_id, coalesce(sum(p.amount), 0)
+    from payments p
+    join subscriptions s on s.id = p.subscription_id
+    where (p_user_id is null or s.user_id = p_user_id)
+      and (p_status is null or lower(p.status) = lower(p_status))
+    group by s.user_id
+    order by s.user_id;
+$$;
+
+create or replace function dashboard_metrics()
+returns table (user_count bigint, subscription_count bigint, payment_count bigint, total_revenue numeric)
+language sql stable as $$
+    select
+        (select count(*) from users),
+        (select count(*) from subscriptions),
+        (select count(*) from payments),
+        (select coalesce(sum(amount), 0) from payments where lower(status) = 'completed');
+$$;
@@ -0,0 +1,203 @@
+-- Idempotent replay of journaled writes (src/services/journal_service.py).
+-- Run once in the Supabase SQL editor, after writes.sql. Python stand-ins
+-- for local backends live in src/backends/functions.py and
+-- src/backends/sqlite.py and must stay in sync.
+
+-- One receipt per applied journal entry, so a replay whose response was
+-- lost is recognised instead of inserting the row twice
+create table if not exists write_receipts (
+    idempotency_key text primary key,
+    table_name text not null,
+    row_id bigint,
+    created_at timestamptz not null default now()
+);
+create index if not exists write_receipts_created_at_idx on write_receipts (created_at);
+
+-- Journal ops -> the table each one inserts into
+create or replace function journal_op_table(p_op text)
+returns text
+language sql immutable as $$
+    select case p_op when 'create_user' then 'users'
+                     when 'add_subscription' then 'subscriptions'
+                     when 'insert_payment' then 'payments' end;
+$$;
+
+-- True for a missing value or one that casts to p_type (Postgres 16+)
+create or replace function journal_valid(p_value text, p_type text)
+returns boolean
+language sql stable as $$
+    select p_value is null or pg_input_is_valid(p_value, p_type);
+$$;
+
+-- The entries of p_entries this call applies: the first one with a known
+-- op of each key in p_claimed, with its position in the array
+create or replace function journal_claimed(p_entries jsonb, p_claimed text[])
+returns table (ord bigint, key text, op text, payload jsonb)
+language sql immutable as $$
+    select distinct on (e.value->>'key') e.ord, e.value->>'key', e.value->>'op', e.value->'payload'
+    from jsonb_array_elements(p_entries) with ordinality as e(value, ord)
+    where e.value->>'key' = any(p_claimed) and journal_op_table(e.value->>'op') is not null
+    order by e.value->>'key', e.ord;
+$$;
+
+-- Applies many journal entries, each key at most once. p_entries is a json
+-- array of {"key", "op", "payload"}, where op is create_user,
+-- add_subscription or insert_payment and payload holds the row's columns.
+-- Returns one row (key, status, row_id) per entry, in array order:
+--   applied    the row was inserted
+--   duplicate  the key was applied before; row_id is that row
+--   conflict   create_user for an email that already exists; row_id is that user
+--   rejected   the op is unknown, the referenced user or subscription does
+--              not exist, or a value is missing or malformed
+-- Used by the journal replicator, the payment writer and the importer, so a
+-- batch whose response was lost can be sent again without inserting its
+-- rows twice.
+--
+-- The batch is applied with one statement per step rather than an
+-- exception block (a subtransaction) per entry: past 64 subtransactions in
+-- one transaction every session starts paying for lookups that overflow
+-- the subtransaction cache. So everything is checked up front:
+--   - The keys are claimed first by inserting their receipts, in key order,
+--     with on conflict do nothing. A concurrent call with the same key waits
+--     for this one to commit and then finds the receipt; since every call
+--     takes those waits in key order (and new users in email order), two
+--     batches cannot deadlock.
+--   - Users go in before subscriptions and subscriptions before payments,
+--     so an entry may refer to a row created by an earlier one.
+--   - References are checked with joins and values with journal_valid. A
+--     value those checks let through but the table refuses (too long for
+--     its column, say) fails the whole call.
+-- Ids come from the table's sequence before the insert, which ties each
+-- new row to its entry.
+create or replace function apply_journal_entries(p_entries jsonb)
+returns table (key text, status text, row_id bigint)
+language plpgsql as $$
+#variable_conflict use_column
+declare
+    v_claimed text[];
+    v_applied text[];
+    v_more text[];
+begin
+    with claims as (
+        insert into write_receipts (idempotency_key, table_name)
+        select distinct on (e.value->>'key') e.value->>'key', journal_op_table(e.value->>'op')
+        from jsonb_array_elements(p_entries) with ordinality as e(value, ord)
+        where journal_op_table(e.value->>'op') is not null
+        order by e.value->>'key', e.ord
+        on conflict (idempotency_key) do nothing
+        returning idempotency_key
+    )
+    select coalesce(array_agg(c.idempotency_key), '{}') into v_claimed from claims c;
+
+    -- Users; of several new ones with the same email the first is inserted
+    with candidates as (
+        select distinct on (c.payload->>'email') c.key, c.payload->>'name' as name, c.payload->>'email' as email
+        from journal_claimed(p_entries, v_claimed) c
+        where c.op = 'create_user' and c.payload->>'name' is not null and c.payload->>'email' is not null
+        order by c.payload->>'email', c.ord
+    ), new as (
+        select n.*, nextval(pg_get_serial_sequence('users', 'id')) as id
+        from candidates n
+        where not exists (select 1 from users u where u.email = n.email)
+        order by n.email
+    ), inserted as (
+        insert into users (id, name, email)
+        select n.id, n.name, n.email from new n order by n.email
+        on conflict (email) do nothing
+        returning id
+    )
+    select coalesce(array_agg(n.key), '{}') into v_applied from new n join inserted i on i.id = n.id;
+    -- The new user, or the existing one with that email (a conflict). A
+    -- separate statement, so users committed meanwhile are seen.
+    update write_receipts r set row_id = u.id
+    from journal_claimed(p_entries, v_claimed) c
+    join users u on u.email = c.payload->>'email'
+    where c.op = 'create_user' and r.idempotency_key = c.key;
+
+    with new as (
+        select c.key, c.payload as p, u.id as user_id,
+               nextval(pg_get_serial_sequence('subscriptions', 'id')) as id
+        from journal_claimed(p_entries, v_claimed) c
+        join users u on u.id = case when journal_valid(c.payload->>'user_id', 'bigint')
+                                    then (c.payload->>'user_id')::bigint end
+        where c.op = 'add_subscription' and c.payload->>'name' is not null
+          and journal_valid(c.payload->>'cost', 'numeric')
+          and journal_valid(c.payload->>'start_date', 'date')
+          and journal_valid(c.payload->>'end_date', 'date')
+        order by c.ord
+    ), inserted as (
+        insert into subscriptions (id, user_id, name, plan_type, cost, start_date, end_date, status)
+        select n.id, n.user_id, n.p->>'name', n.p->>'plan_type', (n.p->>'cost')::numeric,
+               (n.p->>'start_date')::date, (n.p->>'end_date')::date, coalesce(n.p->>'status', 'Active')
+        from new n
+        returning id
+    ), receipts as (
+        update write_receipts r set row_id = n.id from new n where r.idempotency_key = n.key
+    )
+    select coalesce(array_agg(n.key), '{}') into v_more from new n join inserted i on i.id = n.id;
+    v_applied := v_applied || v_more;
+
+    with new as (
+        select c.key, c.payload as p, s.id as subscription_id,
+               nextval(pg_get_serial_sequence('payments', 'id')) as id
+        from journal_claimed(p_entries, v_claimed) c
+        join subscriptions s on s.id = case when journal_valid(c.payload->>'subscription_id', 'bigint')
+                                            then (c.payload->>'subscription_id')::bigint end
+        where c.op = 'insert_payment'
+          and journal_valid(c.payload->>'amount', 'numeric')
+          and journal_valid(c.payload->>'payment_date', 'timestamptz')
+        order by c.ord
+    ), inserted as (
+        insert into payments (id, subscription_id, amount, payment_date, method, status)
+        select n.id, n.subscription_id, (n.p->>'amount')::numeric,
+               coalesce((n.p->>'payment_date')::timestamptz, now()), n.p->>'method', n.p->>'status'
+        from new n
+        returning id
+    ), receipts as (
+        update write_receipts r set row_id = n.id from new n where r.idempotency_key = n.key
+    )
+    select coalesce(array_agg(n.key), '{}') into v_more from new n join inserted i on i.id = n.id;
+    v_applied := v_applied || v_more;
+
+    -- Claimed keys that were rejected get no receipt, as before
+    delete from write_receipts r where r.idempotency_key = any(v_claimed) and r.row_id is null;
+
+    return query
+    select e.value->>'key',
+           case when r.row_id is null then 'rejected'
+                when e.ord <> min(e.ord) filter (where journal_op_table(e.value->>'op') is not null)
+                                  over (partition by e.value->>'key')
+                     or not e.value->>'key' = any(v_claimed) then 'duplicate'
+                when e.value->>'key' = any(v_applied) then 'applied'
+                else 'conflict' end,
+           r.row_id
+    from jsonb_array_elements(p_entries) with ordinality as e(value, ord)
+    left join write_receipts r
+           on r.idempotency_key = e.value->>'key' and journal_op_table(e.value->>'op') is not null
+    order by e.ord;
+end;
+$$;
+
+-- Applies one journal entry at most once; returns one row (status, row_id)
+-- with the statuses of apply_journal_entries
+create or replace function apply_journal_entry(p_key text, p_op text, p_payload jsonb)
+returns table (status text, row_id bigint)
+language sql as $$
+    select r.status, r.row_id
+    from apply_journal_entries(jsonb_build_array(
+        jsonb_build_object('key', p_key, 'op', p_op, 'payload', p_payload))) r;
+$$;
+
+-- Deletes receipts older than p_days and returns how many. A receipt only
+-- has to outlive the replays of its key: the payment writer and the
+-- importer resend a batch within minutes, the journal replicator as soon
+-- as the database is back. Run it daily, e.g. with pg_cron:
+--   select cron.schedule('prune-write-receipts', '0 3 * * *', 'select prune_write_receipts()');
+create or replace function prune_write_receipts(p_days integer default 30)
+returns table (deleted bigint)
+language sql as $$
+    with pruned as (
+        delete from write_receipts r where r.created_at < now() - make_interval(days => p_days) returning 1
+    )
+    select count(*) from pruned;
+$$;
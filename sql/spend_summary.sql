@@ -0,0 +1,140 @@
+-- Per-subscription and per-user payment totals, kept up to date by
+-- triggers on payments so spend lookups read one row instead of summing
+-- every payment. Run once in the Supabase SQL editor, after sync.sql.
+-- The local backends have the same tables and triggers
+-- (src/backends/sqlite.py, src/backends/functions.py).
+-- Status values are compared case-insensitively.
+
+create table if not exists subscription_spend (
+    subscription_id bigint primary key,
+    user_id bigint,
+    completed_total numeric not null default 0,
+    pending_total numeric not null default 0,
+    failed_total numeric not null default 0,
+    payment_count bigint not null default 0,
+    last_payment_date timestamptz
+);
+create index if not exists idx_subscription_spend_user_id on subscription_spend (user_id);
+
+create table if not exists user_spend (
+    user_id bigint primary key,
+    completed_total numeric not null default 0,
+    pending_total numeric not null default 0,
+    failed_total numeric not null default 0,
+    payment_count bigint not null default 0,
+    last_payment_date timestamptz
+);
+
+-- Rebuilds the rows of one subscription and of the user owning it
+create or replace function recompute_spend(p_subscription_id bigint)
+returns void
+language plpgsql as $$
+declare
+    v_user_id bigint := (select user_id from subscriptions where id = p_subscription_id);
+begin
+    delete from subscription_spend where subscription_id = p_subscription_id;
+    insert into subscription_spend (subscription_id, user_id, completed_total, pending_total, failed_total,
+                                    payment_count, last_payment_date)
+    select p.subscription_id, v_user_id,
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'completed'), 0),
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'pending'), 0),
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'failed'), 0),
+           count(*), max(p.payment_date)
+    from payments p
+    where p.subscription_id = p_subscription_id
+    group by p.subscription_id;
+
+    if v_user_id is not null then
+        delete from user_spend where user_id = v_user_id;
+        insert into user_spend (user_id, completed_total, pending_total, failed_total, payment_count, last_payment_date)
+        select user_id, sum(completed_total), sum(pending_total), sum(failed_total), sum(payment_count), max(last_payment_date)
+        from subscription_spend
+        where user_id = v_user_id
+        group by user_id;
+    end if;
+end;
+$$;
+
+-- Inserts add to the totals; updates and deletes recompute the affected rows
+create or replace function apply_payment_to_spend()
+returns trigger
+language plpgsql as $$
+declare
+    v_user_id bigint;
+    v_completed numeric;
+    v_pending numeric;
+    v_failed numeric;
+begin
+    if tg_op <> 'INSERT' then
+        perform recompute_spend(old.subscription_id);
+        if tg_op = 'UPDATE' and new.subscription_id is distinct from old.subscription_id then
+            perform recompute_spend(new.subscription_id);
+        end if;
+        return null;
+    end if;
+
+    v_user_id := (select user_id from subscriptions where id = new.subscription_id);
+    v_completed := case when lower(new.status) = 'completed' then coalesce(new.amount, 0) else 0 end;
+    v_pending := case when lower(new.status) = 'pending' then coalesce(new.amount, 0) else 0 end;
+    v_failed := case when lower(new.status) = 'failed' then coalesce(new.amount, 0) else 0 end;
+
+    insert into subscription_spend as s (subscription_id, user_id, completed_total, pending_total, failed_total,
+                                         payment_count, last_payment_date)
+    values (new.subscription_id, v_user_id, v_completed, v_pending, v_failed, 1, new.payment_date)
+    on conflict (subscription_id) do update set
+        completed_total = s.completed_total + excluded.completed_total,
+        pending_total = s.pending_total + excluded.pending_total,
+        failed_total = s.failed_total + excluded.failed_total,
+        payment_count = s.payment_count + 1,
+        last_payment_date = greatest(s.last_payment_date, excluded.last_payment_date);
+
+    if v_user_id is not null then
+        insert into user_spend as u (user_id, completed_total, pending_total, failed_total, payment_count, last_payment_date)
+        values (v_user_id, v_completed, v_pending, v_failed, 1, new.payment_date)
+        on conflict (user_id) do update set
+            completed_total = u.completed_total + excluded.completed_total,
+            pending_total = u.pending_total + excluded.pending_total,
+            failed_total = u.failed_total + excluded.failed_total,
+            payment_count = u.payment_count + 1,
+            last_payment_date = greatest(u.last_payment_date, excluded.last_payment_date);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace trigger trg_payments_spend_insert
+    after insert on payments for each row execute function apply_payment_to_spend();
+create or replace trigger trg_payments_spend_update
+    after update of subscription_id, amount, status, payment_date on payments
+    for each row execute function apply_payment_to_spend();
+create or replace trigger trg_payments_spend_delete
+    after delete on payments for each row execute function apply_payment_to_spend();
+
+-- Full rebuild, for repairs and after bulk loads that bypass the triggers
+create or replace function rebuild_spend_summary()
+returns table (subscriptions bigint, users bigint)
+language plpgsql as $$
+begin
+    -- "where true": pg_safeupdate, which PostgREST loads, rejects a delete without a where clause
+    delete from subscription_spend where true;
+    delete from user_spend where true;
+    insert into subscription_spend (subscription_id, user_id, completed_total, pending_total, failed_total,
+                                    payment_count, last_payment_date)
+    select p.subscription_id, s.user_id,
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'completed'), 0),
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'pending'), 0),
+           coalesce(sum(p.amount) filter (where lower(p.status) = 'failed'), 0),
+           count(*), max(p.payment_date)
+    from payments p
+    left join subscriptions s on s.id = p.subscription_id
+    group by p.subscription_id, s.user_id;
+
+    insert into user_spend (user_id, completed_total, pending_total, failed_total, payment_count, last_payment_date)
+    select user_id, sum(completed_total), sum(pending_total), sum(failed_total), sum(payment_count), max(last_payment_date)
+    from subscription_spend
+    where user_id is not null
+    group by user_id;
+
+    return query select (select count(*) from subscription_spend), (select count(*) from user_spend);
+end;
+$$;
@@ -0,0 +1,59 @@
+-- Change tracking used by src/services/sync_service.py to keep a local
+-- replica up to date. Run once in the Supabase SQL editor, after the
+-- tables exist. The SQLite backend creates the same columns and triggers
+-- itself (src/backends/sqlite.py).
+
+-- updated_at: set on insert, bumped on every update
+create or replace function touch_updated_at()
+returns trigger language plpgsql as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+alter table users add column if not exists updated_at timestamptz not null default now();
+alter table subscriptions add column if not exists updated_at timestamptz not null default now();
+alter table payments add column if not exists updated_at timestamptz not null default now();
+alter table defaultsubscriptions add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists idx_users_updated_at on users (updated_at);
+create index if not exists idx_subscriptions_updated_at on subscriptions (updated_at);
+create index if not exists idx_payments_updated_at on payments (updated_at);
+create index if not exists idx_defaultsubscriptions_updated_at on defaultsubscriptions (updated_at);
+
+create or replace trigger trg_users_touch before update on users
+    for each row execute function touch_updated_at();
+create or replace trigger trg_subscriptions_touch before update on subscriptions
+    for each row execute function touch_updated_at();
+create or replace trigger trg_payments_touch before update on payments
+    for each row execute function touch_updated_at();
+create or replace trigger trg_defaultsubscriptions_touch before update on defaultsubscriptions
+    for each row execute function touch_updated_at();
+
+-- Tombstones: one row per deleted record, read in id order by the sync
+create table if not exists deleted_rows (
+    id bigserial primary key,
+    table_name text not null,
+    row_id bigint not null,
+    deleted_at timestamptz not null default now()
+);
+-- The sync re-reads recent tombstones by time, see src/services/sync_service.py
+create index if not exists idx_deleted_rows_deleted_at on deleted_rows (deleted_at);
+
+create or replace function record_deleted_row()
+returns trigger language plpgsql as $$
+begin
+    insert into deleted_rows (table_name, row_id) values (tg_table_name, old.id);
+    return old;
+end;
+$$;
+
+create or replace trigger trg_users_deleted after delete on users
+    for each row execute function record_deleted_row();
+create or replace trigger trg_subscriptions_deleted after delete on subscriptions
+    for each row execute function record_deleted_row();
+create or replace trigger trg_payments_deleted after delete on payments
+    for each row execute function record_deleted_row();
+create or replace trigger trg_defaultsubscriptions_deleted after delete on defaultsubscriptions
+    for each row execute function record_deleted_row();
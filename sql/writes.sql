@@ -0,0 +1,45 @@
+-- Single-request writes used by src/dao/User_dao.py and src/dao/payment_dao.py.
+-- Run once in the Supabase SQL editor. Python stand-ins for local
+-- backends live in src/backends/functions.py and must stay in sync.
+
+-- UserDAO.create_user_if_new upserts on email and ignores duplicates,
+-- which needs a unique constraint to conflict on
+create unique index if not exists users_email_key on users (email);
+
+-- Deletes a user unless they still have subscriptions.
+-- Returns 'deleted', 'not_found' or 'has_subscriptions'.
+create or replace function delete_user_if_unsubscribed(p_user_id bigint)
+returns table (status text)
+language plpgsql as $$
+begin
+    -- Locking the row blocks concurrent inserts of subscriptions for this
+    -- user (their foreign key check needs a share lock on it)
+    perform 1 from users where id = p_user_id for update;
+    if not found then
+        return query select 'not_found'::text;
+        return;
+    end if;
+    if exists (select 1 from subscriptions s where s.user_id = p_user_id) then
+        return query select 'has_subscriptions'::text;
+        return;
+    end if;
+    delete from users where id = p_user_id;
+    return query select 'deleted'::text;
+end;
+$$;
+
+-- Records a payment if the subscription exists; returns the new row, or
+-- no rows when there is no such subscription
+create or replace function insert_payment_checked(
+    p_subscription_id bigint,
+    p_amount numeric,
+    p_method text,
+    p_status text
+)
+returns setof payments
+language sql as $$
+    insert into payments (subscription_id, amount, payment_date, method, status)
+    select p_subscription_id, p_amount, now(), p_method, p_status
+    where exists (select 1 from subscriptions where id = p_subscription_id)
+    returning *;
+$$;
@@ -0,0 +1,180 @@
+"""
+Building blocks for local stand-ins of the Supabase client.
+
+The DAOs only use a small part of the supabase-py API:
+table(...).select/insert/upsert/update/delete, a handful of filters,
+order/limit and execute(), plus rpc(...) for server-side functions.
+LocalClient reproduces that surface so a DAO works the same whether
+self._sb is a real Supabase client or a local backend.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Response:
+    """Mirrors the fields of postgrest's APIResponse that the DAOs read."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class Query:
+    """Records a table query the same way postgrest's request builder does."""
+
+    def __init__(self, client: "LocalClient", table: str):
+        self._client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload = None
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+        self.filters = []
+        self.ordering = []
+        self.limit_count = None
+        self.offset = 0
+        self.single_row = False
+
+    # --- Actions ---
+    def select(self, *columns: str, count: Optional[str] = None) -> "Query":
+        self.action = "select"
+        self.columns = ",".join(columns) if columns else "*"
+        self.count = count
+        return self
+
+    def insert(self, payload, **kwargs) -> "Query":
+        self.action = "insert"
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs) -> "Query":
+        self.action = "upsert"
+        self.payload = payload
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, payload: Dict, **kwargs) -> "Query":
+        self.action = "update"
+        self.payload = payload
+        return self
+
+    def delete(self, **kwargs) -> "Query":
+        self.action = "delete"
+        return self
+
+    # --- Filters ---
+    def _filter(self, op: str, column: str, value: Any) -> "Query":
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        return self._filter("eq", column, value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        return self._filter("neq", column, value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        return self._filter("gt", column, value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        return self._filter("gte", column, value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        return self._filter("lt", column, value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        return self._filter("lte", column, value)
+
+    def in_(self, column: str, values) -> "Query":
+        return self._filter("in", column, list(values))
+
+    def is_(self, column: str, value: Any) -> "Query":
+        return self._filter("is", column, None if value in (None, "null") else value)
+
+    # --- Modifiers ---
+    def order(self, column: str, desc: bool = False) -> "Query":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "Query":
+        self.limit_count = size
+        return self
+
+    def range(self, start: int, end: int) -> "Query":
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    def single(self) -> "Query":
+        self.single_row = True
+        return self
+
+    maybe_single = single
+
+    def execute(self) -> Response:
+        return self._client._execute(self)
+
+
+class RpcCall:
+    """A pending call to a server-side function, executed with execute()."""
+
+    def __init__(self, client: "LocalClient", fn: str, params: Optional[Dict]):
+        self._client = client
+        self.fn = fn
+        self.params = params or {}
+        self.offset = 0
+        self.limit_count = None
+
+    def range(self, start: int, end: int) -> "RpcCall":
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    def execute(self) -> Response:
+        func = self._client.functions.get(self.fn)
+        if func is None:
+            raise RuntimeError(f"Function '{self.fn}' is not available in the local backend.")
+        data = func(self._client, **self.params)
+        if isinstance(data, list):
+            # Like PostgREST: the requested range, and at most max_rows rows of it
+            limits = [n for n in (self.limit_count, self._client.max_rows) if n is not None]
+            data = data[self.offset:self.offset + min(limits) if limits else None]
+        return Response(data)
+
+
+class LocalClient:
+    """
+    Base class for local backends. Subclasses implement _execute() for
+    table queries; server-side functions are plain Python callables
+    registered in `functions` and receive the client as first argument.
+    """
+
+    # Unlike PostgREST (see src/dao/pagination.py), every matching row is returned
+    max_rows: Optional[int] = None
+
+    def __init__(self, functions: Optional[Dict[str, Callable]] = None):
+        from src.backends.functions import DEFAULT_FUNCTIONS
+        self.functions = dict(DEFAULT_FUNCTIONS)
+        if functions:
+            self.functions.update(functions)
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> RpcCall:
+        return RpcCall(self, fn, params)
+
+    def _execute(self, query: Query) -> Response:
+        raise NotImplementedError
+
+
+def parse_columns(columns: str) -> Optional[List[str]]:
+    """Turns a select() column string into a list, or None for '*'."""
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    if not names or "*" in names:
+        return None
+    return names
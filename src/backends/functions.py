@@ -0,0 +1,259 @@
+"""
+Python stand-ins for the server-side SQL functions in sql/aggregates.sql,
+sql/spend_summary.sql and sql/writes.sql. Each one takes the local client plus the same
+named parameters as the SQL function and returns the rows the real
+function would. DEFAULT_TRIGGERS stand in for the table triggers.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+
+def _status_matches(status: Optional[str], wanted: Optional[str]) -> bool:
+    # Status values are compared case-insensitively, like the SQL functions
+    return wanted is None or (status or "").lower() == wanted.lower()
+
+
+def revenue_by_status(client) -> List[Dict]:
+    totals = defaultdict(lambda: [0, 0.0])
+    for p in client.table("payments").select("status,amount").execute().data:
+        totals[p["status"]][0] += 1
+        totals[p["status"]][1] += float(p["amount"] or 0)
+    return [
+        {"status": status, "payment_count": count, "total_amount": amount}
+        for status, (count, amount) in sorted(totals.items(), key=lambda item: str(item[0]))
+    ]
+
+
+def subscriptions_per_user(client) -> List[Dict]:
+    counts = defaultdict(int)
+    for s in client.table("subscriptions").select("user_id").execute().data:
+        counts[s["user_id"]] += 1
+    return [{"user_id": user_id, "subscription_count": n} for user_id, n in sorted(counts.items())]
+
+
+def spend_per_subscription(client, p_subscription_ids: Optional[List[int]] = None, p_status: Optional[str] = "Completed") -> List[Dict]:
+    query = client.table("payments").select("subscription_id,status,amount")
+    if p_subscription_ids is not None:
+        query = query.in_("subscription_id", p_subscription_ids)
+    totals = defaultdict(float)
+    for p in query.execute().data:
+        if _status_matches(p["status"], p_status):
+            totals[p["subscription_id"]] += float(p["amount"] or 0)
+    return [{"subscription_id": sub_id, "total_spend": total} for sub_id, total in sorted(totals.items())]
+
+
+def spend_per_user(client, p_user_id: Optional[int] = None, p_status: Optional[str] = "Completed") -> List[Dict]:
+    query = client.table("subscriptions").select("id,user_id")
+    if p_user_id is not None:
+        query = query.eq("user_id", p_user_id)
+    owner = {s["id"]: s["user_id"] for s in query.execute().data}
+    totals = defaultdict(float)
+    for row in spend_per_subscription(client, list(owner), p_status):
+        totals[owner[row["subscription_id"]]] += row["total_spend"]
+    return [{"user_id": user_id, "total_spend": total} for user_id, total in sorted(totals.items())]
+
+
+def dashboard_metrics(client) -> List[Dict]:
+    revenue = sum(r["total_amount"] for r in revenue_by_status(client) if _status_matches(r["status"], "Completed"))
+    return [{
+        "user_count": client.table("users").select("id", count="exact").limit(0).execute().count,
+        "subscription_count": client.table("subscriptions").select("id", count="exact").limit(0).execute().count,
+        "payment_count": client.table("payments").select("id", count="exact").limit(0).execute().count,
+        "total_revenue": revenue,
+    }]
+
+
+# --- Spend summaries (sql/spend_summary.sql) ---
+SPEND_TOTALS = {"completed": "completed_total", "pending": "pending_total", "failed": "failed_total"}
+
+
+def _empty_spend(**key) -> Dict:
+    return dict(key, completed_total=0.0, pending_total=0.0, failed_total=0.0, payment_count=0, last_payment_date=None)
+
+
+def _add_to_spend(summary: Dict, payment: Dict) -> None:
+    total = SPEND_TOTALS.get((payment.get("status") or "").lower())
+    if total:
+        summary[total] += float(payment.get("amount") or 0)
+    summary["payment_count"] += 1
+    paid_on = payment.get("payment_date")
+    if paid_on and (summary["last_payment_date"] is None or str(paid_on) > str(summary["last_payment_date"])):
+        summary["last_payment_date"] = paid_on
+
+
+def _spend_summaries(payments: List[Dict], owner: Dict[int, int], subs: Dict[int, Dict], users: Dict[int, Dict]) -> None:
+    for p in payments:
+        user_id = owner.get(p["subscription_id"])
+        _add_to_spend(subs.setdefault(p["subscription_id"], _empty_spend(subscription_id=p["subscription_id"], user_id=user_id)), p)
+        if user_id is not None:
+            _add_to_spend(users.setdefault(user_id, _empty_spend(user_id=user_id)), p)
+
+
+def apply_payments_to_spend(client, payments: List[Dict]) -> None:
+    """Trigger stand-in: adds newly inserted payments to subscription_spend and user_spend."""
+    sub_ids = list({p["subscription_id"] for p in payments})
+    owner = {s["id"]: s["user_id"] for s in client.table("subscriptions").select("id,user_id").in_("id", sub_ids).execute().data}
+    subs = {r["subscription_id"]: r for r in
+            client.table("subscription_spend").select("*").in_("subscription_id", sub_ids).execute().data}
+    users = {r["user_id"]: r for r in
+             client.table("user_spend").select("*").in_("user_id", list(set(owner.values()))).execute().data}
+    _spend_summaries(payments, owner, subs, users)
+    client.table("subscription_spend").upsert(list(subs.values()), on_conflict="subscription_id").execute()
+    if users:
+        client.table("user_spend").upsert(list(users.values()), on_conflict="user_id").execute()
+
+
+def rebuild_spend_summary(client) -> List[Dict]:
+    owner = {s["id"]: s["user_id"] for s in client.table("subscriptions").select("id,user_id").execute().data}
+    payments = client.table("payments").select("subscription_id,amount,status,payment_date").execute().data
+    subs, users = {}, {}
+    _spend_summaries(payments, owner, subs, users)
+    client.table("subscription_spend").delete().gte("payment_count", 0).execute()
+    client.table("user_spend").delete().gte("payment_count", 0).execute()
+    if subs:
+        client.table("subscription_spend").insert(list(subs.values())).execute()
+    if users:
+        client.table("user_spend").insert(list(users.values())).execute()
+    return [{"subscriptions": len(subs), "users": len(users)}]
+
+
+# --- Compound writes (sql/writes.sql) ---
+def delete_user_if_unsubscribed(client, p_user_id: int) -> List[Dict]:
+    if not client.table("users").select("id").eq("id", p_user_id).execute().data:
+        return [{"status": "not_found"}]
+    if client.table("subscriptions").select("id").eq("user_id", p_user_id).limit(1).execute().data:
+        return [{"status": "has_subscriptions"}]
+    client.table("users").delete().eq("id", p_user_id).execute()
+    return [{"status": "deleted"}]
+
+
+def insert_payment_checked(client, p_subscription_id: int, p_amount: float, p_method: str, p_status: str) -> List[Dict]:
+    if not client.table("subscriptions").select("id").eq("id", p_subscription_id).execute().data:
+        return []
+    payload = {"subscription_id": p_subscription_id, "amount": p_amount, "payment_date": "now()",
+               "method": p_method, "status": p_status}
+    return client.table("payments").insert(payload).execute().data
+
+
+# --- Journal replay (sql/journal.sql) ---
+JOURNAL_OPS = {
+    "create_user": ("users", ("name", "email")),
+    "add_subscription": ("subscriptions", ("user_id", "name", "plan_type", "cost", "start_date", "end_date", "status")),
+    "insert_payment": ("payments", ("subscription_id", "amount", "payment_date", "method", "status")),
+}
+
+
+def apply_journal_entry(client, p_key: str, p_op: str, p_payload: Dict) -> List[Dict]:
+    result = apply_journal_entries(client, [{"key": p_key, "op": p_op, "payload": p_payload}])[0]
+    return [{"status": result["status"], "row_id": result["row_id"]}]
+
+
+def _journal_lookups(client, entries: List[Dict]) -> Dict:
+    """What the entries' checks need, fetched once per call instead of once per entry."""
+    def ids(op, column):
+        return list({e["payload"].get(column) for e in entries if e["op"] == op} - {None})
+
+    receipts = client.table("write_receipts").select("idempotency_key,row_id").in_(
+        "idempotency_key", [e["key"] for e in entries]).execute().data
+    users = client.table("users").select("id").in_("id", ids("add_subscription", "user_id")).execute().data
+    subscriptions = client.table("subscriptions").select("id").in_("id", ids("insert_payment", "subscription_id")).execute().data
+    emails = client.table("users").select("id,email").in_("email", ids("create_user", "email")).execute().data
+    return {
+        "receipts": {r["idempotency_key"]: r["row_id"] for r in receipts},
+        "users": {u["id"] for u in users},
+        "subscriptions": {s["id"] for s in subscriptions},
+        "emails": {u["email"]: u["id"] for u in emails},
+    }
+
+
+def apply_journal_entries(client, p_entries: List[Dict]) -> List[Dict]:
+    lookups = _journal_lookups(client, p_entries)
+    results: List[Optional[Dict]] = [None] * len(p_entries)
+    run: List[tuple] = []  # (index, entry, row) waiting to be inserted, all with the same op
+    run_keys: set = set()  # keys and emails in `run`
+
+    def insert_run():
+        # Consecutive entries of one op go in as one multi-row insert (one
+        # trigger call), which keeps large batches fast on local backends
+        if not run:
+            return
+        table = JOURNAL_OPS[run[0][1]["op"]][0]
+        created = client.table(table).insert([row for _, _, row in run]).execute().data
+        for (index, entry, row), new in zip(run, created):
+            results[index] = {"key": entry["key"], "status": "applied", "row_id": new["id"]}
+            lookups["receipts"][entry["key"]] = new["id"]
+            if table == "users":
+                lookups["users"].add(new["id"])
+                lookups["emails"][row["email"]] = new["id"]
+            elif table == "subscriptions":
+                lookups["subscriptions"].add(new["id"])
+        client.table("write_receipts").insert([
+            {"idempotency_key": entry["key"], "table_name": table, "row_id": new["id"], "created_at": "now()"}
+            for (_, entry, _), new in zip(run, created)
+        ]).execute()
+        run.clear()
+        run_keys.clear()
+
+    for index, entry in enumerate(p_entries):
+        key, op = entry["key"], entry["op"]
+        if op not in JOURNAL_OPS:
+            results[index] = {"key": key, "status": "rejected", "row_id": None}
+            continue
+        table, columns = JOURNAL_OPS[op]
+        row = {column: entry["payload"].get(column) for column in columns}
+        # An entry that depends on the pending run (same key, same email, another op) waits for it
+        if run and (op != run[0][1]["op"] or key in run_keys or ("email", row.get("email")) in run_keys):
+            insert_run()
+
+        if key in lookups["receipts"]:
+            results[index] = {"key": key, "status": "duplicate", "row_id": lookups["receipts"][key]}
+        elif op == "create_user" and row["email"] in lookups["emails"]:
+            user_id = lookups["emails"][row["email"]]
+            _record_receipt(client, key, table, user_id)
+            lookups["receipts"][key] = user_id
+            results[index] = {"key": key, "status": "conflict", "row_id": user_id}
+        elif (op == "add_subscription" and row["user_id"] not in lookups["users"]) or \
+                (op == "insert_payment" and row["subscription_id"] not in lookups["subscriptions"]):
+            results[index] = {"key": key, "status": "rejected", "row_id": None}
+        else:
+            if op == "add_subscription":
+                row["status"] = row["status"] or "Active"
+            elif op == "insert_payment":
+                row["payment_date"] = row["payment_date"] or "now()"
+            run.append((index, entry, row))
+            run_keys.add(key)
+            if op == "create_user":
+                run_keys.add(("email", row["email"]))
+    insert_run()
+    return results
+
+
+def _record_receipt(client, key: str, table: str, row_id: int) -> None:
+    client.table("write_receipts").insert(
+        {"idempotency_key": key, "table_name": table, "row_id": row_id, "created_at": "now()"}).execute()
+
+
+def prune_write_receipts(client, p_days: int = 30) -> List[Dict]:
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=p_days)).isoformat()
+    deleted = client.table("write_receipts").delete().lt("created_at", cutoff).execute().data
+    return [{"deleted": len(deleted or [])}]
+
+
+DEFAULT_TRIGGERS = {
+    "payments": [apply_payments_to_spend],
+}
+
+DEFAULT_FUNCTIONS = {
+    "revenue_by_status": revenue_by_status,
+    "subscriptions_per_user": subscriptions_per_user,
+    "spend_per_subscription": spend_per_subscription,
+    "spend_per_user": spend_per_user,
+    "dashboard_metrics": dashboard_metrics,
+    "rebuild_spend_summary": rebuild_spend_summary,
+    "delete_user_if_unsubscribed": delete_user_if_unsubscribed,
+    "insert_payment_checked": insert_payment_checked,
+    "apply_journal_entry": apply_journal_entry,
+    "apply_journal_entries": apply_journal_entries,
+    "prune_write_receipts": prune_write_receipts,
+}
@@ -0,0 +1,188 @@
+"""
+In-memory stand-in for the Supabase client, used by tests and local runs.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.backends.base import LocalClient, Query, Response, parse_columns
+from src.backends.functions import DEFAULT_TRIGGERS
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+    "is": lambda a, b: a is b,
+}
+
+
+def _matches(row: Dict, filters) -> bool:
+    return all(_OPERATORS[op](row.get(column), value) for op, column, value in filters)
+
+
+def _prepared(filters):
+    """`in` filters get their values as a set, so a long list is not scanned for every row."""
+    prepared = []
+    for op, column, value in filters:
+        if op == "in":
+            try:
+                value = set(value)
+            except TypeError:  # unhashable values: keep the list
+                pass
+        prepared.append((op, column, value))
+    return prepared
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Unique constraints, as in the Supabase schema (sql/writes.sql)
+UNIQUE_COLUMNS = {
+    "users": [("email",)],
+    "subscription_spend": [("subscription_id",)],
+    "user_spend": [("user_id",)],
+    "write_receipts": [("idempotency_key",)],
+}
+
+
+class IntegrityError(ValueError):
+    """A write that would break a unique constraint."""
+
+
+class MemoryClient(LocalClient):
+    """Keeps every table as a list of row dicts with auto-incrementing ids."""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None, functions=None, triggers=None):
+        super().__init__(functions)
+        # After-insert callbacks per table, standing in for database triggers.
+        # Rows passed to the constructor are loaded without firing them.
+        self.triggers = {table: list(callbacks) for table, callbacks in DEFAULT_TRIGGERS.items()}
+        for table, callbacks in (triggers or {}).items():
+            self.triggers.setdefault(table, []).extend(callbacks)
+        self._lock = threading.RLock()
+        # Functions run as one transaction: nothing else touches the tables meanwhile
+        self.functions = {name: self._atomic(func) for name, func in self.functions.items()}
+        self._tables: Dict[str, List[Dict]] = {}
+        # (table, columns) -> values taken, for the unique constraints
+        self._unique_keys: Dict[tuple, set] = {}
+        self._next_id: Dict[str, int] = {}
+        for name, rows in (tables or {}).items():
+            self._insert(name, rows)
+
+    def rows(self, table: str) -> List[Dict]:
+        """Returns a snapshot of a table's rows."""
+        with self._lock:
+            return [dict(row) for row in self._tables.get(table, [])]
+
+    def _atomic(self, func):
+        def call(client, **params):
+            with self._lock:
+                return func(client, **params)
+        return call
+
+    def _check_unique(self, table: str, row: Dict, old: Optional[Dict] = None) -> None:
+        """Raises IntegrityError if `row` (replacing `old`, if given) repeats a unique key."""
+        for columns in UNIQUE_COLUMNS.get(table, ()):
+            key = tuple(row.get(c) for c in columns)
+            if None in key or (old is not None and key == tuple(old.get(c) for c in columns)):
+                continue
+            if key in self._unique_keys.setdefault((table, columns), set()):
+                raise IntegrityError(f"duplicate key value violates unique constraint on {table} ({', '.join(columns)})")
+
+    def _index_rows(self, table: str, rows: List[Dict], add: bool = True) -> None:
+        for columns in UNIQUE_COLUMNS.get(table, ()):
+            keys = self._unique_keys.setdefault((table, columns), set())
+            change = keys.add if add else keys.discard
+            for row in rows:
+                key = tuple(row.get(c) for c in columns)
+                if None not in key:
+                    change(key)
+
+    def _insert(self, table: str, rows: List[Dict]) -> List[Dict]:
+        stored = self._tables.setdefault(table, [])
+        inserted = []
+        try:
+            for payload in rows:
+                row = {k: (_now() if v == "now()" else v) for k, v in payload.items()}
+                self._check_unique(table, row)
+                if row.get("id") is None:
+                    row["id"] = self._next_id.get(table, 1)
+                self._next_id[table] = max(self._next_id.get(table, 1), row["id"] + 1)
+                stored.append(row)
+                self._index_rows(table, [row])
+                inserted.append(dict(row))
+        except IntegrityError:
+            # All or nothing, like a multi-row insert in one statement
+            del stored[len(stored) - len(inserted):]
+            self._index_rows(table, inserted, add=False)
+            raise
+        return inserted
+
+    def _upsert(self, query: Query, rows: List[Dict]) -> List[Dict]:
+        keys = [k.strip() for k in (query.on_conflict or "id").split(",")]
+        stored = self._tables.setdefault(query.table, [])
+        affected = []
+        for payload in rows:
+            existing = next(
+                (row for row in stored if all(k in payload and row.get(k) == payload[k] for k in keys)),
+                None,
+            )
+            if existing is None:
+                affected.extend(self._insert(query.table, [payload]))
+            elif not query.ignore_duplicates:
+                self._update_row(query.table, existing, payload)
+                affected.append(dict(existing))
+        return affected
+
+    def _update_row(self, table: str, row: Dict, changes: Dict) -> None:
+        updated = dict(row, **changes)
+        self._check_unique(table, updated, old=row)
+        self._index_rows(table, [row], add=False)
+        row.update(changes)
+        self._index_rows(table, [row])
+
+    def _select(self, query: Query, rows: List[Dict]) -> List[Dict]:
+        for column, desc in reversed(query.ordering):
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        end = None if query.limit_count is None else query.offset + query.limit_count
+        rows = rows[query.offset:end]
+        columns = parse_columns(query.columns)
+        if columns is None:
+            return [dict(row) for row in rows]
+        return [{c: row.get(c) for c in columns} for row in rows]
+
+    def _execute(self, query: Query) -> Response:
+        with self._lock:
+            if query.action in ("insert", "upsert"):
+                payload = query.payload if isinstance(query.payload, list) else [query.payload]
+                if query.action == "insert":
+                    inserted = self._insert(query.table, payload)
+                    for trigger in self.triggers.get(query.table, []):
+                        trigger(self, inserted)
+                    return Response(inserted)
+                return Response(self._upsert(query, payload))
+
+            stored = self._tables.setdefault(query.table, [])
+            filters = _prepared(query.filters)
+            matched = [row for row in stored if _matches(row, filters)]
+
+            if query.action == "update":
+                for row in matched:
+                    self._update_row(query.table, row, query.payload)
+                return Response([dict(row) for row in matched])
+
+            if query.action == "delete":
+                self._tables[query.table] = [row for row in stored if not _matches(row, filters)]
+                self._index_rows(query.table, matched, add=False)
+                return Response([dict(row) for row in matched])
+
+            data = self._select(query, matched)
+            count = len(matched) if query.count else None
+            if query.single_row:
+                return Response(data[0] if data else None, count)
+            return Response(data, count)
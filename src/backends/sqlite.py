@@ -0,0 +1,479 @@
+"""
+SQLite implementation of the DAO storage interface.
+
+A drop-in replacement for the Supabase client: the DAOs build the same
+table(...).select(...).eq(...).execute() chains, which are translated to
+SQL here. Used as a low-latency local store and as the fixture for
+performance tests. Select it with STORAGE_BACKEND=sqlite (see src/config.py).
+"""
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.backends.base import LocalClient, Query, Response, parse_columns
+from src.backends.functions import JOURNAL_OPS
+
+SCHEMA = """
+create table if not exists users (
+    id integer primary key autoincrement,
+    name text not null,
+    email text not null,
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create unique index if not exists idx_users_email on users (email);
+
+create table if not exists subscriptions (
+    id integer primary key autoincrement,
+    user_id integer not null references users (id),
+    name text not null,
+    plan_type text,
+    cost real,
+    start_date text,
+    end_date text,
+    status text default 'Active',
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create index if not exists idx_subscriptions_user_id on subscriptions (user_id);
+
+create table if not exists payments (
+    id integer primary key autoincrement,
+    subscription_id integer not null references subscriptions (id),
+    amount real,
+    payment_date text,
+    method text,
+    status text,
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create index if not exists idx_payments_subscription_id on payments (subscription_id);
+
+create table if not exists defaultsubscriptions (
+    id integer primary key autoincrement,
+    name text not null,
+    plan_type text,
+    cost real,
+    updated_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- Applied journal entries (same as sql/journal.sql on Supabase)
+create table if not exists write_receipts (
+    idempotency_key text primary key,
+    table_name text not null,
+    row_id integer,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+-- Change tracking for incremental sync (same as sql/sync.sql on Supabase)
+create table if not exists deleted_rows (
+    id integer primary key autoincrement,
+    table_name text not null,
+    row_id integer not null,
+    deleted_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+create index if not exists idx_deleted_rows_deleted_at on deleted_rows (deleted_at);
+"""
+
+TRACKED_TABLES = ("users", "subscriptions", "payments", "defaultsubscriptions")
+
+# updated_at is filled on insert and bumped on every update; deletes leave
+# a tombstone in deleted_rows.
+CHANGE_TRACKING = "".join(f"""
+create index if not exists idx_{table}_updated_at on {table} (updated_at);
+create trigger if not exists trg_{table}_touch after update on {table}
+for each row when new.updated_at is old.updated_at begin
+    update {table} set updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') where id = new.id;
+end;
+create trigger if not exists trg_{table}_deleted after delete on {table} begin
+    insert into deleted_rows (table_name, row_id) values ('{table}', old.id);
+end;
+""" for table in TRACKED_TABLES)
+
+# Per-subscription and per-user payment totals (same as sql/spend_summary.sql
+# on Supabase). An insert adds the payment to both rows; updates and deletes
+# recompute the rows of the subscriptions they touch.
+_SPEND_COLUMNS = "completed_total, pending_total, failed_total, payment_count, last_payment_date"
+_SPEND_TABLE = """
+    completed_total real not null default 0,
+    pending_total real not null default 0,
+    failed_total real not null default 0,
+    payment_count integer not null default 0,
+    last_payment_date text
+"""
+_SPEND_INCREMENT = """
+    completed_total = completed_total + excluded.completed_total,
+    pending_total = pending_total + excluded.pending_total,
+    failed_total = failed_total + excluded.failed_total,
+    payment_count = payment_count + 1,
+    last_payment_date = case when last_payment_date is null or excluded.last_payment_date > last_payment_date
+                        then excluded.last_payment_date else last_payment_date end
+"""
+
+
+def _spend_values(p: str) -> str:
+    return (f"case when lower({p}.status) = 'completed' then coalesce({p}.amount, 0) else 0 end, "
+            f"case when lower({p}.status) = 'pending' then coalesce({p}.amount, 0) else 0 end, "
+            f"case when lower({p}.status) = 'failed' then coalesce({p}.amount, 0) else 0 end")
+
+
+def _spend_totals(p: str) -> str:
+    return (f"sum(case when lower({p}.status) = 'completed' then coalesce({p}.amount, 0) else 0 end), "
+            f"sum(case when lower({p}.status) = 'pending' then coalesce({p}.amount, 0) else 0 end), "
+            f"sum(case when lower({p}.status) = 'failed' then coalesce({p}.amount, 0) else 0 end), "
+            f"count(*), max({p}.payment_date)")
+
+
+def _recompute_spend(subscription_id: str) -> str:
+    """Statements that rebuild the summary rows of one subscription and its user."""
+    user_id = f"(select user_id from subscriptions where id = {subscription_id})"
+    return f"""
+    delete from subscription_spend where subscription_id = {subscription_id};
+    insert into subscription_spend (subscription_id, user_id, {_SPEND_COLUMNS})
+    select p.subscription_id, {user_id}, {_spend_totals("p")}
+    from payments p where p.subscription_id = {subscription_id} group by p.subscription_id;
+    delete from user_spend where user_id = {user_id};
+    insert into user_spend (user_id, {_SPEND_COLUMNS})
+    select user_id, sum(completed_total), sum(pending_total), sum(failed_total), sum(payment_count), max(last_payment_date)
+    from subscription_spend where user_id = {user_id} group by user_id;
+"""
+
+
+SPEND_SUMMARY = f"""
+create table if not exists subscription_spend (
+    subscription_id integer primary key,
+    user_id integer,{_SPEND_TABLE});
+create index if not exists idx_subscription_spend_user_id on subscription_spend (user_id);
+
+create table if not exists user_spend (
+    user_id integer primary key,{_SPEND_TABLE});
+
+create trigger if not exists trg_payments_spend_insert after insert on payments begin
+    insert into subscription_spend (subscription_id, user_id, {_SPEND_COLUMNS})
+    select new.subscription_id, (select user_id from subscriptions where id = new.subscription_id),
+           {_spend_values("new")}, 1, new.payment_date
+    where true
+    on conflict (subscription_id) do update set {_SPEND_INCREMENT};
+    insert into user_spend (user_id, {_SPEND_COLUMNS})
+    select s.user_id, {_spend_values("new")}, 1, new.payment_date
+    from subscriptions s where s.id = new.subscription_id
+    on conflict (user_id) do update set {_SPEND_INCREMENT};
+end;
+create trigger if not exists trg_payments_spend_update
+after update of subscription_id, amount, status, payment_date on payments begin
+    {_recompute_spend("old.subscription_id")}
+    {_recompute_spend("new.subscription_id")}
+end;
+create trigger if not exists trg_payments_spend_delete after delete on payments begin
+    {_recompute_spend("old.subscription_id")}
+end;
+"""
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _ident(name: str) -> str:
+    """Validates a table/column name before it is put into SQL."""
+    name = name.strip()
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier '{name}'")
+    return f'"{name}"'
+
+
+def _value(value):
+    return datetime.now(timezone.utc).isoformat() if value == "now()" else value
+
+
+class SQLiteClient(LocalClient):
+    """
+    Stores the tables in a SQLite file (or ":memory:"). One connection is
+    shared behind a lock, so the client can be used from several threads.
+    """
+
+    def __init__(self, path: str = ":memory:", functions=None):
+        super().__init__()
+        self.functions.update(SQL_FUNCTIONS)
+        self.functions.update(functions or {})
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("pragma journal_mode = wal")
+        self._conn.execute("pragma foreign_keys = on")
+        self._conn.executescript(SCHEMA + CHANGE_TRACKING + SPEND_SUMMARY)
+        # Files created before the summary tables existed start out filled
+        if self.query("select exists(select 1 from payments) and not exists(select 1 from subscription_spend) as stale")[0]["stale"]:
+            _rebuild_spend_summary(self)
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """Runs raw SQL and returns the rows as dicts."""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # --- SQL building ---
+    def _where(self, filters) -> Tuple[str, List]:
+        clauses, params = [], []
+        for op, column, value in filters:
+            col = _ident(column)
+            if op == "in":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{col} in ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            elif op == "is":
+                clauses.append(f"{col} is null" if value is None else f"{col} is ?")
+                if value is not None:
+                    params.append(value)
+            else:
+                clauses.append(f"{col} {_OPERATORS[op]} ?")
+                params.append(value)
+        return (" where " + " and ".join(clauses)) if clauses else "", params
+
+    def _returning(self, query: Query) -> str:
+        columns = parse_columns(query.columns) if query.action == "select" else None
+        return "*" if columns is None else ", ".join(_ident(c) for c in columns)
+
+    def _select(self, query: Query) -> Response:
+        table = _ident(query.table)
+        where, params = self._where(query.filters)
+        sql = f"select {self._returning(query)} from {table}{where}"
+        if query.ordering:
+            sql += " order by " + ", ".join(f"{_ident(c)} {'desc' if desc else 'asc'}" for c, desc in query.ordering)
+        if query.limit_count is not None or query.offset:
+            sql += f" limit {int(query.limit_count if query.limit_count is not None else -1)} offset {int(query.offset)}"
+        data = self.query(sql, tuple(params))
+
+        count = None
+        if query.count:
+            count = self.query(f"select count(*) as n from {table}{where}", tuple(params))[0]["n"]
+        if query.single_row:
+            return Response(data[0] if data else None, count)
+        return Response(data, count)
+
+    def _insert(self, query: Query) -> Response:
+        rows = query.payload if isinstance(query.payload, list) else [query.payload]
+        if not rows:
+            return Response([])
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        col_sql = ", ".join(_ident(c) for c in columns)
+        sql = f"insert into {_ident(query.table)} ({col_sql}) values ({', '.join('?' for _ in columns)})"
+
+        if query.action == "upsert":
+            keys = [k.strip() for k in (query.on_conflict or "id").split(",")]
+            sql += f" on conflict ({', '.join(_ident(k) for k in keys)}) do "
+            updates = [c for c in columns if c not in keys]
+            if query.ignore_duplicates or not updates:
+                sql += "nothing"
+            else:
+                sql += "update set " + ", ".join(f"{_ident(c)} = excluded.{_ident(c)}" for c in updates)
+        sql += " returning *"
+
+        created = []
+        with self._lock:
+            # One transaction per request, like a PostgREST bulk insert
+            self._conn.execute("begin")
+            try:
+                for row in rows:
+                    params = tuple(_value(row.get(c)) for c in columns)
+                    created.extend(dict(r) for r in self._conn.execute(sql, params).fetchall())
+                self._conn.execute("commit")
+            except BaseException:
+                self._conn.execute("rollback")
+                raise
+        return Response(created)
+
+    def _update(self, query: Query) -> Response:
+        where, params = self._where(query.filters)
+        sets = ", ".join(f"{_ident(c)} = ?" for c in query.payload)
+        values = [_value(v) for v in query.payload.values()]
+        sql = f"update {_ident(query.table)} set {sets}{where} returning *"
+        return Response(self.query(sql, tuple(values + params)))
+
+    def _delete(self, query: Query) -> Response:
+        where, params = self._where(query.filters)
+        return Response(self.query(f"delete from {_ident(query.table)}{where} returning *", tuple(params)))
+
+    def _execute(self, query: Query) -> Response:
+        if query.action in ("insert", "upsert"):
+            return self._insert(query)
+        if query.action == "update":
+            return self._update(query)
+        if query.action == "delete":
+            return self._delete(query)
+        return self._select(query)
+
+
+# --- Server-side functions (see sql/aggregates.sql), pushed down to SQLite ---
+def _revenue_by_status(client: SQLiteClient) -> List[Dict]:
+    return client.query(
+        "select status, count(*) as payment_count, coalesce(sum(amount), 0) as total_amount "
+        "from payments group by status order by status"
+    )
+
+
+def _subscriptions_per_user(client: SQLiteClient) -> List[Dict]:
+    return client.query(
+        "select user_id, count(*) as subscription_count from subscriptions group by user_id order by user_id"
+    )
+
+
+def _spend_per_subscription(client: SQLiteClient, p_subscription_ids: Optional[List[int]] = None, p_status: Optional[str] = "Completed") -> List[Dict]:
+    sql = "select subscription_id, coalesce(sum(amount), 0) as total_spend from payments where 1 = 1"
+    params: List = []
+    if p_subscription_ids is not None:
+        if not p_subscription_ids:
+            return []
+        sql += f" and subscription_id in ({', '.join('?' for _ in p_subscription_ids)})"
+        params.extend(p_subscription_ids)
+    if p_status is not None:
+        sql += " and lower(status) = lower(?)"
+        params.append(p_status)
+    return client.query(sql + " group by subscription_id order by subscription_id", tuple(params))
+
+
+def _spend_per_user(client: SQLiteClient, p_user_id: Optional[int] = None, p_status: Optional[str] = "Completed") -> List[Dict]:
+    sql = (
+        "select s.user_id, coalesce(sum(p.amount), 0) as total_spend "
+        "from payments p join subscriptions s on s.id = p.subscription_id where 1 = 1"
+    )
+    params: List = []
+    if p_user_id is not None:
+        sql += " and s.user_id = ?"
+        params.append(p_user_id)
+    if p_status is not None:
+        sql += " and lower(p.status) = lower(?)"
+        params.append(p_status)
+    return client.query(sql + " group by s.user_id order by s.user_id", tuple(params))
+
+
+def _dashboard_metrics(client: SQLiteClient) -> List[Dict]:
+    return client.query(
+        "select (select count(*) from users) as user_count, "
+        "(select count(*) from subscriptions) as subscription_count, "
+        "(select count(*) from payments) as payment_count, "
+        "(select coalesce(sum(amount), 0) from payments where lower(status) = 'completed') as total_revenue"
+    )
+
+
+def _rebuild_spend_summary(client: SQLiteClient) -> List[Dict]:
+    with client._lock:
+        client._conn.executescript(f"""
+            begin;
+            delete from subscription_spend;
+            delete from user_spend;
+            insert into subscription_spend (subscription_id, user_id, {_SPEND_COLUMNS})
+            select p.subscription_id, s.user_id, {_spend_totals("p")}
+            from payments p left join subscriptions s on s.id = p.subscription_id
+            group by p.subscription_id;
+            insert into user_spend (user_id, {_SPEND_COLUMNS})
+            select user_id, sum(completed_total), sum(pending_total), sum(failed_total), sum(payment_count), max(last_payment_date)
+            from subscription_spend where user_id is not null group by user_id;
+            commit;
+        """)
+    return client.query(
+        "select (select count(*) from subscription_spend) as subscriptions, (select count(*) from user_spend) as users"
+    )
+
+
+# --- Compound writes (see sql/writes.sql) ---
+def _delete_user_if_unsubscribed(client: SQLiteClient, p_user_id: int) -> List[Dict]:
+    with client._lock:
+        conn = client._conn
+        conn.execute("begin immediate")
+        try:
+            if not conn.execute("select 1 from users where id = ?", (p_user_id,)).fetchone():
+                status = "not_found"
+            elif conn.execute("select 1 from subscriptions where user_id = ? limit 1", (p_user_id,)).fetchone():
+                status = "has_subscriptions"
+            else:
+                conn.execute("delete from users where id = ?", (p_user_id,))
+                status = "deleted"
+            conn.execute("commit")
+        except BaseException:
+            conn.execute("rollback")
+            raise
+    return [{"status": status}]
+
+
+def _insert_payment_checked(client: SQLiteClient, p_subscription_id: int, p_amount: float, p_method: str, p_status: str) -> List[Dict]:
+    return client.query(
+        "insert into payments (subscription_id, amount, payment_date, method, status) "
+        "select ?, ?, ?, ?, ? where exists (select 1 from subscriptions where id = ?) returning *",
+        (p_subscription_id, p_amount, _value("now()"), p_method, p_status, p_subscription_id),
+    )
+
+
+def _apply_journal_entry(client: SQLiteClient, p_key: str, p_op: str, p_payload: Dict) -> List[Dict]:
+    if p_op not in JOURNAL_OPS:
+        return [{"status": "rejected", "row_id": None}]
+    table, columns = JOURNAL_OPS[p_op]
+    row = {column: p_payload.get(column) for column in columns}
+    if p_op == "add_subscription":
+        row["status"] = row["status"] or "Active"
+    elif p_op == "insert_payment":
+        row["payment_date"] = _value(row["payment_date"] or "now()")
+    with client._lock:
+        conn = client._conn
+        conn.execute("begin immediate")
+        try:
+            receipt = conn.execute("select row_id from write_receipts where idempotency_key = ?", (p_key,)).fetchone()
+            if receipt:
+                result = {"status": "duplicate", "row_id": receipt["row_id"]}
+            else:
+                try:
+                    row_id = conn.execute(
+                        f"insert into {table} ({', '.join(columns)}) values ({', '.join('?' for _ in columns)}) returning id",
+                        tuple(row[c] for c in columns),
+                    ).fetchone()["id"]
+                    result = {"status": "applied", "row_id": row_id}
+                except sqlite3.IntegrityError as e:
+                    existing = None
+                    if "UNIQUE" in str(e) and table == "users":
+                        existing = conn.execute("select id from users where email = ?", (row["email"],)).fetchone()
+                    # Unknown user / subscription, or a missing required value
+                    result = {"status": "conflict", "row_id": existing["id"]} if existing else {"status": "rejected", "row_id": None}
+                if result["row_id"] is not None:
+                    conn.execute("insert into write_receipts (idempotency_key, table_name, row_id) values (?, ?, ?)",
+                                 (p_key, table, result["row_id"]))
+            conn.execute("commit")
+        except BaseException:
+            conn.execute("rollback")
+            raise
+    return [result]
+
+
+def _apply_journal_entries(client: SQLiteClient, p_entries: List[Dict]) -> List[Dict]:
+    return [
+        dict(_apply_journal_entry(client, entry["key"], entry["op"], entry["payload"])[0], key=entry["key"])
+        for entry in p_entries
+    ]
+
+
+def _prune_write_receipts(client: SQLiteClient, p_days: int = 30) -> List[Dict]:
+    with client._lock:
+        deleted = client._conn.execute(
+            "delete from write_receipts where created_at < strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now', ?)",
+            (f"-{int(p_days)} days",),
+        ).rowcount
+    return [{"deleted": deleted}]
+
+
+SQL_FUNCTIONS = {
+    "revenue_by_status": _revenue_by_status,
+    "subscriptions_per_user": _subscriptions_per_user,
+    "spend_per_subscription": _spend_per_subscription,
+    "spend_per_user": _spend_per_user,
+    "dashboard_metrics": _dashboard_metrics,
+    "rebuild_spend_summary": _rebuild_spend_summary,
+    "delete_user_if_unsubscribed": _delete_user_if_unsubscribed,
+    "insert_payment_checked": _insert_payment_checked,
+    "apply_journal_entry": _apply_journal_entry,
+    "apply_journal_entries": _apply_journal_entries,
+    "prune_write_receipts": _prune_write_receipts,
+}
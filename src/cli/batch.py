@@ -0,0 +1,161 @@
+# src/cli/batch.py
+
+import json
+import sys
+import time
+from typing import Dict, Iterable, List, TextIO
+
+from src.cli.operations import Operations, OperationError
+from src.dao.fanout import DEFAULT_WORKERS, fan_out
+from src.services.import_service import ImportReport, RowError
+
+DEFAULT_GROUP_SIZE = 500
+
+
+class BatchRunner:
+    """
+    Runs a file of operations, one JSON object per line:
+
+        {"op": "create_user", "args": {"name": "Asha", "email": "asha@example.com"}}
+        {"op": "list_payments", "args": {"subscription_id": 7}, "id": "optional tag"}
+
+    Consecutive writes of the same kind (create_user, add_subscription,
+    add_payment) are sent as one multi-row insert, and consecutive reads
+    run concurrently. Operations still take effect in file order: a read
+    that follows a write sees it. One JSON result line is written per
+    operation, in input order.
+    """
+
+    def __init__(self, operations: Operations = None, concurrency: int = DEFAULT_WORKERS, group_size: int = DEFAULT_GROUP_SIZE):
+        self.ops = operations or Operations()
+        self.concurrency = concurrency
+        self.group_size = group_size
+
+    # --- Parsing ---
+    def _parse(self, line_number: int, line: str) -> Dict:
+        item = {"line": line_number}
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            op = data.get("op")
+            if op not in Operations.READS and op not in Operations.WRITES:
+                raise ValueError(f"unknown op '{op}'")
+            args = data.get("args") or {}
+            if not isinstance(args, dict):
+                raise ValueError("'args' must be an object")
+        except ValueError as e:
+            item["error"] = f"invalid operation: {e}"
+            return item
+        item.update(op=op, args=args)
+        if "id" in data:
+            item["id"] = data["id"]
+        return item
+
+    @staticmethod
+    def _kind(item: Dict):
+        if "error" in item:
+            return ("invalid",)
+        if item["op"] in Operations.READS:
+            return ("read",)
+        if item["op"] in Operations.BULK_WRITES:
+            return ("bulk", item["op"])
+        return ("single", item["line"])
+
+    # --- Execution ---
+    def _call(self, item: Dict):
+        def call():
+            try:
+                return True, getattr(self.ops, item["op"])(**item["args"])
+            except (OperationError, RowError, TypeError, ValueError) as e:
+                return False, str(e)
+            except Exception as e:
+                return False, f"{type(e).__name__}: {e}"
+        return call
+
+    def _run_reads(self, items: List[Dict]) -> None:
+        for start in range(0, len(items), self.concurrency):
+            chunk = items[start:start + self.concurrency]
+            for item, (ok, value) in zip(chunk, fan_out(*[self._call(item) for item in chunk])):
+                item["result" if ok else "error"] = value
+
+    def _run_bulk(self, op: str, items: List[Dict]) -> None:
+        table = Operations.BULK_WRITES[op]
+        batch = []
+        for item in items:
+            try:
+                batch.append((item["line"], self.ops.imports.validate_row(table, item["args"])))
+            except RowError as e:
+                item["error"] = str(e)
+
+        if op == "create_user":
+            batch = self._drop_existing_emails(batch, items)
+
+        report = ImportReport(table=table)
+        created = self.ops.imports.insert_batch(table, batch, report)
+        errors = dict(report.errors)
+        for item in items:
+            if item["line"] in created:
+                item["result"] = created[item["line"]]
+            elif item["line"] in errors:
+                item["error"] = errors[item["line"]]
+
+    def _drop_existing_emails(self, batch, items: List[Dict]):
+        # One lookup for the whole group instead of one per user
+        existing = {u["email"] for u in self.ops.user_dao.get_users_by_emails([p["email"] for _, p in batch])}
+        by_line = {item["line"]: item for item in items}
+        kept = []
+        for line, payload in batch:
+            if payload["email"] in existing:
+                by_line[line]["error"] = f"Email '{payload['email']}' already exists."
+            else:
+                existing.add(payload["email"])  # also rejects duplicates inside the file
+                kept.append((line, payload))
+        return kept
+
+    def _run_group(self, kind, items: List[Dict]) -> None:
+        if kind[0] == "read":
+            self._run_reads(items)
+        elif kind[0] == "bulk":
+            self._run_bulk(kind[1], items)
+        elif kind[0] == "single":
+            for item in items:
+                ok, value = self._call(item)()
+                item["result" if ok else "error"] = value
+
+    def _emit(self, items: List[Dict], out: TextIO, summary: Dict) -> None:
+        for item in items:
+            ok = "error" not in item
+            result = {"line": item["line"], "op": item.get("op"), "ok": ok}
+            if "id" in item:
+                result["id"] = item["id"]
+            result["result" if ok else "error"] = item.get("result") if ok else item["error"]
+            out.write(json.dumps(result, default=str) + "\n")
+            summary["succeeded" if ok else "failed"] += 1
+
+    def run(self, lines: Iterable[str], out: TextIO = sys.stdout) -> Dict:
+        """Executes the operations and returns a summary of the run."""
+        summary = {"succeeded": 0, "failed": 0}
+        start = time.perf_counter()
+
+        group, group_kind = [], None
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            item = self._parse(line_number, line)
+            kind = self._kind(item)
+            if group and (kind != group_kind or len(group) >= self.group_size):
+                self._run_group(group_kind, group)
+                self._emit(group, out, summary)
+                group = []
+            group.append(item)
+            group_kind = kind
+
+        if group:
+            self._run_group(group_kind, group)
+            self._emit(group, out, summary)
+
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+        total = summary["succeeded"] + summary["failed"]
+        summary["ops_per_minute"] = round(total / summary["seconds"] * 60) if summary["seconds"] else total
+        return summary
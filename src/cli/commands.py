@@ -0,0 +1,369 @@
+# src/cli/commands.py
+
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Union
+
+from src.cli.operations import Operations, OperationError
+
+FORMATS = ("table", "json", "csv")
+
+
+def write_output(data: Union[Dict, List[Dict], None], fmt: str, out=sys.stdout) -> None:
+    """Prints a row or a list of rows as an aligned table, JSON or CSV."""
+    if fmt == "json":
+        out.write(json.dumps(data, indent=2, default=str) + "\n")
+        return
+
+    rows = data if isinstance(data, list) else ([data] if data else [])
+    if not rows:
+        if fmt == "table":
+            out.write("No results.\n")
+        return
+
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+
+    widths = {c: max(len(c), *(len(str(row.get(c, ""))) for row in rows)) for c in columns}
+    out.write(" ".join(f"{c:<{widths[c]}}" for c in columns) + "\n")
+    out.write("-" * (sum(widths.values()) + len(columns) - 1) + "\n")
+    for row in rows:
+        out.write(" ".join(f"{str(row.get(c, '')):<{widths[c]}}" for c in columns) + "\n")
+
+
+def page_size(value: str) -> int:
+    """argparse type for --page-size: between 1 and the server's max-rows."""
+    from src.dao.pagination import configured_max_rows
+
+    size, cap = int(value), configured_max_rows()
+    if not 1 <= size <= cap:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {cap} (the server's max-rows), got {size}")
+    return size
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli.main",
+        description="Subscription Tracker. Run without arguments for the interactive menu.",
+    )
+    parser.add_argument("--format", choices=FORMATS, default="table", help="output format (default: table)")
+    parser.add_argument("--profile", action="store_true", help="print the DAO calls the command made to stderr")
+    parser.add_argument("--profile-json", metavar="PATH", help="append the DAO call trace to PATH as a JSON line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    users = commands.add_parser("users", help="manage users").add_subparsers(dest="action", required=True)
+    users.add_parser("list", help="list all users")
+    p = users.add_parser("add", help="create a user")
+    p.add_argument("--name", required=True)
+    p.add_argument("--email", required=True)
+    p = users.add_parser("delete", help="delete a user without subscriptions")
+    p.add_argument("--id", type=int, required=True, dest="user_id")
+
+    subs = commands.add_parser("subscriptions", help="manage subscriptions").add_subparsers(dest="action", required=True)
+    p = subs.add_parser("list", help="list a user's subscriptions")
+    p.add_argument("--user-id", type=int, required=True)
+    p = subs.add_parser("add", help="add a subscription for a user")
+    p.add_argument("--user-id", type=int, required=True)
+    p.add_argument("--name", required=True)
+    p.add_argument("--plan-type", choices=("monthly", "yearly"), required=True)
+    p.add_argument("--cost", type=float, required=True)
+    p.add_argument("--start-date", required=True, help="YYYY-MM-DD")
+    p.add_argument("--end-date", required=True, help="YYYY-MM-DD")
+
+    payments = commands.add_parser("payments", help="manage payments").add_subparsers(dest="action", required=True)
+    p = payments.add_parser("list", help="list a subscription's payments")
+    p.add_argument("--subscription-id", type=int, required=True)
+    p = payments.add_parser("add", help="record a payment")
+    p.add_argument("--subscription-id", type=int, required=True)
+    p.add_argument("--amount", type=float, required=True)
+    p.add_argument("--method", required=True)
+    p.add_argument("--status", choices=("Completed", "Pending", "Failed"), required=True)
+
+    p = commands.add_parser("spend", help="total spend of a user")
+    p.add_argument("--user-id", type=int)
+    p.add_argument("--rebuild", action="store_true", help="recompute the spend summaries from all payments")
+
+    p = commands.add_parser("import", help="bulk import a CSV or Parquet file")
+    p.add_argument("path")
+    p.add_argument("--table", choices=("users", "subscriptions", "payments"), required=True)
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint")
+
+    p = commands.add_parser("export", help="stream a table to a CSV or Parquet file")
+    p.add_argument("table", choices=("users", "subscriptions", "payments"))
+    p.add_argument("path", help="output file, or '-' for CSV on stdout")
+    p.add_argument("--to", choices=("csv", "parquet"), help="file format (default: from the extension, else csv)")
+    p.add_argument("--user-id", type=int, help="only this user's rows")
+    p.add_argument("--status", help="only rows with this status, e.g. Completed or Active")
+    p.add_argument("--since", help="payment (or subscription start) date from YYYY-MM-DD")
+    p.add_argument("--until", help="payment (or subscription start) date up to YYYY-MM-DD, inclusive")
+    p.add_argument("--page-size", type=page_size, default=1000, help="rows per request, up to max-rows (default: 1000)")
+
+    p = commands.add_parser("batch", help="run a JSON-lines file of operations ('-' for stdin)")
+    p.add_argument("path")
+    p.add_argument("--concurrency", type=int, default=8, help="parallel reads (default: 8)")
+    p.add_argument("--group-size", type=int, default=500, help="max rows per bulk insert (default: 500)")
+
+    p = commands.add_parser("ingest", help="record a JSON-lines backlog of payments through the buffered writer ('-' for stdin)")
+    p.add_argument("path")
+    p.add_argument("--batch-size", type=int, default=500, help="max rows per insert (default: 500)")
+    p.add_argument("--flush-interval", type=float, default=0.2, help="seconds a partial batch may wait (default: 0.2)")
+    p.add_argument("--max-pending", type=int, default=10_000, help="queued payments before reading pauses (default: 10000)")
+
+    p = commands.add_parser("journal", help="inspect or replay the local write-ahead journal")
+    p.add_argument("action", choices=("status", "replay", "list", "prune-receipts"))
+    p.add_argument("--status", choices=("pending", "applied", "duplicate", "conflict", "rejected"),
+                   help="with list: only entries with this status")
+    p.add_argument("--limit", type=int, default=50, help="with list: number of latest entries (default: 50)")
+    p.add_argument("--days", type=int, default=30,
+                   help="with prune-receipts: delete write receipts older than this (default: 30)")
+
+    p = commands.add_parser("billing", help="check payments against each subscription's billing schedule")
+    p.add_argument("--as-of", help="YYYY-MM-DD (default: today)")
+    p.add_argument("--since", help="only cycles due on or after YYYY-MM-DD")
+    p.add_argument("--grace-days", type=int, default=7, help="days a payment may be late (default: 7)")
+    p.add_argument("--all", action="store_true", help="list every cycle, not just the problems")
+    p.add_argument("--summary", action="store_true", help="only print the number of cycles per status")
+
+    p = commands.add_parser("reminders", help="subscriptions renewing or expiring soon")
+    p.add_argument("--days", type=int, default=7, help="look this many days ahead (default: 7)")
+    p.add_argument("--expired-days", type=int, default=0, help="also list plans that ended in the last N days")
+
+    p = commands.add_parser("sync", help="update the local replica with changes since the last sync")
+    p.add_argument("--replica", default=None, help="replica SQLite file (default: REPLICA_PATH or replica.db)")
+    p.add_argument("--rebuild", action="store_true", help="empty the replica and copy everything again")
+
+    return parser
+
+
+def _dispatch(args, ops: Operations):
+    key = (args.command, getattr(args, "action", None))
+    if key == ("users", "list"):
+        return ops.list_users()
+    if key == ("users", "add"):
+        return ops.create_user(args.name, args.email)
+    if key == ("users", "delete"):
+        return ops.delete_user(args.user_id)
+    if key == ("subscriptions", "list"):
+        return ops.list_subscriptions(args.user_id)
+    if key == ("subscriptions", "add"):
+        return ops.add_subscription(
+            user_id=args.user_id, name=args.name, plan_type=args.plan_type, cost=args.cost,
+            start_date=args.start_date, end_date=args.end_date,
+        )
+    if key == ("payments", "list"):
+        return ops.list_payments(args.subscription_id)
+    if key == ("payments", "add"):
+        return ops.add_payment(subscription_id=args.subscription_id, amount=args.amount, method=args.method, status=args.status)
+    if key[0] == "spend":
+        if args.rebuild:
+            return ops.rebuild_spend_summary()
+        if args.user_id is None:
+            raise OperationError("spend needs --user-id or --rebuild")
+        return ops.total_spend(args.user_id)
+    if key[0] == "import":
+        report = ops.imports.import_file(args.path, args.table, batch_size=args.batch_size, resume=not args.no_resume)
+        return {"table": report.table, "rows_read": report.rows_read, "inserted": report.inserted,
+                "resumed_from": report.resumed_from, "errors": len(report.errors)}
+    if key[0] == "sync":
+        return _run_sync(args)
+    if key[0] == "journal":
+        return _run_journal(args, ops)
+    if key[0] == "billing":
+        return _run_billing(args)
+    if key[0] == "reminders":
+        return _run_reminders(args)
+    raise OperationError(f"Unknown command: {' '.join(k for k in key if k)}")
+
+
+def _run_journal(args, ops: Operations):
+    if args.action == "prune-receipts":
+        return {"deleted": ops.prune_write_receipts(args.days)}
+    if ops.journal is None:
+        raise OperationError("The write-ahead journal is not enabled (set JOURNAL_ENABLED=true).")
+    if args.action == "status":
+        return ops.journal.metrics()
+    if args.action == "replay":
+        return [{"status": status, "entries": count} for status, count in ops.journal.replay().items()]
+    return [
+        {k: entry[k] for k in ("seq", "key", "op", "status", "row_id", "attempts", "error")}
+        for entry in ops.journal.journal.entries(args.status, args.limit)
+    ]
+
+
+def _replay_journal(ops: Operations) -> None:
+    """Tries to send the journaled writes now; they stay queued if the database cannot be reached."""
+    try:
+        ops.journal.replay()
+    except Exception as e:
+        metrics = ops.journal.metrics()
+        print(f"Journal: {metrics['pending']} write(s) queued, will replay later ({e})", file=sys.stderr)
+
+
+def _run_billing(args):
+    from src.services.billing_service import ISSUES, BillingService
+
+    service = BillingService()
+    result = service.check(as_of=args.as_of, since=args.since, grace_days=args.grace_days)
+    if args.summary:
+        return [{"status": status, "cycles": count} for status, count in service.summarize(result).items()]
+    if not args.all:
+        result = result[result["status"].isin(ISSUES)]
+    result = result.astype(object).where(result.notna(), None)
+    for column in ("due_date", "paid_date"):
+        result[column] = result[column].map(lambda d: d.date().isoformat() if d is not None else None)
+    return result.to_dict("records")
+
+
+def _run_reminders(args) -> List[Dict]:
+    from datetime import date, timedelta
+    from src.services.renewal_service import RenewalService
+
+    index = RenewalService().get_index()
+    rows = []
+    for kind, subs, field in (
+        ("renewal", index.due_within(args.days), "next_renewal"),
+        ("expiring", index.expiring_within(args.days), "end_date"),
+        ("expired", index.expired_since(date.today() - timedelta(days=args.expired_days)) if args.expired_days else [], "end_date"),
+    ):
+        rows.extend({"kind": kind, "date": s[field], "subscription_id": s["id"], "user_id": s["user_id"],
+                     "name": s["name"], "plan_type": s["plan_type"], "cost": s["cost"]} for s in subs)
+    return rows
+
+
+def _run_sync(args) -> List[Dict]:
+    from src.backends.sqlite import SQLiteClient
+    from src.config import get_settings
+    from src.services.sync_service import DEFAULT_REPLICA_PATH, SyncService
+
+    path = args.replica or get_settings("replica").get("path", DEFAULT_REPLICA_PATH)
+    service = SyncService(SQLiteClient(path))
+    results = service.rebuild() if args.rebuild else service.sync()
+    return [{"table": table, **counts} for table, counts in results.items()]
+
+
+def _run_export(args) -> int:
+    from src.services.export_service import ExportService, format_for
+
+    fmt = format_for(args.path, args.to)
+    filters = {"user_id": args.user_id, "status": args.status, "since": args.since, "until": args.until}
+    to_stdout = args.path == "-"
+    if to_stdout and fmt != "csv":
+        raise OperationError("Only CSV can be written to stdout.")
+    out = sys.stdout.buffer if to_stdout else args.path
+    report = ExportService().export(args.table, out, fmt, page_size=args.page_size, **filters)
+    # The summary goes to stderr when the data itself is on stdout
+    write_output(vars(report), args.format, out=sys.stderr if to_stdout else sys.stdout)
+    return 0
+
+
+def _run_batch(args, ops: Operations) -> int:
+    from src.cli.batch import BatchRunner
+
+    runner = BatchRunner(ops, concurrency=args.concurrency, group_size=args.group_size)
+    if args.path == "-":
+        summary = runner.run(sys.stdin)
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            summary = runner.run(f)
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def _run_ingest(args, ops: Operations) -> int:
+    """
+    Each line is a payment, e.g. {"subscription_id": 7, "amount": 199, "method": "UPI",
+    "status": "Completed", "id": "gateway event id"}. One JSON result line is
+    written per payment, in input order.
+    """
+    from collections import deque
+    from src.services.import_service import RowError
+    from src.services.payment_writer import PaymentWriter
+
+    summary = {"succeeded": 0, "failed": 0}
+    pending = deque()
+
+    def emit(result: Dict, future=None) -> None:
+        if future is not None:
+            try:
+                result.update(ok=True, result=future.result())
+            except Exception as e:
+                result.update(ok=False, error=f"insert failed: {e}")
+        print(json.dumps(result, default=str))
+        summary["succeeded" if result["ok"] else "failed"] += 1
+
+    def drain(block: bool) -> None:
+        # Results are printed in input order as soon as they are known
+        while pending and (block or pending[0][1] is None or pending[0][1].done()):
+            emit(*pending.popleft())
+
+    writer = PaymentWriter(batch_size=args.batch_size, flush_interval=args.flush_interval,
+                           max_pending=args.max_pending)
+    start = time.perf_counter()
+    with writer, (contextlib.nullcontext(sys.stdin) if args.path == "-" else open(args.path, encoding="utf-8")) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            result = {"line": line_number}
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise RowError("expected a JSON object")
+                if "id" in data:
+                    result["id"] = data["id"]
+                payload = ops.imports.validate_row("payments", data)
+            except (RowError, ValueError) as e:
+                pending.append((dict(result, ok=False, error=f"invalid payment: {e}"), None))
+            else:
+                future = writer.submit(payload["subscription_id"], payload["amount"], payload["method"],
+                                       payload["status"], payment_date=payload["payment_date"])
+                pending.append((result, future))
+            drain(block=False)
+    drain(block=True)
+
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    summary.update(batches=writer.stats["batches"], retries=writer.stats["retries"])
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def run_command(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs one subcommand and returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    from src.services.journal_service import JournalService
+    ops = Operations(journal=JournalService.from_settings())
+    with contextlib.ExitStack() as stack:
+        trace = None
+        if args.profile or args.profile_json:
+            from src.dao.instrumentation import tracing
+            trace = stack.enter_context(tracing(" ".join(a for a in (args.command, getattr(args, "action", None)) if a)))
+            stack.callback(_write_profile, args, trace)
+        try:
+            if args.command == "batch":
+                return _run_batch(args, ops)
+            if args.command == "export":
+                return _run_export(args)
+            if args.command == "ingest":
+                return _run_ingest(args, ops)
+            write_output(_dispatch(args, ops), args.format)
+            if ops.journal and getattr(args, "action", None) == "add":
+                _replay_journal(ops)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def _write_profile(args, trace) -> None:
+    if args.profile:
+        print(trace.report(), file=sys.stderr)
+    if args.profile_json:
+        trace.export(args.profile_json)
@@ -1,14 +1,18 @@
 # src/cli/main.py
 
+import sys
+
 from src.services.user_service import UserService
 from src.services.subscription_service import SubscriptionService
 from src.services.payment_service import PaymentService
+from src.services.import_service import ImportService
 
 class SubscriptionTrackerCLI:
     def __init__(self):
         self.user_service = UserService()
         self.subscription_service = SubscriptionService()
         self.payment_service = PaymentService()
+        self.import_service = ImportService()
         self.actions = {
             "1": self.user_service.add_user,
             "2": self.user_service.list_users,
@@ -18,7 +22,8 @@ class SubscriptionTrackerCLI:
             "6": self.payment_service.view_payments_for_subscription,
             "7": self.user_service.delete_user,
             "8": self.subscription_service.calculate_total_spend,
-            "9": self.exit_program
+            "9": self.import_service.run_import,
+            "10": self.exit_program
         }
 
     def print_menu(self):
@@ -31,7 +36,8 @@ class SubscriptionTrackerCLI:
         print("6. View Payments for a Subscription")
         print("7. Delete User")
         print("8. Total Spend of the User")
-        print("9. Exit")
+        print("9. Bulk Import from CSV/Parquet")
+        print("10. Exit")
 
     def exit_program(self):
         print("Exiting Subscription Tracker. Goodbye!")
@@ -45,9 +51,20 @@ class SubscriptionTrackerCLI:
             if action:
                 action()
             else:
-                print("Invalid choice. Please enter a choise between 1 and 9.")
+                print(f"Invalid choice. Please enter a choise between 1 and {len(self.actions)}.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        cli = SubscriptionTrackerCLI()
+        cli.run()
+        return
+
+    # Scriptable mode: subcommands and batch files (see src/cli/commands.py)
+    from src.cli.commands import run_command
+    sys.exit(run_command(argv))
 
 
 if __name__ == "__main__":
-    cli = SubscriptionTrackerCLI()
-    cli.run()
+    main()
@@ -0,0 +1,109 @@
+# src/cli/operations.py
+
+from typing import Dict, List, Optional
+
+from src.dao.aggregate_dao import AggregateDAO
+from src.services.import_service import ImportService, RowError
+from src.services.journal_service import JournalService
+
+
+class OperationError(ValueError):
+    """An operation that cannot be carried out (bad arguments, missing rows...)."""
+
+
+class Operations:
+    """
+    Non-interactive versions of the CLI actions. Each method takes plain
+    arguments, returns JSON-serialisable data and raises OperationError
+    instead of printing, so they can be scripted and batched.
+    """
+    READS = ("list_users", "get_user", "list_subscriptions", "list_payments", "total_spend")
+    # Writes that the batch runner can group into one multi-row insert, with their table
+    BULK_WRITES = {"create_user": "users", "add_subscription": "subscriptions", "add_payment": "payments"}
+    WRITES = ("create_user", "add_subscription", "add_payment", "delete_user")
+
+    def __init__(self, import_service: ImportService = None, journal: Optional[JournalService] = None):
+        self.imports = import_service or ImportService()
+        # With a write-ahead journal (src/services/journal_service.py), create_user,
+        # add_subscription and add_payment return an acknowledgement right away
+        self.journal = journal
+        self.user_dao = self.imports.user_dao
+        self.subscription_dao = self.imports.subscription_dao
+        self.payment_dao = self.imports.payment_dao
+        self.aggregate_dao = AggregateDAO()
+
+    def _validate(self, table: str, row: Dict) -> Dict:
+        try:
+            return self.imports.validate_row(table, row)
+        except RowError as e:
+            raise OperationError(str(e))
+
+    # --- Reads ---
+    def list_users(self) -> List[Dict]:
+        return list(self.user_dao.iter_users())
+
+    def get_user(self, user_id: int) -> Dict:
+        user = self.user_dao.get_user_by_id(int(user_id))
+        if not user:
+            raise OperationError(f"User ID {user_id} does not exist.")
+        return user
+
+    def list_subscriptions(self, user_id: int) -> List[Dict]:
+        return self.subscription_dao.get_subscriptions_by_user(int(user_id))
+
+    def list_payments(self, subscription_id: int) -> List[Dict]:
+        return self.payment_dao.get_payments_by_subscription(int(subscription_id))
+
+    def total_spend(self, user_id: int) -> Dict:
+        user = self.get_user(user_id)
+        spend = self.aggregate_dao.get_user_spend(user["id"])
+        return {
+            "user_id": user["id"], "name": user["name"], "total_spend": spend["completed_total"],
+            "pending": spend["pending_total"], "failed": spend["failed_total"],
+            "payments": spend["payment_count"], "last_payment_date": spend["last_payment_date"],
+        }
+
+    def rebuild_spend_summary(self) -> Dict:
+        return self.aggregate_dao.rebuild_spend_summary()
+
+    def prune_write_receipts(self, days: int = 30) -> int:
+        if days < 1:
+            raise OperationError("days must be at least 1")
+        return self.imports.journal_dao.prune_receipts(days)
+
+    # --- Writes ---
+    def create_user(self, name: str, email: str) -> Dict:
+        payload = self._validate("users", {"name": name, "email": email})
+        if self.journal:
+            return self.journal.create_user(payload["name"], payload["email"])
+        user = self.user_dao.create_user_if_new(payload["name"], payload["email"])
+        if user is None:
+            raise OperationError(f"Email '{payload['email']}' already exists.")
+        return user
+
+    def add_subscription(self, **fields) -> Dict:
+        payload = self._validate("subscriptions", fields)
+        if self.journal:
+            return self.journal.add_subscription(**payload)
+        return self.subscription_dao.add_subscriptions([payload])[0]
+
+    def add_payment(self, **fields) -> Dict:
+        payload = self._validate("payments", fields)
+        if self.journal:
+            return self.journal.insert_payment(payload["subscription_id"], payload["amount"], payload["method"],
+                                               payload["status"], payment_date=payload["payment_date"])
+        payment = self.payment_dao.insert_payment_checked(
+            payload["subscription_id"], payload.get("amount"), payload.get("method"), payload.get("status"),
+        )
+        if payment is None:
+            raise OperationError(f"No subscription found with ID {payload['subscription_id']}.")
+        return payment
+
+    def delete_user(self, user_id: int) -> Dict:
+        user_id = int(user_id)
+        status = self.user_dao.delete_user_if_unsubscribed(user_id)
+        if status == "not_found":
+            raise OperationError(f"User ID {user_id} does not exist.")
+        if status == "has_subscriptions":
+            raise OperationError(f"Cannot delete User ID {user_id}: they still have subscriptions.")
+        return {"deleted": user_id}
@@ -1,21 +1,179 @@
-import streamlit as st
-from supabase import create_client, Client # type: ignore
+"""
+Configuration and the shared Supabase client.
 
-def get_supabase() -> Client:
+Settings come from a pluggable provider: EnvConfigProvider (environment
+variables, plus a .env file when python-dotenv is installed) is the default
+and is what the CLI uses; app.py installs StreamlitSecretsProvider so the
+dashboard keeps reading st.secrets. Streamlit, supabase and httpx are only
+imported when they are actually needed, which keeps `import src...` cheap.
+
+The storage backend is chosen by the [storage] section (STORAGE_BACKEND /
+STORAGE_PATH): "supabase" (default), "sqlite" or "memory".
+"""
+import os
+import threading
+from typing import Any, Dict
+
+# Defaults for the shared HTTP connection pool. Override them with
+# pool_size / timeout / keepalive_expiry in the [supabase] secrets section,
+# or SUPABASE_POOL_SIZE / SUPABASE_TIMEOUT / SUPABASE_KEEPALIVE_EXPIRY.
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+BACKENDS = ("supabase", "sqlite", "memory")
+DEFAULT_SQLITE_PATH = "subscriptions.db"
+
+
+class EnvConfigProvider:
+    """
+    Reads section settings from environment variables named
+    <SECTION>_<KEY>, e.g. SUPABASE_URL and SUPABASE_KEY.
+    """
+    def __init__(self, dotenv_path: str = ".env"):
+        self.dotenv_path = dotenv_path
+        self._loaded = False
+
+    def _load_dotenv(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            return
+        load_dotenv(self.dotenv_path, override=False)
+
+    def get(self, section: str) -> Dict[str, Any]:
+        self._load_dotenv()
+        prefix = section.upper() + "_"
+        return {
+            name[len(prefix):].lower(): value
+            for name, value in os.environ.items()
+            if name.startswith(prefix) and value != ""
+        }
+
+
+class StreamlitSecretsProvider:
+    """Reads section settings from Streamlit's secrets manager (secrets.toml)."""
+
+    def get(self, section: str) -> Dict[str, Any]:
+        import streamlit as st
+        return dict(st.secrets.get(section, {}))
+
+
+_provider = EnvConfigProvider()
+
+
+def set_config_provider(provider) -> None:
+    """Chooses where settings are read from; call before the first query."""
+    global _provider
+    _provider = provider
+
+
+def get_settings(section: str) -> Dict[str, Any]:
+    return _provider.get(section)
+
+
+# One client per process, shared by every DAO, service and Streamlit session.
+_client = None
+_http_client = None
+_client_lock = threading.Lock()
+
+
+def _build_http_client(settings: dict):
     """
-    Creates and returns a Supabase client using credentials
-    stored in Streamlit's secrets manager.
+    Creates the pooled HTTP client that keeps connections to Supabase alive
+    between queries. httpx clients are safe to share between threads.
     """
-    # Get the Supabase URL and Key from st.secrets
-    url = st.secrets.get("supabase", {}).get("url")
-    key = st.secrets.get("supabase", {}).get("key")
+    import httpx
 
-    # Raise an error if the credentials are not found
-    if not url or not key:
-        raise RuntimeError(
-            "Supabase credentials not found. "
-            "Please set them in your Streamlit secrets."
-        )
+    pool_size = int(settings.get("pool_size", DEFAULT_POOL_SIZE))
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=float(settings.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY)),
+    )
+    timeout = httpx.Timeout(float(settings.get("timeout", DEFAULT_TIMEOUT)))
+    return httpx.Client(limits=limits, timeout=timeout, http2=True, follow_redirects=True)
+
+
+def _build_local_backend(backend: str, settings: dict):
+    if backend == "sqlite":
+        from src.backends.sqlite import SQLiteClient
+        return SQLiteClient(settings.get("path", DEFAULT_SQLITE_PATH))
+    from src.backends.memory import MemoryClient
+    return MemoryClient()
+
+
+def get_supabase():
+    """
+    Returns the process-wide Supabase client, creating it on first use
+    with the credentials from the configured provider. When a local
+    storage backend is configured, that backend's client is returned
+    instead; it supports the same calls the DAOs make.
+    """
+    global _client, _http_client
+
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        # Another thread may have built the client while we were waiting
+        if _client is not None:
+            return _client
+
+        storage = get_settings("storage")
+        backend = str(storage.get("backend", "supabase")).lower()
+        if backend not in BACKENDS:
+            raise RuntimeError(f"Unknown storage backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
+        if backend != "supabase":
+            _client = _build_local_backend(backend, storage)
+            return _client
+
+        settings = get_settings("supabase")
+        url = settings.get("url")
+        key = settings.get("key")
+
+        # Raise an error if the credentials are not found
+        if not url or not key:
+            raise RuntimeError(
+                "Supabase credentials not found. "
+                "Please set them in your Streamlit secrets or as SUPABASE_URL / SUPABASE_KEY."
+            )
+
+        from supabase import create_client, ClientOptions # type: ignore
+
+        # The pooled HTTP client is handed to the PostgREST layer, which is
+        # the only part of Supabase the DAOs talk to.
+        _http_client = _build_http_client(settings)
+        options = ClientOptions(httpx_client=_http_client)
+        _client = create_client(url, key, options=options)
+        return _client
+
+
+def set_supabase(client) -> None:
+    """
+    Installs the client every DAO will use, e.g. a local backend from
+    src/backends for tests.
+    """
+    global _client
+
+    with _client_lock:
+        _client = client
+
+
+def reset_supabase() -> None:
+    """
+    Closes the shared client and its connections. The next call to
+    get_supabase() builds a fresh one (e.g. after rotating credentials).
+    """
+    global _client, _http_client
 
-    # Initialize and return the Supabase client
-    return create_client(url, key)
\ No newline at end of file
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        if hasattr(_client, "close"):
+            _client.close()
+        _client = None
+        _http_client = None
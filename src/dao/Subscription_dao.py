@@ -1,10 +1,13 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
-
-class SubscriptionDAO:
-    def __init__(self):
-        self._sb = get_supabase()
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple
+from src.dao.base_dao import BaseDAO
+from src.dao.events import emits
+from src.dao.pagination import iter_by_ids, iter_keyset, DEFAULT_PAGE_SIZE
+from src.dao.query_cache import cached_read, invalidates
+from src.dao.rows import Columns, select_clause, shape_row, shape_rows
 
+class SubscriptionDAO(BaseDAO):
+    @invalidates("subscriptions", user_id="user_id")
+    @emits("subscriptions")
     def add_subscription(self, user_id:int, name:str, plan_type : str, cost: float, start_date: str,end_date: str ,status: str ="Active"):
         payload = {
             "user_id": user_id,
@@ -16,17 +19,42 @@ class SubscriptionDAO:
             "status": "Active"
         }
 
-        self._sb.table("subscriptions").insert(payload).execute()
+        # Returns the created row, so callers (and write listeners) get its id
+        resp = self._sb.table("subscriptions").insert(payload).execute()
+        return resp.data[0] if resp.data else None
 
-    def get_subscriptions_by_user(self, user_id: int):
-        resp = self._sb.table("subscriptions").select("*").eq("user_id", user_id).execute()
+    @invalidates("subscriptions")
+    @emits("subscriptions")
+    def add_subscriptions(self, subscriptions: List[Dict]) -> List[Dict]:
+        """Inserts many subscription rows in one request and returns the created rows."""
+        if not subscriptions:
+            return []
+        resp = self._sb.table("subscriptions").insert(subscriptions).execute()
         return resp.data if resp.data else []
+
+    @cached_read("subscriptions", user_id="user_id")
+    def get_subscriptions_by_user(self, user_id: int, columns: Columns = None, shape: str = "dicts"):
+        resp = self._sb.table("subscriptions").select(select_clause(columns)).eq("user_id", user_id).execute()
+        return shape_rows(resp.data or [], "subscriptions", columns, shape)
         
     
-    def get_subscription_by_id(self, subscription_id: int):
-        resp = self._sb.table("subscriptions").select("*").eq("id", subscription_id).single().execute()
-        return resp.data if resp.data else None
+    @cached_read("subscriptions", id="subscription_id")
+    def get_subscription_by_id(self, subscription_id: int, columns: Columns = None, shape: str = "dicts"):
+        resp = self._sb.table("subscriptions").select(select_clause(columns)).eq("id", subscription_id).single().execute()
+        return shape_row(resp.data, "subscriptions", columns, shape) if resp.data else None
     
-    def get_all_subscriptions(self):
-        resp = self._sb.table("subscriptions").select("*").execute()
-        return resp.data if resp.data else []
\ No newline at end of file
+    @cached_read("subscriptions", id="subscription_ids")
+    def get_subscriptions_by_ids(self, subscription_ids: Iterable[int], columns: Columns = None,
+                                 shape: str = "dicts") -> List[Dict]:
+        """The existing subscriptions among `subscription_ids` in id order, with one query per 500 ids; rows always include id."""
+        rows = iter_by_ids(self._sb, "subscriptions", select_clause(columns), "id", subscription_ids)
+        return shape_rows(sorted(rows, key=lambda row: row["id"]), "subscriptions", columns, shape)
+
+    @cached_read("subscriptions")
+    def get_all_subscriptions(self, columns: Columns = None, shape: str = "dicts"):
+        return shape_rows(list(self.iter_subscriptions(columns)), "subscriptions", columns, shape)
+
+    def iter_subscriptions(self, columns: Columns = None, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False,
+                           filters: Optional[List[Tuple]] = None) -> Iterator[Dict]:
+        """Streams all subscriptions (or those matching `filters`) in id order, page by page (see iter_keyset)."""
+        return iter_keyset(self._sb, "subscriptions", select_clause(columns), page_size=page_size, prefetch=prefetch, filters=filters)
\ No newline at end of file
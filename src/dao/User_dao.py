@@ -1,10 +1,11 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
-
-class UserDAO:
-    def __init__(self):
-        self._sb = get_supabase()
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple
+from src.dao.base_dao import BaseDAO
+from src.dao.pagination import iter_by_ids, iter_keyset, DEFAULT_PAGE_SIZE
+from src.dao.query_cache import cached_read, invalidates
+from src.dao.rows import Columns, select_clause, shape_row, shape_rows
 
+class UserDAO(BaseDAO):
+    @invalidates("users", email="email")
     def create_user(self, name: str, email: str) -> Optional[Dict]:
         payload = {"name": name, "email": email}
         
@@ -12,21 +13,73 @@ class UserDAO:
         return True
 
 
-    def get_user_by_email(self,email:str) -> Optional[Dict]:
-        resp = self._sb.table("users").select("*").eq("email", email).limit(1).execute()
-        return resp.data[0] if resp.data else False
+    @invalidates("users", email="email")
+    def create_user_if_new(self, name: str, email: str) -> Optional[Dict]:
+        """
+        Creates the user in one request, relying on the unique index on
+        email (sql/writes.sql). Returns the new row, or None if the email
+        is already taken.
+        """
+        payload = {"name": name, "email": email}
+        resp = self._sb.table("users").upsert(payload, on_conflict="email", ignore_duplicates=True).execute()
+        return resp.data[0] if resp.data else None
 
 
-    def get_all_users(self):
-        resp = self._sb.table("users").select("*").execute()
+    @invalidates("users")
+    def create_users(self, users: List[Dict]) -> List[Dict]:
+        """Inserts many {name, email} rows in one request and returns the created rows."""
+        if not users:
+            return []
+        resp = self._sb.table("users").insert(users).execute()
         return resp.data if resp.data else []
+
+
+    @cached_read("users", email="email")
+    def get_user_by_email(self,email:str, columns: Columns = None, shape: str = "dicts") -> Optional[Dict]:
+        resp = self._sb.table("users").select(select_clause(columns)).eq("email", email).limit(1).execute()
+        return shape_row(resp.data[0], "users", columns, shape) if resp.data else False
+
+
+    def get_users_by_emails(self, emails: List[str], columns: Columns = None, shape: str = "dicts") -> List[Dict]:
+        """Returns the existing users among `emails` in one query."""
+        if not emails:
+            return shape_rows([], "users", columns, shape)
+        resp = self._sb.table("users").select(select_clause(columns)).in_("email", list(emails)).execute()
+        return shape_rows(resp.data or [], "users", columns, shape)
+
+    @cached_read("users")
+    def get_all_users(self, columns: Columns = None, shape: str = "dicts"):
+        return shape_rows(list(self.iter_users(columns)), "users", columns, shape)
+
+    def iter_users(self, columns: Columns = None, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False,
+                   filters: Optional[List[Tuple]] = None) -> Iterator[Dict]:
+        """Streams all users (or those matching `filters`) in id order, page by page (see iter_keyset)."""
+        return iter_keyset(self._sb, "users", select_clause(columns), page_size=page_size, prefetch=prefetch, filters=filters)
     
-    def get_user_by_id(self, user_id):
-        resp = self._sb.table("users").select("*").eq("id", user_id).execute()
+    @cached_read("users", id="user_id")
+    def get_user_by_id(self, user_id, columns: Columns = None, shape: str = "dicts"):
+        resp = self._sb.table("users").select(select_clause(columns)).eq("id", user_id).execute()
         if resp.data:
-            return resp.data[0]  # returns the user dict
+            return shape_row(resp.data[0], "users", columns, shape)  # returns the user dict
         return None
     
+    @cached_read("users", id="user_ids")
+    def get_users_by_ids(self, user_ids: Iterable[int], columns: Columns = None, shape: str = "dicts") -> List[Dict]:
+        """The existing users among `user_ids` in id order, with one query per 500 ids; rows always include id."""
+        rows = iter_by_ids(self._sb, "users", select_clause(columns), "id", user_ids)
+        return shape_rows(sorted(rows, key=lambda row: row["id"]), "users", columns, shape)
+
+    @invalidates("users", id="user_id")
     def delete_user(self, user_id: int) -> bool:
         resp = self._sb.table("users").delete().eq("id", user_id).execute()
-        return True if resp.data else False
\ No newline at end of file
+        return True if resp.data else False
+
+    @invalidates("users", id="user_id")
+    def delete_user_if_unsubscribed(self, user_id: int) -> str:
+        """
+        Deletes the user unless they have subscriptions, checked and done in
+        one server-side call (sql/writes.sql). Returns "deleted",
+        "not_found" or "has_subscriptions".
+        """
+        resp = self._sb.rpc("delete_user_if_unsubscribed", {"p_user_id": user_id}).execute()
+        return resp.data[0]["status"] if resp.data else "not_found"
\ No newline at end of file
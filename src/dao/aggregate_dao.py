@@ -0,0 +1,66 @@
+from typing import Optional, List, Dict
+from src.dao.base_dao import BaseDAO
+from src.dao.pagination import iter_rpc
+from src.dao.query_cache import cached_read, invalidates
+
+SPEND_TOTALS = ("completed_total", "pending_total", "failed_total")
+
+class AggregateDAO(BaseDAO):
+    """
+    Read-only aggregates computed by the database (see sql/aggregates.sql),
+    so only the totals travel over the network instead of whole tables.
+    Results with a row per user or subscription are read in pages
+    (iter_rpc), as PostgREST caps function results at max-rows too.
+    """
+    @cached_read(("users", "subscriptions", "payments"))
+    def get_dashboard_metrics(self) -> Dict:
+        resp = self._sb.rpc("dashboard_metrics").execute()
+        if resp.data:
+            return resp.data[0]
+        return {"user_count": 0, "subscription_count": 0, "payment_count": 0, "total_revenue": 0}
+
+    @cached_read("payments")
+    def get_revenue_by_status(self) -> List[Dict]:
+        resp = self._sb.rpc("revenue_by_status").execute()
+        return resp.data if resp.data else []
+
+    @cached_read("subscriptions")
+    def get_subscriptions_per_user(self) -> Dict[int, int]:
+        return {row["user_id"]: row["subscription_count"] for row in iter_rpc(self._sb, "subscriptions_per_user")}
+
+    @cached_read(("subscriptions", "payments"))
+    def get_spend_per_user(self, user_id: Optional[int] = None, status: Optional[str] = "Completed") -> Dict[int, float]:
+        rows = iter_rpc(self._sb, "spend_per_user", {"p_user_id": user_id, "p_status": status})
+        return {row["user_id"]: float(row["total_spend"]) for row in rows}
+
+    @cached_read("payments", subscription_id="subscription_ids")
+    def get_spend_per_subscription(self, subscription_ids: Optional[List[int]] = None, status: Optional[str] = "Completed") -> Dict[int, float]:
+        params = {"p_subscription_ids": list(subscription_ids) if subscription_ids is not None else None, "p_status": status}
+        return {row["subscription_id"]: float(row["total_spend"]) for row in iter_rpc(self._sb, "spend_per_subscription", params)}
+
+    # --- Spend summaries (sql/spend_summary.sql), maintained by triggers on payments ---
+    @staticmethod
+    def _spend_row(row: Optional[Dict], **key) -> Dict:
+        row = dict(row) if row else dict(key, payment_count=0, last_payment_date=None)
+        row.pop("id", None)  # added by the memory backend, which numbers every row
+        for total in SPEND_TOTALS:
+            row[total] = float(row.get(total) or 0)
+        return row
+
+    @cached_read(("subscriptions", "payments"), user_id="user_id")
+    def get_user_spend(self, user_id: int) -> Dict:
+        """Completed/pending/failed totals, payment count and last payment date of one user."""
+        resp = self._sb.table("user_spend").select("*").eq("user_id", user_id).execute()
+        return self._spend_row(resp.data[0] if resp.data else None, user_id=user_id)
+
+    @cached_read(("subscriptions", "payments"), user_id="user_id")
+    def get_subscription_spend(self, user_id: int) -> Dict[int, Dict]:
+        """The same summary for each of a user's subscriptions that has payments, by subscription id."""
+        resp = self._sb.table("subscription_spend").select("*").eq("user_id", user_id).execute()
+        return {row["subscription_id"]: self._spend_row(row) for row in resp.data or []}
+
+    @invalidates("payments")
+    def rebuild_spend_summary(self) -> Dict:
+        """Recomputes both summary tables from the payments table."""
+        resp = self._sb.rpc("rebuild_spend_summary").execute()
+        return resp.data[0] if resp.data else {"subscriptions": 0, "users": 0}
@@ -0,0 +1,18 @@
+from src.config import get_supabase
+from src.dao.instrumentation import instrument_class
+
+class BaseDAO:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every DAO method shows up in request traces (src/dao/instrumentation.py)
+        instrument_class(cls)
+
+    def __init__(self, client=None):
+        # An explicit client (e.g. a local backend) wins over the shared one
+        self._client = client
+
+    @property
+    def _sb(self):
+        # Resolved on first query, so creating DAOs and services stays cheap
+        # and does not import supabase until it is needed.
+        return self._client if self._client is not None else get_supabase()
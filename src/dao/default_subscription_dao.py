@@ -1,14 +1,19 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
+from typing import Optional, List, Dict, Iterator
+from src.dao.base_dao import BaseDAO
+from src.dao.pagination import iter_keyset, DEFAULT_PAGE_SIZE
+from src.dao.query_cache import cached_read, invalidates
+from src.dao.rows import Columns, select_clause, shape_row, shape_rows
 
-class DefaultSubscriptionDAO:
-    def __init__(self):
-        self._sb = get_supabase()
+class DefaultSubscriptionDAO(BaseDAO):
+    @cached_read("defaultsubscriptions")
+    def get_all_default_subscriptions(self, columns: Columns = None, shape: str = "dicts"):
+        return shape_rows(list(self.iter_default_subscriptions(columns)), "defaultsubscriptions", columns, shape)
 
-    def get_all_default_subscriptions(self):
-        resp=self._sb.table("defaultsubscriptions").select("*").execute()
-        return resp.data if resp.data else []
+    def iter_default_subscriptions(self, columns: Columns = None, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False) -> Iterator[Dict]:
+        """Streams all default subscriptions in id order, page by page (see iter_keyset)."""
+        return iter_keyset(self._sb, "defaultsubscriptions", select_clause(columns), page_size=page_size, prefetch=prefetch)
     
+    @invalidates("defaultsubscriptions")
     def add_default_subscription(self, sub_name: str, plan_type : str, cost : float):
         payload = {"name": sub_name, "plan_type": plan_type, "cost": cost}
         self._sb.table("defaultsubscriptions").insert(payload).execute()
@@ -0,0 +1,63 @@
+"""
+Write notifications for in-process indexes and summaries.
+
+DAO write methods decorated with @emits call every listener registered
+for their table with the rows they wrote, after the write succeeded:
+
+    on_write("subscriptions", lambda action, rows: index.add_all(rows))
+
+Listeners run synchronously in the writing thread and should be quick;
+an exception in a listener is logged and does not fail the write.
+"""
+import functools
+import logging
+import threading
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str, List[Dict]], None]
+
+_listeners: Dict[str, List[Listener]] = {}
+_lock = threading.Lock()
+
+
+def on_write(table: str, listener: Listener) -> None:
+    """Calls listener(action, rows) after every insert/delete on `table`."""
+    with _lock:
+        _listeners.setdefault(table, []).append(listener)
+
+
+def remove_listener(table: str, listener: Listener) -> None:
+    with _lock:
+        if listener in _listeners.get(table, []):
+            _listeners[table].remove(listener)
+
+
+def emit(table: str, action: str, rows: List[Dict]) -> None:
+    with _lock:
+        listeners = list(_listeners.get(table, []))
+    for listener in listeners:
+        try:
+            listener(action, rows)
+        except Exception:
+            logger.exception("Write listener for %s failed", table)
+
+
+def emits(table: str, action: str = "insert"):
+    """
+    Marks a DAO write method whose return value is the written row(s)
+    (a dict or a list of dicts); they are passed on to the listeners.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            rows = result if isinstance(result, list) else [result] if isinstance(result, dict) else []
+            if rows:
+                emit(table, action, rows)
+            return result
+
+        return wrapper
+
+    return decorator
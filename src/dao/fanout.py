@@ -0,0 +1,72 @@
+"""
+Runs independent DAO queries concurrently on a shared thread pool.
+
+The Supabase client is synchronous, but each query spends almost all of
+its time waiting on the network, so issuing them from worker threads
+brings a page render down to roughly the slowest single query.
+"""
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Tuple, Union
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 15.0  # seconds per query
+
+# Shared by every caller so a page render does not spin up new threads.
+# Do not call fan_out() from inside a fanned-out query: with every
+# worker busy waiting on nested queries the pool can deadlock.
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="dao-fanout")
+
+
+class QueryTimeout(TimeoutError):
+    """Raised when a fanned-out query does not finish within its timeout."""
+
+
+Call = Union[Callable[[], Any], Tuple[Callable[[], Any], float]]
+
+
+def _name(fn) -> str:
+    return getattr(fn, "__qualname__", None) or getattr(getattr(fn, "func", None), "__qualname__", repr(fn))
+
+
+def fan_out(*calls: Call, timeout: float = DEFAULT_TIMEOUT) -> Tuple[Any, ...]:
+    """
+    Runs each zero-argument callable concurrently and returns their results
+    in the same order, e.g.
+
+        users, subs = fan_out(user_dao.get_all_users, (sub_dao.get_all_subscriptions, 5.0))
+
+    A call may be given as (callable, seconds) to override `timeout`.
+    If any query raises or times out, the queries that have not started
+    yet are cancelled and the error is re-raised (QueryTimeout for
+    timeouts). Queries already running finish in the background and
+    their results are discarded.
+    """
+    start = time.monotonic()
+    futures = []
+    for call in calls:
+        fn, limit = call if isinstance(call, tuple) else (call, timeout)
+        # Each query runs in a copy of the caller's context, so request
+        # traces (src/dao/instrumentation.py) follow it into the pool
+        futures.append((_executor.submit(contextvars.copy_context().run, fn), start + limit, fn))
+
+    pending = {future for future, _, _ in futures}
+    try:
+        while pending:
+            nearest = min(deadline for future, deadline, _ in futures if future in pending)
+            done, pending = wait(pending, timeout=max(0.0, nearest - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                # Re-raises the query's own exception
+                future.result()
+
+            now = time.monotonic()
+            for future, deadline, fn in futures:
+                if future in pending and deadline <= now:
+                    raise QueryTimeout(f"{_name(fn)} did not finish within {deadline - start:.1f}s")
+    except BaseException:
+        for future, _, _ in futures:
+            future.cancel()
+        raise
+
+    return tuple(future.result() for future, _, _ in futures)
@@ -0,0 +1,303 @@
+"""
+Per-request tracing of DAO calls.
+
+Every public method of a BaseDAO subclass is wrapped by `instrumented`.
+While a trace is active (see `tracing()`), each call is recorded with its
+duration, the number of rows and approximate bytes it returned, and
+whether it was served from the query cache. Outside a trace the wrapper
+only checks a context variable, so production reads pay next to nothing.
+
+A trace also looks for N+1 patterns: the same method called again and
+again with the same kind of arguments (say get_payments_by_subscription
+inside a loop over subscriptions), which is usually one batched query
+written as many small ones.
+
+    with tracing("total spend") as trace:
+        service.calculate_total_spend()
+    print(trace.report())
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import types
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+N_PLUS_ONE_THRESHOLD = 5  # same-shape calls in one trace before they are flagged
+
+# Batched methods to use instead of a per-row method called in a loop
+BATCH_ALTERNATIVES = {
+    "UserDAO.get_user_by_email": "UserDAO.get_users_by_emails",
+    "UserDAO.get_user_by_id": "UserDAO.get_users_by_ids",
+    "PaymentsDAO.get_payments_by_subscription": "PaymentsDAO.get_payments_by_subscriptions",
+    "PaymentsDAO.get_total_spend_for_subscriptions": "AggregateDAO.get_spend_per_subscription",
+    "SubscriptionDAO.get_subscription_by_id": "SubscriptionDAO.get_subscriptions_by_ids",
+    "SubscriptionDAO.get_subscriptions_by_user": "AggregateDAO.get_subscriptions_per_user",
+    "UserDAO.create_user": "UserDAO.create_users",
+    "SubscriptionDAO.add_subscription": "SubscriptionDAO.add_subscriptions",
+    "PaymentsDAO.insert_payment": "PaymentsDAO.insert_payments",
+}
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("dao_trace", default=None)
+_current_call: contextvars.ContextVar[Optional["CallRecord"]] = contextvars.ContextVar("dao_call", default=None)
+
+
+@dataclass
+class CallRecord:
+    method: str
+    args: Dict[str, str]  # argument name -> type name, the "shape" of the call
+    started_ms: float  # since the start of the trace
+    duration_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    cached: bool = False
+    parent: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def signature(self) -> str:
+        return f"{self.method}({', '.join(f'{k}: {v}' for k, v in self.args.items())})"
+
+
+@dataclass
+class Trace:
+    name: str
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    calls: List[CallRecord] = field(default_factory=list)
+    duration_ms: float = 0.0
+
+    def __post_init__(self):
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def add(self, record: CallRecord) -> None:
+        with self._lock:
+            self.calls.append(record)
+
+    def totals(self) -> Dict[str, Any]:
+        calls = list(self.calls)
+        return {
+            "calls": len(calls),
+            "cached": sum(1 for c in calls if c.cached),
+            "duration_ms": round(sum(c.duration_ms for c in calls if c.parent is None), 3),
+            "rows": sum(c.rows for c in calls if c.parent is None),
+            "bytes": sum(c.bytes for c in calls if c.parent is None),
+        }
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict[str, Any]]:
+        """Same-shape calls repeated at least `threshold` times, most frequent first."""
+        groups: Dict[str, List[CallRecord]] = {}
+        for call in self.calls:
+            if call.parent is None:
+                groups.setdefault(call.signature, []).append(call)
+        found = [
+            {
+                "signature": signature,
+                "count": len(calls),
+                "duration_ms": round(sum(c.duration_ms for c in calls), 3),
+                "suggestion": BATCH_ALTERNATIVES.get(calls[0].method),
+            }
+            for signature, calls in groups.items()
+            if len(calls) >= threshold
+        ]
+        return sorted(found, key=lambda f: f["count"], reverse=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms or self.elapsed_ms(), 3),
+            "totals": self.totals(),
+            "n_plus_one": self.n_plus_one(),
+            "calls": [asdict(c) for c in self.calls],
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+    def export(self, path: str) -> None:
+        """Appends the trace to `path` as one JSON line, for the metrics pipeline."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_json() + "\n")
+
+    def report(self) -> str:
+        """A short plain-text summary: totals, slowest calls and N+1 warnings."""
+        totals = self.totals()
+        lines = [
+            f"{self.name}: {totals['calls']} DAO calls ({totals['cached']} cached), "
+            f"{totals['duration_ms']:.1f} ms, {totals['rows']} rows, {totals['bytes'] / 1024:.1f} KiB"
+        ]
+        for call in sorted(self.calls, key=lambda c: c.duration_ms, reverse=True)[:10]:
+            flag = " (cached)" if call.cached else f" ERROR {call.error}" if call.error else ""
+            lines.append(f"  {call.duration_ms:9.2f} ms {call.rows:7} rows  {call.signature}{flag}")
+        for issue in self.n_plus_one():
+            hint = f"; use {issue['suggestion']}" if issue["suggestion"] else ""
+            lines.append(f"  N+1: {issue['signature']} called {issue['count']} times, {issue['duration_ms']:.1f} ms{hint}")
+        return "\n".join(lines)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(name: Optional[str]) -> contextvars.Token:
+    """
+    Starts a trace for the current context; pass the token to end_trace().
+    start_trace(None) switches tracing off, e.g. for a long-lived thread
+    whose previous run stopped before ending its trace.
+    """
+    return _current_trace.set(Trace(name) if name is not None else None)
+
+
+def end_trace(token: contextvars.Token) -> Optional[Trace]:
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is not None:
+        trace.duration_ms = trace.elapsed_ms()
+    return trace
+
+
+@contextlib.contextmanager
+def tracing(name: str) -> Iterator[Trace]:
+    """Records every DAO call made inside the block (and in fan_out workers)."""
+    token = start_trace(name)
+    trace = _current_trace.get()
+    try:
+        yield trace
+    finally:
+        end_trace(token)
+
+
+def mark_cached() -> None:
+    """Called by the query cache when the current DAO call is served from it."""
+    record = _current_call.get()
+    if record is not None:
+        record.cached = True
+
+
+# --- Measuring results ---
+def _count_rows(value) -> int:
+    if value is None or value is False:
+        return 0
+    if isinstance(value, tuple) and hasattr(value, "_fields"):  # a named tuple row
+        return 1
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    if isinstance(value, dict):
+        values = list(value.values())
+        if values and all(isinstance(v, list) for v in values):  # shape="columns"
+            return len(values[0])
+        return 1 if "id" in value else len(value)
+    return 1
+
+
+def _size(value) -> int:
+    """Approximate size of the result as JSON, i.e. what came over the wire."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _arg_shape(signature, args, kwargs) -> Dict[str, str]:
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return {}
+    return {name: type(value).__name__ for name, value in bound.arguments.items() if name != "self"}
+
+
+def _step(gen, record: CallRecord):
+    """Advances `gen` as part of `record`, restoring the caller's current call after."""
+    # Not reset(token): a generator can be resumed or closed from another
+    # context, where the token is invalid
+    previous = _current_call.get()
+    _current_call.set(record)
+    try:
+        return next(gen)
+    finally:
+        _current_call.set(previous)
+
+
+def _traced_generator(gen, trace: Trace, record: CallRecord, started: float):
+    # Iterators (iter_users...) are timed until they are exhausted or closed.
+    # The current call is only set while the inner generator runs, not while
+    # the consumer holds a row
+    gen = iter(gen)
+    try:
+        while True:
+            try:
+                row = _step(gen, record)
+            except StopIteration:
+                return
+            record.rows += 1
+            record.bytes += _size(row)
+            yield row
+    except Exception as e:
+        record.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        close = getattr(gen, "close", None)
+        if close is not None:
+            close()
+        record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        trace.add(record)
+
+
+def instrumented(func):
+    """Wraps a DAO method so that its calls are recorded in the active trace."""
+    if getattr(func, "__instrumented__", False):
+        return func
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return func(*args, **kwargs)
+
+        parent = _current_call.get()
+        method = f"{type(args[0]).__name__}.{func.__name__}" if args else func.__qualname__
+        record = CallRecord(
+            method=method,
+            args=_arg_shape(signature, args, kwargs),
+            started_ms=round(trace.elapsed_ms(), 3),
+            parent=parent.method if parent else None,
+        )
+        started = time.perf_counter()
+        token = _current_call.set(record)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            trace.add(record)
+            raise
+        finally:
+            _current_call.reset(token)
+
+        if isinstance(result, types.GeneratorType):
+            return _traced_generator(result, trace, record, started)
+        record.rows = _count_rows(result)
+        record.bytes = _size(result)
+        record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        trace.add(record)
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_class(cls) -> None:
+    """Instruments every public method defined directly on `cls`."""
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(attr):
+            setattr(cls, name, instrumented(attr))
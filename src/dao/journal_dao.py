@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+from src.dao.base_dao import BaseDAO
+from src.dao.events import emit
+from src.dao.pagination import max_rows
+from src.dao.query_cache import query_cache
+
+# Journal op -> table it writes to
+OP_TABLES = {"create_user": "users", "add_subscription": "subscriptions", "insert_payment": "payments"}
+
+
+class JournalDAO(BaseDAO):
+    def apply_entry(self, key: str, op: str, payload: Dict) -> Dict:
+        """
+        Replays one journaled write at most once per key (sql/journal.sql).
+        Returns {"status": applied | duplicate | conflict | rejected, "row_id": ...}.
+        """
+        params = {"p_key": key, "p_op": op, "p_payload": payload}
+        result = self._sb.rpc("apply_journal_entry", params).execute().data[0]
+        if result["status"] == "applied":
+            table = OP_TABLES[op]
+            query_cache.invalidate(table)
+            # Same listeners as a direct write (e.g. the renewal index)
+            emit(table, "insert", [dict(payload, id=result["row_id"])])
+        return result
+
+    def apply_entries(self, entries: List[Dict]) -> Dict[str, Dict]:
+        """
+        Applies many {"key", "op", "payload"} entries in one call, each at
+        most once per key. Returns {key: {"status": ..., "row_id": ...}}.
+        """
+        if not entries:
+            return {}
+        # The result has a row per entry and is capped at max-rows like any read
+        size = max_rows(self._sb) or len(entries)
+        results = {}
+        for start in range(0, len(entries), size):
+            data = self._sb.rpc("apply_journal_entries", {"p_entries": entries[start:start + size]}).execute().data
+            results.update({row["key"]: {"status": row["status"], "row_id": row["row_id"]} for row in data or []})
+        applied: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            result = results.get(entry["key"])
+            if result and result["status"] == "applied":
+                applied.setdefault(OP_TABLES[entry["op"]], []).append(dict(entry["payload"], id=result["row_id"]))
+        for table, rows in applied.items():
+            query_cache.invalidate(table)
+            emit(table, "insert", rows)
+        return results
+
+    def prune_receipts(self, days: int = 30) -> int:
+        """Deletes the write receipts older than `days` (sql/journal.sql); returns how many."""
+        resp = self._sb.rpc("prune_write_receipts", {"p_days": days}).execute()
+        return resp.data[0]["deleted"] if resp.data else 0
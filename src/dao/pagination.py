@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.config import get_settings
+from src.dao.resilience import resilient
+
+# PostgREST silently caps every response at its max-rows setting (1000 on
+# Supabase by default). A larger page would come back short and look like
+# the last one, so page sizes are clamped to the cap; set max_rows in the
+# [supabase] settings (SUPABASE_MAX_ROWS) if the project uses another value.
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_PAGE_SIZE = DEFAULT_MAX_ROWS
+# PostgREST puts an id list in the query string, so very long lists are
+# split into several requests to stay under URL length limits.
+DEFAULT_ID_CHUNK_SIZE = 500
+
+
+def configured_max_rows() -> int:
+    """The Supabase project's max-rows, from the [supabase] settings."""
+    return int(get_settings("supabase").get("max_rows", DEFAULT_MAX_ROWS))
+
+
+def max_rows(sb) -> Optional[int]:
+    """Most rows one response of `sb` can hold, or None if it is not capped."""
+    if hasattr(sb, "max_rows"):  # local backends say so themselves
+        return sb.max_rows
+    return configured_max_rows()
+
+
+def page_size_for(sb, page_size: int) -> int:
+    """`page_size` clamped to the backend's cap, so a short page really is the last."""
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got {page_size}")
+    cap = max_rows(sb)
+    return min(page_size, cap) if cap else page_size
+
+
+def _fetch_page(sb, table: str, columns: str, after_id, page_size: int, filters) -> List[Dict]:
+    query = sb.table(table).select(columns)
+    for op, column, value in filters:
+        query = getattr(query, op)(column, value)
+    if after_id is not None:
+        query = query.gt("id", after_id)
+    query = query.order("id").limit(page_size)
+    # Each page is retried on transient errors, behind the client's circuit breaker
+    resp = resilient(query.execute, sb)
+    return resp.data if resp.data else []
+
+
+def iter_keyset(
+    sb,
+    table: str,
+    columns: Union[str, Sequence[str]] = "*",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: bool = False,
+    filters: Optional[Sequence[Tuple[str, str, object]]] = None,
+    after_id=None,
+) -> Iterator[Dict]:
+    """
+    Yields every row of `table` in id order, one page at a time, using the
+    last seen id as the cursor instead of offsets. Only one page (two with
+    prefetch) is held in memory. `filters` are (method, column, value)
+    tuples applied to each page query, e.g. ("eq", "status", "Completed").
+    With prefetch=True the next page is requested while the current one
+    is being consumed. Pass after_id to resume after a known row.
+    page_size is clamped to the backend's max-rows cap (see page_size_for).
+    """
+    page_size = page_size_for(sb, page_size)
+    if not isinstance(columns, str):
+        columns = ",".join(columns)
+    if columns != "*" and "id" not in [c.strip() for c in columns.split(",")]:
+        columns = f"id,{columns}"
+    filters = list(filters or [])
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = _fetch_page(sb, table, columns, after_id, page_size, filters)
+        while page:
+            next_page = None
+            has_more = len(page) == page_size
+            if has_more and executor:
+                next_page = executor.submit(_fetch_page, sb, table, columns, page[-1]["id"], page_size, filters)
+
+            yield from page
+
+            if not has_more:
+                break
+            if next_page is not None:
+                page = next_page.result()
+            else:
+                page = _fetch_page(sb, table, columns, page[-1]["id"], page_size, filters)
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_by_ids(sb, table: str, columns: Union[str, Sequence[str]], column: str, values,
+                chunk_size: int = DEFAULT_ID_CHUNK_SIZE) -> Iterator[Dict]:
+    """The rows whose `column` is one of `values`, chunk_size values per request (paged past max-rows)."""
+    values = list(dict.fromkeys(values))
+    for start in range(0, len(values), chunk_size):
+        yield from iter_keyset(sb, table, columns, filters=[("in_", column, values[start:start + chunk_size])])
+
+
+def iter_rpc(sb, fn: str, params: Optional[Dict] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+    """
+    Yields every row of a set-returning function, one .range() page at a
+    time, since its result is capped at max-rows like a table read. The
+    function must return its rows in a stable order.
+    """
+    page_size = page_size_for(sb, page_size)
+    start = 0
+    while True:
+        query = sb.rpc(fn, params or {}).range(start, start + page_size - 1)
+        page = resilient(query.execute, sb).data or []
+        yield from page
+        if len(page) < page_size:
+            return
+        start += page_size
@@ -1,10 +1,25 @@
-from typing import List, Dict
-from src.config import get_supabase
+from typing import List, Dict, Iterable, Optional, Iterator, Tuple
+from src.dao.base_dao import BaseDAO
+from src.dao.events import emits
+from src.dao.pagination import iter_by_ids, iter_keyset, iter_rpc, DEFAULT_ID_CHUNK_SIZE, DEFAULT_PAGE_SIZE
+from src.dao.query_cache import cached_read, invalidates
+from src.dao.rows import Columns, normalize_columns, select_clause, shape_row, shape_rows
 
-class PaymentsDAO:
-    def __init__(self):
-        self._sb = get_supabase()  # internal Supabase client
+class PaymentsDAO(BaseDAO):
+    def _select_all(self, columns: Columns, filters: List[Tuple]) -> List[Dict]:
+        """
+        Every payment matching `filters`, paged through iter_keyset, since a
+        single response stops at PostgREST's max-rows without saying so.
+        """
+        rows = list(iter_keyset(self._sb, "payments", select_clause(columns), filters=filters))
+        names = normalize_columns(columns)
+        if names is not None and "id" not in names:
+            # iter_keyset needs the id as its cursor; callers get what they asked for
+            rows = [{k: v for k, v in row.items() if k != "id"} for row in rows]
+        return rows
 
+    @invalidates("payments", subscription_id="subscription_id")
+    @emits("payments")
     def insert_payment(self, subscription_id: int, amount: float, method: str, status: str):
         payload = {
             "subscription_id": subscription_id,
@@ -16,29 +31,92 @@ class PaymentsDAO:
         resp = self._sb.table("payments").insert(payload).execute()
         return resp.data if resp.data else None
 
-    def get_payments_by_subscription(self, subscription_id: int) -> List[Dict]:
-        resp = self._sb.table("payments").select("*").eq("subscription_id", subscription_id).execute()
+    @invalidates("payments", subscription_id="subscription_id")
+    @emits("payments")
+    def insert_payment_checked(self, subscription_id: int, amount: float, method: str, status: str) -> Optional[Dict]:
+        """
+        Same as insert_payment, but the subscription is checked to exist in
+        the same request (sql/writes.sql). Returns the new row, or None if
+        there is no such subscription.
+        """
+        params = {"p_subscription_id": subscription_id, "p_amount": amount, "p_method": method, "p_status": status}
+        resp = self._sb.rpc("insert_payment_checked", params).execute()
+        return resp.data[0] if resp.data else None
+
+    @invalidates("payments")
+    @emits("payments")
+    def insert_payments(self, payments: List[Dict]) -> List[Dict]:
+        """Inserts many payment rows in one request and returns the created rows."""
+        if not payments:
+            return []
+        resp = self._sb.table("payments").insert(payments).execute()
         return resp.data if resp.data else []
 
+    @cached_read("payments", subscription_id="subscription_id")
+    def get_payments_by_subscription(self, subscription_id: int, columns: Columns = None, shape: str = "dicts") -> List[Dict]:
+        payments = self._select_all(columns, [("eq", "subscription_id", subscription_id)])
+        return shape_rows(payments, "payments", columns, shape)
+
+    @cached_read("payments", subscription_id="subscription_ids")
+    def get_payments_by_subscriptions(
+        self,
+        subscription_ids: Iterable[int],
+        status: Optional[str] = None,
+        columns: Columns = None,
+        chunk_size: int = DEFAULT_ID_CHUNK_SIZE,
+        shape: str = "dicts",
+    ) -> List[Dict]:
+        """
+        Fetches the payments of many subscriptions with one query per
+        chunk_size ids (more if a chunk has more than max-rows payments),
+        optionally filtered by status.
+        """
+        ids = list(dict.fromkeys(subscription_ids))
+        if not ids:
+            return shape_rows([], "payments", columns, shape)
+
+        payments = []
+        for start in range(0, len(ids), chunk_size):
+            filters = [("in_", "subscription_id", ids[start:start + chunk_size])]
+            if status:
+                filters.append(("eq", "status", status))
+            payments.extend(self._select_all(columns, filters))
+        return shape_rows(payments, "payments", columns, shape)
+
+    @cached_read("payments", subscription_id="subscription_ids")
     def get_total_spend_for_subscriptions(self, subscription_ids: List[int]) -> float:
         if not subscription_ids:
             return 0.0
 
-        resp = (
-            self._sb.table("payments")
-            .select("amount")
-            .in_("subscription_id", subscription_ids)
-            .eq("status", "completed")  # must match actual status value
-            .execute()
+        # Summed by the database (sql/aggregates.sql); status is matched case-insensitively.
+        # One row per subscription, so more than max-rows ids take several pages
+        rows = iter_rpc(
+            self._sb,
+            "spend_per_subscription",
+            {"p_subscription_ids": list(subscription_ids), "p_status": "completed"},
         )
+        return sum(float(row["total_spend"]) for row in rows)
 
-        if not resp.data:
-            return 0.0
 
+    @cached_read("payments")
+    def get_all_payments(self, columns: Columns = None, shape: str = "dicts"):
+        return shape_rows(list(self.iter_payments(columns)), "payments", columns, shape)
 
-        return sum(float(row["amount"]) for row in resp.data)
+    @cached_read("payments")
+    def get_recent_payments(self, limit: int = 5, columns: Columns = None, shape: str = "dicts"):
+        """The newest `limit` payments, latest first."""
+        resp = self._sb.table("payments").select(select_clause(columns)).order("payment_date", desc=True).limit(limit).execute()
+        return shape_rows(resp.data or [], "payments", columns, shape)
 
+    def iter_payments(self, columns: Columns = None, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False,
+                      filters: Optional[List[Tuple]] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Streams all payments (or those matching `filters`) in id order, page
+        by page (see iter_keyset); with after_id, only those with a larger id.
+        """
+        return iter_keyset(self._sb, "payments", select_clause(columns), page_size=page_size, prefetch=prefetch,
+                           filters=filters, after_id=after_id)
 
-    def get_all_payments(self):
-        resp = self._sb.table("payments").select("*").execute()
-        return resp.data if resp.data else []
\ No newline at end of file
+    def iter_payments_by_ids(self, payment_ids: Iterable[int], columns: Columns = None) -> Iterator[Dict]:
+        """Streams the existing payments among `payment_ids`, 500 ids per request; rows always include id."""
+        return iter_by_ids(self._sb, "payments", select_clause(columns), "id", payment_ids)
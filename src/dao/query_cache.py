@@ -0,0 +1,223 @@
+"""
+Process-wide read cache for DAO queries.
+
+Reads decorated with @cached_read are stored per (method, arguments) with a
+TTL and LRU eviction. Each entry remembers which tables it depends on and,
+optionally, which rows (e.g. {"subscription_id": {5}}). Writes decorated
+with @invalidates drop only the entries they can affect: recording a
+payment for subscription 5 keeps the cached payments of subscription 6
+as well as every users/subscriptions entry.
+
+On a miss, concurrent identical reads share one backend call, which is
+retried on transient errors behind a circuit breaker (src/dao/resilience.py).
+
+Cached values are shared between callers and must not be mutated.
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from src.dao.instrumentation import mark_cached
+from src.dao.resilience import resilient, single_flight
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300  # seconds, same as the dashboard used to cache whole tables
+
+_MISSING = object()
+
+Scope = Optional[Dict[str, Set[Any]]]
+
+
+def _freeze(value):
+    """Makes list/set/dict arguments usable as part of a cache key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)) or type(value).__name__ in ("dict_keys", "dict_values"):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _scope_values(value) -> Optional[Set[Any]]:
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+        return {value}
+    return set(value)
+
+
+def _is_unaffected(entry_scope: Scope, write_scope: Scope) -> bool:
+    """
+    An entry survives a write only if both are scoped on a common column
+    and touch disjoint values there. Anything else is invalidated.
+    """
+    if not entry_scope or not write_scope:
+        return False
+    return any(
+        column in entry_scope and entry_scope[column].isdisjoint(values)
+        for column, values in write_scope.items()
+    )
+
+
+class QueryCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Dict[str, Scope]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a read that raced with a write
+        # does not store its (possibly stale) result.
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, maxsize: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """Changes the limits; ttl=0 disables caching."""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict()
+
+    def get(self, key: Tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def set(self, key: Tuple, value: Any, dependencies: Dict[str, Scope], generation: Optional[Tuple[int, ...]] = None) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            current = tuple(self._generations.get(table, 0) for table in dependencies)
+            if generation is not None and generation != current:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value, dependencies)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+
+    def invalidate(self, table: str, scope: Scope = None) -> int:
+        """
+        Drops the entries that depend on `table` and may be affected by a
+        write to the rows described by `scope` (all rows when None).
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [
+                key for key, (_, _, deps) in self._entries.items()
+                if table in deps and not _is_unaffected(deps[table], scope)
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+query_cache = QueryCache()
+
+
+def _bind_scope(signature, args, kwargs, scope_args: Dict[str, str]) -> Tuple[inspect.BoundArguments, Scope]:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    # One-shot iterators (e.g. a generator of ids) would be used up by the
+    # key or the scope; the method gets the same values as a list instead
+    for name, value in bound.arguments.items():
+        if isinstance(value, Iterator):
+            bound.arguments[name] = list(value)
+    scope = {}
+    for column, arg_name in scope_args.items():
+        values = _scope_values(bound.arguments.get(arg_name))
+        if values is None:
+            return bound, None
+        scope[column] = values
+    return bound, scope or None
+
+
+def cached_read(tables: Union[str, Tuple[str, ...]], **scope_args: str):
+    """
+    Caches a DAO read method. `tables` lists the tables the result depends
+    on; keyword arguments map a column to the method argument that holds
+    its value(s), e.g. @cached_read("payments", subscription_id="subscription_id").
+    """
+    tables = (tables,) if isinstance(tables, str) else tuple(tables)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound, scope = _bind_scope(signature, args, kwargs, scope_args)
+            arguments = bound.arguments
+            # DAOs bound to their own client (e.g. a local backend) get separate entries
+            client = getattr(arguments.get("self"), "_client", None)
+            key = (func.__qualname__, id(client) if client is not None else None) + tuple(
+                (name, _freeze(value)) for name, value in arguments.items() if name != "self"
+            )
+            value = query_cache.get(key)
+            if value is not _MISSING:
+                mark_cached()
+                return value
+
+            def load():
+                generation = query_cache.generation(tables)
+                # Retried and failed fast per backend client, shared client included
+                backend = getattr(arguments.get("self"), "_sb", None)
+                result = resilient(lambda: func(*bound.args, **bound.kwargs), backend)
+                query_cache.set(key, result, {table: scope for table in tables}, generation)
+                return result
+
+            # Identical reads already in flight share that call (src/dao/resilience.py)
+            value, shared = single_flight.do(key, load)
+            if shared:
+                mark_cached()
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(table: str, **scope_args: str):
+    """
+    Marks a DAO write method: once it returns, cached reads of `table`
+    that may include the written rows are dropped. Keyword arguments map
+    a column to the method argument that holds its value, as in cached_read.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound, scope = _bind_scope(signature, args, kwargs, scope_args)
+            try:
+                return func(*bound.args, **bound.kwargs)
+            finally:
+                query_cache.invalidate(table, scope)
+
+        return wrapper
+
+    return decorator
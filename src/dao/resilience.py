@@ -0,0 +1,167 @@
+"""
+Protects the backend from read spikes and rides out short outages.
+
+- Single flight: concurrent identical reads (same cache key) share one
+  backend call; the callers that arrive while it runs wait for its result
+  instead of sending their own. Used by @cached_read on a cache miss, so
+  a burst of sessions refilling an expired entry costs one query.
+- Retries: transient failures (connection errors, timeouts, 429 and 5xx
+  responses) are retried with exponential backoff and full jitter, so
+  callers that failed together do not come back together.
+- Circuit breaker: after `failure_threshold` consecutive transient
+  failures against a client, reads fail fast with CircuitOpen for
+  `reset_timeout` seconds instead of piling up on a struggling backend;
+  then one trial call decides whether to close it again.
+
+Errors that are not transient (bad queries, missing functions) are
+raised at once and do not count against the breaker.
+"""
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.1  # seconds
+DEFAULT_MAX_DELAY = 2.0  # seconds
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0  # seconds
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(ConnectionError):
+    """Raised instead of calling a backend that keeps failing."""
+
+
+def is_transient(e: BaseException) -> bool:
+    """Connection problems and overloaded/unavailable responses, which may succeed if retried."""
+    # CircuitOpen, or an error an inner resilient() call already retried
+    # and counted (e.g. a failed page inside a cached full-table read)
+    if isinstance(e, CircuitOpen) or getattr(e, "_resilience_handled", False):
+        return False
+    if isinstance(e, OSError):  # includes ConnectionError and TimeoutError
+        return True
+    try:
+        import httpx
+        if isinstance(e, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    # postgrest's APIError carries the HTTP status as its code when the body is not JSON
+    status = getattr(e, "code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    try:
+        return int(status) in TRANSIENT_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+def retry(fn: Callable[[], Any], attempts: int = DEFAULT_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+          max_delay: float = DEFAULT_MAX_DELAY) -> Any:
+    """Calls fn, retrying transient failures up to `attempts` times in total."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            trial = False
+            if self.opened_at is not None:
+                if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                    raise CircuitOpen(f"Backend unavailable after {self.failures} failures; not retrying yet")
+                trial = self._trial_running = True
+        try:
+            result = fn()
+        except Exception as e:
+            with self._lock:
+                self._trial_running = False if trial else self._trial_running
+                if is_transient(e):
+                    self.failures += 1
+                    if trial or self.failures >= self.failure_threshold:
+                        self.opened_at = time.monotonic()
+            raise
+        with self._lock:
+            self._trial_running = False if trial else self._trial_running
+            self.failures, self.opened_at = 0, None
+        return result
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]):
+        """Returns (result, shared): shared is True if another caller's call was reused."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+single_flight = SingleFlight()
+_shared_breaker = CircuitBreaker()
+_breakers: "weakref.WeakKeyDictionary[Any, CircuitBreaker]" = weakref.WeakKeyDictionary()
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(client) -> CircuitBreaker:
+    """One breaker per backend client; None (no client at hand) shares one."""
+    if client is None:
+        return _shared_breaker
+    with _breakers_lock:
+        if client not in _breakers:
+            _breakers[client] = CircuitBreaker()
+        return _breakers[client]
+
+
+def resilient(fn: Callable[[], Any], client=None) -> Any:
+    """fn with retries, behind the client's circuit breaker."""
+    try:
+        return breaker_for(client).call(lambda: retry(fn))
+    except Exception as e:
+        try:
+            e._resilience_handled = True
+        except AttributeError:
+            pass
+        raise
@@ -0,0 +1,76 @@
+"""
+Column projection and compact result shapes shared by the DAOs.
+
+Every read accepts `columns` (None for all) so only the fields a caller
+needs are selected and sent over the wire, and `shape`:
+
+- "dicts"   (default) a list of dicts, exactly what Supabase returns
+- "rows"    a list of named tuples, e.g. UserRow(id=1, name="Asha");
+            tuples carry no per-row dict, so they are much smaller
+- "columns" a dict of column name -> list of values, ready for
+            pd.DataFrame(...) or NumPy
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+SHAPES = ("dicts", "rows", "columns")
+
+Columns = Optional[Union[str, Sequence[str]]]
+
+
+def normalize_columns(columns: Columns) -> Optional[Tuple[str, ...]]:
+    """Returns the requested columns as a tuple, or None for all columns."""
+    if columns is None:
+        return None
+    if isinstance(columns, str):
+        columns = columns.split(",")
+    names = tuple(c.strip() for c in columns if c.strip())
+    return None if not names or "*" in names else names
+
+
+def select_clause(columns: Columns) -> str:
+    """Builds the argument for .select() from a column list."""
+    names = normalize_columns(columns)
+    return "*" if names is None else ",".join(names)
+
+
+ROW_NAMES = {
+    "users": "UserRow",
+    "subscriptions": "SubscriptionRow",
+    "payments": "PaymentRow",
+    "defaultsubscriptions": "DefaultSubscriptionRow",
+}
+
+
+@lru_cache(maxsize=None)
+def row_type(table: str, fields: Tuple[str, ...]):
+    """Named tuple class for a table and column set, e.g. PaymentRow."""
+    return namedtuple(ROW_NAMES.get(table, "Row"), fields, rename=True)
+
+
+def _fields(columns: Columns, data: List[Dict]) -> Tuple[str, ...]:
+    names = normalize_columns(columns)
+    if names is not None:
+        return names
+    return tuple(data[0].keys()) if data else ()
+
+
+def shape_rows(data: List[Dict], table: str, columns: Columns = None, shape: str = "dicts"):
+    """Converts a list of row dicts into the requested shape."""
+    if shape == "dicts":
+        return data
+    fields = _fields(columns, data)
+    if shape == "rows":
+        cls = row_type(table, fields)
+        return [cls(*(row.get(f) for f in fields)) for row in data]
+    if shape == "columns":
+        return {f: [row.get(f) for row in data] for f in fields}
+    raise ValueError(f"Unknown shape '{shape}'. Expected one of: {', '.join(SHAPES)}")
+
+
+def shape_row(row: Optional[Dict], table: str, columns: Columns = None, shape: str = "dicts"):
+    """Single-row variant of shape_rows; "columns" behaves like "dicts"."""
+    if not row or shape != "rows":
+        return row
+    return shape_rows([row], table, columns, "rows")[0]
@@ -0,0 +1,227 @@
+"""
+Recurring-billing schedule: which charges each subscription should have
+produced, and how the recorded payments line up against them.
+
+Everything is computed with NumPy/pandas over whole tables; there is no
+per-subscription Python loop. A monthly plan is due on its start day
+every month (clamped to the month's last day, so a plan started on the
+31st is due on Feb 28/29), a yearly plan every 12 months, up to its
+end_date or `as_of`, whichever comes first.
+
+Completed payments are matched to cycles in order: the first payment of
+a subscription pays its first cycle, the second the second, and so on.
+Each cycle then gets one of these statuses:
+
+- "paid"       paid in full within `grace_days` of the due date
+- "late"       paid in full, but later than that
+- "underpaid"  paid, but less than the plan cost
+- "overpaid"   paid more than the plan cost, or a payment with no cycle left
+- "missing"    no payment and the grace period is over
+- "due"        no payment yet, still within the grace period
+"""
+from datetime import date
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.Subscription_dao import SubscriptionDAO
+
+PLAN_MONTHS = {"monthly": 1, "yearly": 12}
+DEFAULT_GRACE_DAYS = 7
+AMOUNT_TOLERANCE = 0.01
+STATUSES = ["paid", "late", "underpaid", "overpaid", "missing", "due"]
+ISSUES = ("missing", "late", "underpaid", "overpaid")
+
+SUBSCRIPTION_COLUMNS = ["id", "user_id", "name", "plan_type", "cost", "start_date", "end_date"]
+PAYMENT_COLUMNS = ["id", "subscription_id", "amount", "payment_date", "status"]
+
+DateLike = Union[str, date, np.datetime64, pd.Timestamp]
+
+
+def _to_days(values) -> np.ndarray:
+    """Parses dates/timestamps into datetime64[D]; unparseable values become NaT."""
+    parsed = pd.to_datetime(pd.Series(values, dtype="object"), errors="coerce", utc=True, format="mixed")
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[D]")
+
+
+def _split(days: np.ndarray):
+    """datetime64[D] -> (months since 1970-01, 0-based day of month) as integers."""
+    month = days.astype("datetime64[M]")
+    return month.astype(np.int64), (days - month.astype("datetime64[D]")).astype(np.int64)
+
+
+def _due_dates(start_month: np.ndarray, day: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    start + months calendar months, keeping the day of month where it
+    exists. Works on integers with a small month -> first-day lookup table,
+    which is much faster than datetime64 unit conversions on every row.
+    """
+    month = start_month + months
+    if not len(month):
+        return np.zeros(0, "datetime64[D]")
+    low = month.min()
+    first_days = np.arange(low, month.max() + 2).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    first = first_days[month - low]
+    length = first_days[month - low + 1] - first
+    return (first + np.minimum(day, length - 1)).astype("datetime64[D]")
+
+
+def expand_schedule(subscriptions: pd.DataFrame, as_of: Optional[DateLike] = None, since: Optional[DateLike] = None) -> pd.DataFrame:
+    """
+    One row per expected charge: subscription_id, user_id, name, cycle
+    (0-based), due_date and expected_amount. Cycles after end_date or
+    as_of (default today) are left out, as are those before `since`.
+    """
+    as_of_day = np.datetime64(pd.Timestamp(as_of or date.today()).date(), "D")
+    subs = subscriptions[subscriptions["plan_type"].astype(str).str.lower().isin(PLAN_MONTHS.keys())]
+
+    start = _to_days(subs["start_date"].to_numpy())
+    end = _to_days(subs["end_date"].to_numpy()) if "end_date" in subs else np.full(len(subs), np.datetime64("NaT"), "datetime64[D]")
+    step = subs["plan_type"].astype(str).str.lower().map(PLAN_MONTHS).to_numpy(dtype=np.int64)
+    last = np.where(np.isnat(end) | (end > as_of_day), as_of_day, end)
+
+    # Number of cycles due by `last`: whole steps between the months, minus
+    # one when the final candidate falls on a later day than `last`
+    valid = ~np.isnat(start) & (start <= last)
+    start, last, step = start[valid], last[valid], step[valid]
+    start_month, start_day = _split(start)
+    month_gap = _split(last)[0] - start_month
+    cycles = month_gap // step + 1
+    cycles -= _due_dates(start_month, start_day, (cycles - 1) * step) > last
+
+    # Expand: repeat each subscription once per cycle and number the copies
+    rows = np.repeat(np.arange(len(cycles)), cycles)
+    first_row = np.repeat(np.cumsum(cycles) - cycles, cycles)
+    cycle = np.arange(len(rows)) - first_row
+
+    picked = subs[valid]
+    schedule = pd.DataFrame({
+        "subscription_id": picked["id"].to_numpy()[rows],
+        "user_id": picked["user_id"].to_numpy()[rows] if "user_id" in picked else None,
+        # Categorical: one copy of each name instead of one string per cycle
+        "name": pd.Categorical(picked["name"]).take(rows) if "name" in picked else None,
+        "cycle": cycle,
+        "due_date": _due_dates(start_month[rows], start_day[rows], cycle * step[rows]),
+        "expected_amount": pd.to_numeric(picked["cost"], errors="coerce").to_numpy(dtype=float)[rows],
+    })
+    if since is not None:
+        schedule = schedule[schedule["due_date"] >= np.datetime64(pd.Timestamp(since).date(), "D")]
+    return schedule.reset_index(drop=True)
+
+
+def reconcile(
+    schedule: pd.DataFrame,
+    payments: pd.DataFrame,
+    as_of: Optional[DateLike] = None,
+    grace_days: int = DEFAULT_GRACE_DAYS,
+) -> pd.DataFrame:
+    """
+    Matches completed payments to the scheduled cycles (see the module
+    docstring) and adds payment_id, paid_date, paid_amount, days_late and
+    status. Payments beyond the last cycle are returned as extra
+    "overpaid" rows without a due date.
+    """
+    as_of_day = np.datetime64(pd.Timestamp(as_of or date.today()).date(), "D")
+    completed = payments[payments["status"].astype(str).str.lower() == "completed"]
+    pay_sub = completed["subscription_id"].to_numpy(dtype=np.int64)
+    pay_id = completed["id"].to_numpy()
+    pay_date = _to_days(completed["payment_date"].to_numpy())
+    pay_amount = pd.to_numeric(completed["amount"], errors="coerce").to_numpy(dtype=float)
+
+    # Number each subscription's payments in date order: 0, 1, 2...
+    order = np.lexsort((pay_id, pay_date, pay_sub))
+    pay_sub, pay_id, pay_date, pay_amount = pay_sub[order], pay_id[order], pay_date[order], pay_amount[order]
+    new_group = np.r_[True, pay_sub[1:] != pay_sub[:-1]] if len(pay_sub) else np.zeros(0, bool)
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(pay_sub)), 0))
+    pay_cycle = np.arange(len(pay_sub)) - group_start
+
+    # Match payment n of a subscription to its cycle n through a sorted
+    # (subscription_id, cycle) key, instead of a DataFrame merge
+    schedule = schedule.sort_values(["subscription_id", "cycle"], kind="stable").reset_index(drop=True)
+    sched_sub = schedule["subscription_id"].to_numpy(dtype=np.int64)
+    width = int(max(schedule["cycle"].max() if len(schedule) else 0, pay_cycle.max() if len(pay_cycle) else 0)) + 1
+    sched_key = sched_sub * width + schedule["cycle"].to_numpy(dtype=np.int64)
+    pay_key = pay_sub * width + pay_cycle
+    pos = np.minimum(np.searchsorted(sched_key, pay_key), max(len(sched_key) - 1, 0))
+    matched = (sched_key[pos] == pay_key) if len(sched_key) else np.zeros(len(pay_key), bool)
+    # Only payments of scheduled subscriptions are judged
+    known = np.isin(pay_sub, sched_sub)
+
+    # Payments left over once every cycle is paid become extra rows that
+    # copy their subscription's details from its last scheduled cycle
+    extra = np.flatnonzero(known & ~matched)
+    extra_rows = np.searchsorted(sched_key, pay_sub[extra] * width + width - 1, side="right") - 1
+    rows = np.concatenate([np.arange(len(schedule)), extra_rows])
+    is_extra = np.arange(len(rows)) >= len(schedule)
+    result = schedule.take(rows).reset_index(drop=True)
+    result.loc[is_extra, "cycle"] = pay_cycle[extra]
+    due_date = result["due_date"].to_numpy(dtype="datetime64[D]").copy()
+    due_date[is_extra] = np.datetime64("NaT")
+    result["due_date"] = due_date
+
+    payment_id = np.full(len(result), np.nan)
+    paid_date = np.full(len(result), np.datetime64("NaT"), "datetime64[D]")
+    paid_amount = np.full(len(result), np.nan)
+    for target, source in ((pos[matched], matched), (np.flatnonzero(is_extra), extra)):
+        payment_id[target] = pay_id[source]
+        paid_date[target] = pay_date[source]
+        paid_amount[target] = pay_amount[source]
+    result["payment_id"] = pd.array(payment_id, dtype="Int64")
+    result["paid_date"], result["paid_amount"] = paid_date, paid_amount
+
+    has_payment = ~np.isnan(payment_id)
+    days_late = (paid_date - due_date).astype("timedelta64[D]").astype(float)
+    diff = paid_amount - result["expected_amount"].to_numpy(dtype=float)
+    overdue = due_date + np.timedelta64(grace_days, "D") < as_of_day
+    result["days_late"] = pd.array(np.where(has_payment & ~is_extra, days_late, np.nan), dtype="Int64")
+    codes = np.select(
+        [
+            is_extra | (has_payment & (diff > AMOUNT_TOLERANCE)),
+            has_payment & (diff < -AMOUNT_TOLERANCE),
+            has_payment & (days_late > grace_days),
+            has_payment,
+            overdue,
+        ],
+        [STATUSES.index(status) for status in ("overpaid", "underpaid", "late", "paid", "missing")],
+        default=STATUSES.index("due"),
+    )
+    result["status"] = pd.Categorical.from_codes(codes, categories=STATUSES)
+    return result
+
+
+class BillingService:
+    def __init__(self):
+        self.subscription_dao = SubscriptionDAO()
+        self.payment_dao = PaymentsDAO()
+
+    def load_subscriptions(self) -> pd.DataFrame:
+        return pd.DataFrame(self.subscription_dao.get_all_subscriptions(columns=SUBSCRIPTION_COLUMNS, shape="columns"),
+                            columns=SUBSCRIPTION_COLUMNS)
+
+    def load_payments(self) -> pd.DataFrame:
+        return pd.DataFrame(self.payment_dao.get_all_payments(columns=PAYMENT_COLUMNS, shape="columns"),
+                            columns=PAYMENT_COLUMNS)
+
+    def check(self, as_of: Optional[DateLike] = None, since: Optional[DateLike] = None,
+              grace_days: int = DEFAULT_GRACE_DAYS) -> pd.DataFrame:
+        """Schedule of every subscription, reconciled against its payments."""
+        schedule = expand_schedule(self.load_subscriptions(), as_of, since)
+        return reconcile(schedule, self.load_payments(), as_of, grace_days)
+
+    def check_subscription(self, subscription_id: int, as_of: Optional[DateLike] = None,
+                           grace_days: int = DEFAULT_GRACE_DAYS) -> pd.DataFrame:
+        """Same as check(), for a single subscription."""
+        sub = self.subscription_dao.get_subscription_by_id(subscription_id, columns=SUBSCRIPTION_COLUMNS)
+        if not sub:
+            return reconcile(expand_schedule(pd.DataFrame(columns=SUBSCRIPTION_COLUMNS), as_of),
+                             pd.DataFrame(columns=PAYMENT_COLUMNS), as_of, grace_days)
+        payments = self.payment_dao.get_payments_by_subscription(subscription_id, columns=PAYMENT_COLUMNS)
+        return reconcile(expand_schedule(pd.DataFrame([sub]), as_of),
+                         pd.DataFrame(payments, columns=PAYMENT_COLUMNS), as_of, grace_days)
+
+    @staticmethod
+    def summarize(result: pd.DataFrame) -> Dict[str, int]:
+        """Number of cycles per status."""
+        return {status: int(count) for status, count in result["status"].value_counts().items() if count}
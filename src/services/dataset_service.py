@@ -0,0 +1,240 @@
+# src/services/dataset_service.py
+"""
+One columnar snapshot of users, subscriptions and payments for the
+dashboard, shared read-only by every session, with the search indexes
+behind the dashboard's user and subscription pickers.
+
+The tables are streamed into pandas DataFrames with integer ids,
+categorical status / method / plan_type and names, and the joins and
+lookups the pages need (user names, subscription labels, rows per user
+or subscription) are computed once per refresh instead of on every
+rerun of every session. A snapshot is never modified: a refresh builds
+a new one and swaps it in, so readers need no locking.
+
+Only the tables this process has written to since the last build (their
+query cache generation changed) are read again, and everything is
+reloaded once the snapshot is older than `max_age` seconds, which picks
+up writes made elsewhere. When every change to payments since the last
+build was an insert made through this process's DAOs (PaymentsDAO or
+JournalDAO, which report the new rows through src/dao/events.py), only
+those rows are fetched by id and appended, so recording a payment (or a
+payment writer batch) costs one small query on the next render. Any other
+change, such as a replica sync applying edits and deletes, reloads the
+payments table.
+"""
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.dao.events import on_write, remove_listener
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.query_cache import query_cache
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.User_dao import UserDAO
+from src.services.search_index import SearchIndex
+
+TABLES = ("users", "subscriptions", "payments")
+DEFAULT_MAX_AGE = 300  # seconds, same as the query cache TTL
+
+USER_COLUMNS = ["id", "name", "email"]
+SUBSCRIPTION_COLUMNS = ["id", "user_id", "name", "plan_type", "cost", "start_date", "end_date", "status"]
+PAYMENT_COLUMNS = ["id", "subscription_id", "amount", "payment_date", "method", "status"]
+CATEGORIES = {
+    "subscriptions": ("name", "plan_type", "status"),
+    "payments": ("method", "status"),
+}
+_NO_ROWS = np.zeros(0, dtype=np.intp)
+
+
+def _frame(rows, columns, categories=()) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for column in columns:
+        if column == "id" or column.endswith("_id"):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+        elif column in categories:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _append(frame: pd.DataFrame, more: pd.DataFrame) -> pd.DataFrame:
+    """Rows of `more` after those of `frame`, keeping categorical columns categorical."""
+    if more.empty:
+        return frame
+    combined = pd.concat([frame, more], ignore_index=True)
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            combined[column] = union_categoricals([frame[column], more[column]], ignore_order=True)
+    return combined
+
+
+def _positions(keys: pd.Series) -> Dict[int, np.ndarray]:
+    """key -> row positions, so "rows of X" is a dict lookup plus a take."""
+    return {int(key): rows for key, rows in keys.groupby(keys, sort=False).indices.items()} if len(keys) else {}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """An immutable snapshot; treat the frames and lookups as read-only."""
+    users: pd.DataFrame
+    subscriptions: pd.DataFrame  # with user_name
+    payments: pd.DataFrame  # with user_id, payment_date as UTC timestamps
+    user_names: Dict[int, str]  # id -> name
+    user_search: SearchIndex  # over name and email
+    subscription_search: SearchIndex  # over subscription name and the owner's name and email
+    subscription_counts: pd.Series  # user name -> number of subscriptions, largest first
+    built_at: float
+    _subscriptions_by_user: Dict[int, np.ndarray]
+    _payments_by_subscription: Dict[int, np.ndarray]
+
+    def subscriptions_of(self, user_id: int) -> pd.DataFrame:
+        return self.subscriptions.take(self._subscriptions_by_user.get(user_id, _NO_ROWS))
+
+    def payments_of(self, subscription_id: int) -> pd.DataFrame:
+        return self.payments.take(self._payments_by_subscription.get(subscription_id, _NO_ROWS))
+
+    def with_payments(self, payments: pd.DataFrame) -> "Dataset":
+        """A copy with new payments, reusing everything derived from users and subscriptions."""
+        pays = _join_payments(payments, self.subscriptions)
+        return replace(self, payments=pays, _payments_by_subscription=_positions(pays["subscription_id"]))
+
+
+def load_frames(users=None, subscriptions=None, payments=None) -> Dict[str, pd.DataFrame]:
+    """Typed frames from iterables of row dicts; tables passed as None are left out."""
+    frames = {}
+    if users is not None:
+        frames["users"] = _frame(users, USER_COLUMNS)
+    if subscriptions is not None:
+        frames["subscriptions"] = _frame(subscriptions, SUBSCRIPTION_COLUMNS, CATEGORIES["subscriptions"])
+    if payments is not None:
+        pays = _frame(payments, PAYMENT_COLUMNS, CATEGORIES["payments"])
+        pays["payment_date"] = pd.to_datetime(pays["payment_date"], utc=True, format="mixed", errors="coerce")
+        frames["payments"] = pays
+    return frames
+
+
+def _join_payments(payments: pd.DataFrame, subscriptions: pd.DataFrame) -> pd.DataFrame:
+    sub_owner = pd.Series(subscriptions["user_id"].to_numpy(), index=subscriptions["id"].to_numpy())
+    return payments.assign(user_id=payments["subscription_id"].map(sub_owner).astype("Int64"))
+
+
+def build_dataset(users: pd.DataFrame, subscriptions: pd.DataFrame, payments: pd.DataFrame) -> Dataset:
+    """Joins the three frames from load_frames and precomputes the lookups."""
+    user_names = dict(zip(users["id"].tolist(), users["name"].tolist()))
+    subs = subscriptions.assign(user_name=pd.Categorical(subscriptions["user_id"].map(user_names)))
+    pays = _join_payments(payments, subs)
+    user_emails = dict(zip(users["id"].tolist(), users["email"].tolist()))
+
+    # Labels carry the email or id, so entries with the same name stay apart
+    user_search = SearchIndex(
+        users["id"].tolist(),
+        [f"{name} <{email}>" for name, email in zip(users["name"].tolist(), users["email"].tolist())],
+        zip(users["name"].tolist(), users["email"].tolist()),
+    )
+    sub_rows = list(zip(subs["id"].tolist(), subs["name"].astype(object).tolist(), subs["user_id"].tolist()))
+    subscription_search = SearchIndex(
+        [sub_id for sub_id, _, _ in sub_rows],
+        [f"{name} (User: {user_names.get(user_id, 'N/A')}, #{sub_id})" for sub_id, name, user_id in sub_rows],
+        ((name, user_names.get(user_id), user_emails.get(user_id)) for _, name, user_id in sub_rows),
+    )
+    counts = subs["user_name"].value_counts(sort=True)
+    return Dataset(
+        users=users,
+        subscriptions=subs,
+        payments=pays,
+        user_names=user_names,
+        user_search=user_search,
+        subscription_search=subscription_search,
+        subscription_counts=counts[counts > 0],
+        built_at=time.monotonic(),
+        _subscriptions_by_user=_positions(subs["user_id"]),
+        _payments_by_subscription=_positions(pays["subscription_id"]),
+    )
+
+
+class DatasetService:
+    """Holds the current snapshot and rebuilds it when the tables change."""
+
+    def __init__(self, user_dao: Optional[UserDAO] = None, subscription_dao: Optional[SubscriptionDAO] = None,
+                 payment_dao: Optional[PaymentsDAO] = None, max_age: float = DEFAULT_MAX_AGE):
+        self.user_dao = user_dao or UserDAO()
+        self.subscription_dao = subscription_dao or SubscriptionDAO()
+        self.payment_dao = payment_dao or PaymentsDAO()
+        self.max_age = max_age
+        self._dataset: Optional[Dataset] = None
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Ids of payments this process inserted, one list per insert (each
+        # one also bumped the payments cache generation once)
+        self._inserted: List[Optional[List[int]]] = []
+        self._inserted_lock = threading.Lock()
+        on_write("payments", self._on_payment_write)
+
+    def close(self) -> None:
+        remove_listener("payments", self._on_payment_write)
+
+    def _on_payment_write(self, action: str, rows: List[Dict]) -> None:
+        with self._inserted_lock:
+            if action == "insert":
+                self._inserted.append([row["id"] for row in rows])
+            else:
+                self._inserted.append(None)  # never matched: forces a reload
+
+    def _take_inserted(self):
+        """The current generations and the inserts reported up to now, atomically."""
+        with self._inserted_lock:
+            generations = dict(zip(TABLES, query_cache.generation(TABLES)))
+            inserted, self._inserted = self._inserted, []
+        return generations, inserted
+
+    def _changed(self) -> List[str]:
+        if self._dataset is None or time.monotonic() - self._dataset.built_at > self.max_age:
+            return list(TABLES)
+        current = dict(zip(TABLES, query_cache.generation(TABLES)))
+        return [table for table in TABLES if current[table] != self._generations.get(table)]
+
+    def get(self) -> Dataset:
+        """The current snapshot, rebuilt first if it is out of date."""
+        if not self._changed():
+            return self._dataset
+        with self._lock:
+            # Another session may have rebuilt it while this one waited
+            changed = self._changed()
+            if changed:
+                generations, inserted = self._take_inserted()
+                # Only the tables that changed are read again. They are streamed
+                # rather than read through the cached get_all_* methods, so the
+                # rows are not also kept in the query cache.
+                sources = {
+                    "users": lambda: self.user_dao.iter_users(columns=USER_COLUMNS, prefetch=True),
+                    "subscriptions": lambda: self.subscription_dao.iter_subscriptions(
+                        columns=SUBSCRIPTION_COLUMNS, prefetch=True),
+                    "payments": lambda: self.payment_dao.iter_payments(columns=PAYMENT_COLUMNS, prefetch=True),
+                }
+                bumps = generations["payments"] - self._generations.get("payments", 0)
+                if changed == ["payments"] and len(inserted) == bumps and all(ids is not None for ids in inserted):
+                    # The common case, this process recorded payments and nothing
+                    # else touched the table: only those rows are read (see
+                    # above), and joins, lookups and search indexes over users
+                    # and subscriptions stay as they are
+                    old = self._frames["payments"]
+                    new = self.payment_dao.iter_payments_by_ids([i for ids in inserted for i in ids], columns=PAYMENT_COLUMNS)
+                    more = load_frames(payments=sorted(new, key=lambda row: row["id"]))["payments"]
+                    more = more[~more["id"].isin(old["id"])]
+                    frames = dict(self._frames, payments=_append(old, more))
+                    self._dataset = self._dataset.with_payments(frames["payments"])
+                else:
+                    frames = dict(self._frames, **load_frames(**{table: sources[table]() for table in changed}))
+                    self._dataset = build_dataset(frames["users"], frames["subscriptions"], frames["payments"])
+                self._frames, self._generations = frames, generations
+            return self._dataset
+
+    def invalidate(self) -> None:
+        """Forces a full rebuild on the next get()."""
+        with self._lock:
+            self._dataset = None
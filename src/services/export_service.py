@@ -0,0 +1,166 @@
+# src/services/export_service.py
+"""
+Streams users, subscriptions or payments to CSV or Parquet.
+
+Rows are read page by page with keyset pagination (the next page is
+fetched while the current one is written) and each page goes straight to
+the output file, so memory use depends on the page size, not the table
+size. Parquet files get one row group per `row_group_pages` pages.
+"""
+import csv
+import io
+import itertools
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.dao.pagination import DEFAULT_PAGE_SIZE
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.User_dao import UserDAO
+
+FORMATS = ("csv", "parquet")
+TABLES = ("users", "subscriptions", "payments")
+
+# Exported columns and their Parquet types; dates stay ISO strings as stored
+COLUMNS = {
+    "users": {"id": "int64", "name": "string", "email": "string"},
+    "subscriptions": {
+        "id": "int64", "user_id": "int64", "name": "string", "plan_type": "string", "cost": "float64",
+        "start_date": "string", "end_date": "string", "status": "string",
+    },
+    "payments": {
+        "id": "int64", "subscription_id": "int64", "amount": "float64", "payment_date": "string",
+        "method": "string", "status": "string",
+    },
+}
+DATE_COLUMNS = {"subscriptions": "start_date", "payments": "payment_date"}
+DEFAULT_ROW_GROUP_PAGES = 64
+
+
+@dataclass
+class ExportReport:
+    table: str
+    format: str
+    rows: int = 0
+    path: Optional[str] = None
+
+
+def format_for(path: str, fmt: Optional[str] = None) -> str:
+    """The explicit format, or the one implied by the file extension."""
+    if fmt:
+        return fmt
+    return "parquet" if path.lower().endswith(".parquet") else "csv"
+
+
+class ExportService:
+    def __init__(self):
+        self.user_dao = UserDAO()
+        self.subscription_dao = SubscriptionDAO()
+        self.payment_dao = PaymentsDAO()
+
+    # --- Reading ---
+    def _filters(self, table: str, user_id: Optional[int], status: Optional[str],
+                 since: Optional[str], until: Optional[str]) -> Optional[List[Tuple]]:
+        """Query filters for the options, or None if nothing can match."""
+        filters = []
+        if user_id is not None:
+            if table == "users":
+                filters.append(("eq", "id", user_id))
+            elif table == "subscriptions":
+                filters.append(("eq", "user_id", user_id))
+            else:
+                subs = self.subscription_dao.get_subscriptions_by_user(user_id, columns=["id"])
+                if not subs:
+                    return None
+                filters.append(("in_", "subscription_id", [s["id"] for s in subs]))
+        if status and table != "users":
+            filters.append(("eq", "status", status))
+        if (since or until) and table in DATE_COLUMNS:
+            column = DATE_COLUMNS[table]
+            if since:
+                filters.append(("gte", column, date.fromisoformat(since).isoformat()))
+            if until:
+                # Up to the end of that day, whether the column holds dates or timestamps
+                filters.append(("lt", column, (date.fromisoformat(until) + timedelta(days=1)).isoformat()))
+        return filters
+
+    def iter_rows(self, table: str, user_id: Optional[int] = None, status: Optional[str] = None,
+                  since: Optional[str] = None, until: Optional[str] = None,
+                  page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """Streams the matching rows of `table` in id order."""
+        if table not in TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        filters = self._filters(table, user_id, status, since, until)
+        if filters is None:
+            return iter(())
+        dao_iter = {
+            "users": self.user_dao.iter_users,
+            "subscriptions": self.subscription_dao.iter_subscriptions,
+            "payments": self.payment_dao.iter_payments,
+        }[table]
+        return dao_iter(columns=list(COLUMNS[table]), page_size=page_size, prefetch=True, filters=filters)
+
+    @staticmethod
+    def _pages(rows: Iterator[Dict], page_size: int) -> Iterator[List[Dict]]:
+        while True:
+            page = list(itertools.islice(rows, page_size))
+            if not page:
+                return
+            yield page
+
+    # --- Writing ---
+    def _write_csv(self, table: str, pages: Iterator[List[Dict]], text, report: ExportReport) -> None:
+        writer = csv.DictWriter(text, fieldnames=list(COLUMNS[table]), extrasaction="ignore")
+        writer.writeheader()
+        for page in pages:
+            writer.writerows(page)
+            report.rows += len(page)
+
+    def _write_parquet(self, table: str, pages: Iterator[List[Dict]], out, report: ExportReport,
+                       row_group_rows: int) -> None:
+        import pyarrow as pa  # only needed for Parquet exports
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in COLUMNS[table].items()])
+        with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+            # Pages are converted to Arrow right away; columnar batches are
+            # much smaller than the row dicts while a row group fills up
+            group, group_rows = [], 0
+            for page in pages:
+                group.append(pa.RecordBatch.from_pylist(page, schema=schema))
+                group_rows += len(page)
+                report.rows += len(page)
+                if group_rows >= row_group_rows:
+                    writer.write_table(pa.Table.from_batches(group, schema=schema))
+                    group, group_rows = [], 0
+            if group:
+                writer.write_table(pa.Table.from_batches(group, schema=schema))
+
+    def export(self, table: str, out, fmt: str = "csv", page_size: int = DEFAULT_PAGE_SIZE,
+               row_group_pages: int = DEFAULT_ROW_GROUP_PAGES, **filters) -> ExportReport:
+        """
+        Writes the matching rows of `table` to `out`, a path or a binary
+        file object. `filters` are iter_rows' user_id, status, since and
+        until (YYYY-MM-DD, inclusive).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+        if page_size < 1:
+            # Checked here: the row iterator is lazy and would never be asked for a page
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        report = ExportReport(table=table, format=fmt, path=out if isinstance(out, str) else None)
+        pages = self._pages(self.iter_rows(table, page_size=page_size, **filters), page_size)
+        if fmt == "parquet":
+            self._write_parquet(table, pages, out, report, row_group_pages * page_size)
+        elif isinstance(out, str):
+            with open(out, "w", newline="", encoding="utf-8") as f:
+                self._write_csv(table, pages, f, report)
+        else:
+            text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+            try:
+                self._write_csv(table, pages, text, report)
+                text.flush()
+            finally:
+                text.detach()  # leaves `out` open for the caller
+        return report
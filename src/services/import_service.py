@@ -0,0 +1,301 @@
+# src/services/import_service.py
+
+import csv
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.dao.User_dao import UserDAO
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.journal_dao import JournalDAO
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.resilience import is_transient
+from src.services.user_service import UserService
+
+DEFAULT_BATCH_SIZE = 500
+PLAN_TYPES = ("monthly", "yearly")
+PAYMENT_STATUSES = ("Completed", "Pending", "Failed")
+
+
+class RowError(ValueError):
+    """A source row that cannot be imported."""
+
+
+@dataclass
+class ImportReport:
+    table: str
+    inserted: int = 0
+    resumed_from: int = 0
+    rows_read: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (row number, message)
+
+
+def _required(row: Dict, column: str) -> str:
+    value = row.get(column)
+    value = "" if value is None else str(value).strip()
+    if not value:
+        raise RowError(f"'{column}' is required")
+    return value
+
+
+def _as_int(row: Dict, column: str) -> int:
+    value = _required(row, column)
+    try:
+        return int(float(value))
+    except ValueError:
+        raise RowError(f"'{column}' must be an integer, got '{value}'")
+
+
+def _as_amount(row: Dict, column: str) -> float:
+    value = _required(row, column)
+    try:
+        amount = float(value)
+    except ValueError:
+        raise RowError(f"'{column}' must be a number, got '{value}'")
+    if amount < 0:
+        raise RowError(f"'{column}' cannot be negative")
+    return amount
+
+
+def _as_date(row: Dict, column: str) -> str:
+    value = _required(row, column)
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        raise RowError(f"'{column}' must be a date in YYYY-MM-DD format, got '{value}'")
+
+
+class ImportService:
+    """
+    Bulk-loads users, subscriptions or payments from CSV or Parquet files.
+
+    Files are read as a stream, every row is validated, valid rows are
+    inserted in batches and invalid ones are reported with their row
+    number. Progress is checkpointed after each batch next to the source
+    file, so an interrupted import resumes where it stopped.
+
+    Rows are written through apply_journal_entries (sql/journal.sql) with
+    one idempotency key per source row, so the batch a resume sends again
+    (its response may have been lost) does not insert any row twice.
+    Transient errors (resilience.is_transient) stop the import and keep
+    the checkpoint; they are never reported as rejected rows.
+    """
+    TABLES = ("users", "subscriptions", "payments")
+
+    def __init__(self):
+        self.user_dao = UserDAO()
+        self.subscription_dao = SubscriptionDAO()
+        self.payment_dao = PaymentsDAO()
+        self.journal_dao = JournalDAO()
+        self.user_service = UserService()
+
+    # --- Reading ---
+    def _read_rows(self, path: str) -> Iterator[Dict]:
+        if path.lower().endswith(".parquet"):
+            import pyarrow.parquet as pq  # only needed for Parquet imports
+
+            for batch in pq.ParquetFile(path).iter_batches():
+                yield from batch.to_pylist()
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                yield from csv.DictReader(f)
+
+    # --- Validation ---
+    def _validate_user(self, row: Dict) -> Dict:
+        name = _required(row, "name")
+        email = _required(row, "email")
+        if not self.user_service.is_valid_email(email):
+            raise RowError(f"invalid email '{email}'")
+        return {"name": name, "email": email}
+
+    def _validate_subscription(self, row: Dict) -> Dict:
+        plan_type = _required(row, "plan_type").lower()
+        if plan_type not in PLAN_TYPES:
+            raise RowError(f"plan_type must be monthly or yearly, got '{plan_type}'")
+        start_date = _as_date(row, "start_date")
+        end_date = _as_date(row, "end_date")
+        if end_date < start_date:
+            raise RowError("end_date is before start_date")
+        return {
+            "user_id": _as_int(row, "user_id"),
+            "name": _required(row, "name"),
+            "plan_type": plan_type,
+            "cost": _as_amount(row, "cost"),
+            "start_date": start_date,
+            "end_date": end_date,
+            "status": (row.get("status") or "Active").strip() or "Active",
+        }
+
+    def _validate_payment(self, row: Dict) -> Dict:
+        status = _required(row, "status").capitalize()
+        if status not in PAYMENT_STATUSES:
+            raise RowError(f"status must be Completed, Pending or Failed, got '{status}'")
+        payment_date = None  # the time of the insert
+        if str(row.get("payment_date") or "").strip():
+            value = str(row["payment_date"]).strip()
+            try:
+                payment_date = datetime.fromisoformat(value).isoformat()
+            except ValueError:
+                raise RowError(f"'payment_date' must be an ISO date or timestamp, got '{value}'")
+        return {
+            "subscription_id": _as_int(row, "subscription_id"),
+            "amount": _as_amount(row, "amount"),
+            "payment_date": payment_date,
+            "method": _required(row, "method"),
+            "status": status,
+        }
+
+    def _handlers(self, table: str):
+        """(validator, journal op) for `table`."""
+        return {
+            "users": (self._validate_user, "create_user"),
+            "subscriptions": (self._validate_subscription, "add_subscription"),
+            "payments": (self._validate_payment, "insert_payment"),
+        }[table]
+
+    # --- Checkpoints ---
+    @staticmethod
+    def checkpoint_path(path: str) -> str:
+        return path + ".import-checkpoint.json"
+
+    def _load_checkpoint(self, path: str, table: str) -> Dict:
+        try:
+            with open(self.checkpoint_path(path)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get("table") == table and state.get("run_id") else {}
+
+    def _save_checkpoint(self, path: str, table: str, run_id: str, rows_done: int, report: ImportReport) -> None:
+        tmp = self.checkpoint_path(path) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"table": table, "run_id": run_id, "rows_done": rows_done, "inserted": report.inserted}, f)
+        os.replace(tmp, self.checkpoint_path(path))
+
+    # --- Import ---
+    def validate_row(self, table: str, row: Dict) -> Dict:
+        """Validates one source row for `table` and returns its insert payload (raises RowError)."""
+        return self._handlers(table)[0](row)
+
+    def insert_batch(self, table: str, batch: List[Tuple[int, Dict]], report: ImportReport,
+                     key_prefix: Optional[str] = None) -> Dict[int, Dict]:
+        """
+        Inserts validated (row number, payload) pairs in one request and
+        returns the created rows keyed by row number. Rows the database
+        rejects are added to report.errors. Each row's idempotency key is
+        `key_prefix` plus its row number, so sending the same batch again
+        with the same prefix inserts nothing twice.
+        """
+        if not batch:
+            return {}
+        op = self._handlers(table)[1]
+        key_prefix = key_prefix or f"import:{table}:{uuid.uuid4()}"
+        entries = {row_number: {"key": f"{key_prefix}:{row_number}", "op": op, "payload": payload}
+                   for row_number, payload in batch}
+        try:
+            results = self.journal_dao.apply_entries(list(entries.values()))
+        except Exception as e:
+            if is_transient(e):
+                raise
+            # The call failed as a whole: retry row by row so only the
+            # offending rows are reported
+            results = {}
+            for row_number, entry in entries.items():
+                try:
+                    results.update(self.journal_dao.apply_entries([entry]))
+                except Exception as row_error:
+                    if is_transient(row_error):
+                        raise
+                    report.errors.append((row_number, f"insert failed: {row_error}"))
+
+        created_rows = {}
+        for row_number, entry in entries.items():
+            result = results.get(entry["key"])
+            if result is None:
+                continue  # already reported by the row-by-row retry
+            if result["status"] in ("applied", "duplicate"):
+                # duplicate: inserted by an interrupted run whose checkpoint was not saved
+                report.inserted += 1
+                created_rows[row_number] = dict(entry["payload"], id=result["row_id"])
+            elif result["status"] == "conflict":
+                report.errors.append((row_number, f"insert failed: email '{entry['payload']['email']}' already exists"))
+            else:
+                report.errors.append((row_number, "insert failed: rejected by the database "
+                                                  "(unknown user or subscription, or an invalid value)"))
+        return created_rows
+
+    def import_file(self, path: str, table: str, batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = True) -> ImportReport:
+        """
+        Imports `path` into `table` and returns a report. Row numbers in
+        the report count data rows from 1 (the CSV header is not counted).
+        """
+        if table not in self.TABLES:
+            raise ValueError(f"Unknown table '{table}'. Expected one of: {', '.join(self.TABLES)}")
+
+        validate = self._handlers(table)[0]
+        report = ImportReport(table=table)
+        state = self._load_checkpoint(path, table) if resume else {}
+        skip = state.get("rows_done", 0)
+        report.resumed_from = skip
+        # Row keys are "import:<run id>:<row number>"; a resume keeps the run id
+        run_id = state.get("run_id") or str(uuid.uuid4())
+        key_prefix = f"import:{run_id}"
+        self._save_checkpoint(path, table, run_id, skip, report)
+
+        batch: List[Tuple[int, Dict]] = []
+        row_number = 0
+        for row_number, row in enumerate(self._read_rows(path), 1):
+            if row_number <= skip:
+                continue
+            report.rows_read += 1
+            try:
+                batch.append((row_number, validate(row)))
+            except RowError as e:
+                report.errors.append((row_number, str(e)))
+
+            if len(batch) >= batch_size:
+                self.insert_batch(table, batch, report, key_prefix)
+                batch = []
+                self._save_checkpoint(path, table, run_id, row_number, report)
+
+        self.insert_batch(table, batch, report, key_prefix)
+
+        if os.path.exists(self.checkpoint_path(path)):
+            os.remove(self.checkpoint_path(path))
+        return report
+
+    def run_import(self):
+        path = input("Enter the path of the CSV or Parquet file: ").strip()
+        if not os.path.isfile(path):
+            print(f"File '{path}' not found.")
+            return
+
+        table = input("Import into which table (users/subscriptions/payments)? ").strip().lower()
+        if table not in self.TABLES:
+            print("Invalid table.")
+            return
+
+        batch_input = input(f"Batch size [{DEFAULT_BATCH_SIZE}]: ").strip()
+        if batch_input and not batch_input.isdigit():
+            print("Invalid batch size.")
+            return
+        batch_size = int(batch_input) if batch_input else DEFAULT_BATCH_SIZE
+
+        if os.path.exists(self.checkpoint_path(path)):
+            print("Resuming the previous, interrupted import of this file.")
+
+        report = self.import_file(path, table, batch_size=batch_size)
+
+        print(f"\n✅ Imported {report.inserted} {table} from {report.rows_read} rows.")
+        if report.resumed_from:
+            print(f"Skipped the first {report.resumed_from} rows imported by the previous run.")
+        if report.errors:
+            print(f"⚠️ {len(report.errors)} rows were rejected:")
+            print(f"{'Row':<8} {'Error'}")
+            print("-" * 70)
+            for row_number, message in report.errors:
+                print(f"{row_number:<8} {message}")
+            print("-" * 70)
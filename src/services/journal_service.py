@@ -0,0 +1,330 @@
+# src/services/journal_service.py
+"""
+Local write-ahead journal for user, subscription and payment inserts.
+
+With the journal enabled, create_user, add_subscription and
+insert_payment are appended to a local SQLite file (synchronous commit,
+so an acknowledged write survives a crash) and return at once with the
+entry's idempotency key. A background replicator replays the entries to
+the database in order, many per call, through apply_journal_entries
+(sql/journal.sql), which applies each key at most once, so a replay
+whose response was lost is safe to repeat.
+
+- A write may refer to an earlier journaled user or subscription by its
+  key (user_key / subscription_key); the id is filled in on replay.
+- Conflicts: a user whose email already exists is recorded as "conflict"
+  and resolves to the existing user, so writes that refer to it still
+  apply. Writes the database refuses (unknown user or subscription,
+  missing values) are recorded as "rejected" and skipped. So is an
+  entry whose replay keeps failing with an error that is not transient
+  (after `max_attempts` tries), so it cannot hold back later writes.
+- While the database cannot be reached the replicator backs off
+  (doubling up to `max_backoff` seconds) and keeps the entries pending.
+
+Enable it with JOURNAL_ENABLED=true (or a [journal] section in
+secrets.toml); JOURNAL_PATH sets the file and JOURNAL_INTERVAL how often
+the replicator checks for entries when nothing wakes it.
+"""
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from src.config import get_settings
+from src.dao.journal_dao import JournalDAO
+from src.dao.resilience import is_transient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = "journal.db"
+DEFAULT_INTERVAL = 5.0  # seconds
+DEFAULT_MAX_BACKOFF = 60.0  # seconds
+DEFAULT_REPLAY_BATCH = 100
+DEFAULT_MAX_ATTEMPTS = 3  # before an entry failing with a non-transient error is rejected
+
+# Payload field holding another entry's key -> the id column it fills in
+REFERENCES = {"user_key": "user_id", "subscription_key": "subscription_id"}
+
+_SCHEMA = """
+create table if not exists journal (
+    seq integer primary key autoincrement,
+    key text not null unique,
+    op text not null,
+    payload text not null,
+    status text not null default 'pending',
+    attempts integer not null default 0,
+    created_at real not null,
+    applied_at real,
+    row_id integer,
+    error text
+);
+create index if not exists idx_journal_status on journal (status, seq);
+"""
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class WriteJournal:
+    """Append-only log of pending writes in a SQLite file."""
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("pragma journal_mode = wal")
+        # Every append is on disk before it is acknowledged
+        self._conn.execute("pragma synchronous = full")
+        self._conn.executescript(_SCHEMA)
+
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _entry(row: Dict) -> Dict:
+        return dict(row, payload=json.loads(row["payload"]))
+
+    def append(self, op: str, payload: Dict) -> Dict:
+        key = str(uuid.uuid4())
+        rows = self._query(
+            "insert into journal (key, op, payload, created_at) values (?, ?, ?, ?) returning *",
+            (key, op, json.dumps(payload, default=str), time.time()),
+        )
+        return self._entry(rows[0])
+
+    def get(self, key: str) -> Optional[Dict]:
+        rows = self._query("select * from journal where key = ?", (key,))
+        return self._entry(rows[0]) if rows else None
+
+    def pending(self, limit: int = DEFAULT_REPLAY_BATCH) -> List[Dict]:
+        rows = self._query("select * from journal where status = 'pending' order by seq limit ?", (limit,))
+        return [self._entry(row) for row in rows]
+
+    def entries(self, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """The latest entries, optionally only those with `status`."""
+        where = "where status = ?" if status else ""
+        rows = self._query(f"select * from journal {where} order by seq desc limit ?",
+                           (status, limit) if status else (limit,))
+        return [self._entry(row) for row in rows]
+
+    def record(self, seq: int, status: str, row_id: Optional[int] = None, error: Optional[str] = None) -> None:
+        self._query(
+            "update journal set status = ?, row_id = ?, error = ?, applied_at = ?, attempts = attempts + 1 where seq = ?",
+            (status, row_id, error, time.time(), seq),
+        )
+
+    def record_failure(self, seq: int, error: str) -> None:
+        """A replay attempt that did not reach a verdict; the entry stays pending."""
+        self._query("update journal set attempts = attempts + 1, error = ? where seq = ?", (error, seq))
+
+    def metrics(self) -> Dict:
+        row = self._query(
+            "select count(*) filter (where status = 'pending') as pending, "
+            "min(created_at) filter (where status = 'pending') as oldest_pending, "
+            "count(*) filter (where status in ('applied', 'duplicate')) as applied, "
+            "count(*) filter (where status = 'conflict') as conflicts, "
+            "count(*) filter (where status = 'rejected') as rejected, "
+            "max(applied_at) as last_applied_at from journal"
+        )[0]
+        oldest = row.pop("oldest_pending")
+        # Lag: how long the oldest unreplicated write has been waiting
+        row["lag_seconds"] = round(time.time() - oldest, 3) if oldest else 0.0
+        return row
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JournalService:
+    """Acknowledges writes from the journal and replays them in the background."""
+
+    def __init__(self, journal: WriteJournal, journal_dao: Optional[JournalDAO] = None,
+                 interval: float = DEFAULT_INTERVAL, max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.journal = journal
+        self.journal_dao = journal_dao or JournalDAO()
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.last_error: Optional[str] = None
+        self.retry_in = 0.0
+        self._replay_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls) -> Optional["JournalService"]:
+        """Builds the journal from the [journal] settings, or None if it is disabled."""
+        settings = get_settings("journal")
+        if not _truthy(settings.get("enabled", False)):
+            return None
+        journal = WriteJournal(settings.get("path", DEFAULT_JOURNAL_PATH))
+        return cls(journal, interval=float(settings.get("interval", DEFAULT_INTERVAL)))
+
+    # --- Writes ---
+    def _append(self, op: str, payload: Dict) -> Dict:
+        entry = self.journal.append(op, payload)
+        self._wake.set()
+        return {"journal_key": entry["key"], "seq": entry["seq"], "status": entry["status"]}
+
+    def create_user(self, name: str, email: str) -> Dict:
+        return self._append("create_user", {"name": name, "email": email})
+
+    def add_subscription(self, user_id: Optional[int], name: str, plan_type: str, cost: float, start_date: str,
+                         end_date: str, status: str = "Active", user_key: Optional[str] = None) -> Dict:
+        """`user_key` instead of `user_id` refers to a user created through the journal."""
+        payload = {"user_id": user_id, "name": name, "plan_type": plan_type, "cost": cost,
+                   "start_date": start_date, "end_date": end_date, "status": status}
+        if user_key:
+            payload["user_key"] = user_key
+        return self._append("add_subscription", payload)
+
+    def insert_payment(self, subscription_id: Optional[int], amount: float, method: str, status: str,
+                       payment_date: Optional[str] = None, subscription_key: Optional[str] = None) -> Dict:
+        """`subscription_key` instead of `subscription_id` refers to a journaled subscription."""
+        payload = {"subscription_id": subscription_id, "amount": amount, "method": method, "status": status,
+                   "payment_date": payment_date}
+        if subscription_key:
+            payload["subscription_key"] = subscription_key
+        return self._append("insert_payment", payload)
+
+    def status(self, key: str) -> Optional[Dict]:
+        return self.journal.get(key)
+
+    # --- Replay ---
+    def _resolve(self, entry: Dict) -> Optional[str]:
+        """Fills in ids of referenced entries; returns why it cannot, if so."""
+        payload = entry["payload"]
+        for ref, column in REFERENCES.items():
+            if not payload.get(ref):
+                continue
+            target = self.journal.get(payload[ref])
+            if target is None:
+                return f"unknown {ref} {payload[ref]}"
+            if target["row_id"] is None:
+                return f"{ref} {payload[ref]} was {target['status']}"
+            payload[column] = target["row_id"]
+        return None
+
+    @staticmethod
+    def _count(counts: Dict[str, int], status: str) -> None:
+        counts[status] = counts.get(status, 0) + 1
+
+    def _record(self, entry: Dict, result: Dict, counts: Dict[str, int]) -> None:
+        error = {"conflict": "email already exists", "rejected": "refused by the database"}.get(result["status"])
+        self.journal.record(entry["seq"], result["status"], result["row_id"], error)
+        self._count(counts, result["status"])
+
+    def _apply_one(self, entry: Dict, payload: Dict, counts: Dict[str, int]) -> None:
+        try:
+            result = self.journal_dao.apply_entry(entry["key"], entry["op"], payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if is_transient(e) or entry["attempts"] + 1 < self.max_attempts:
+                self.journal.record_failure(entry["seq"], error)
+                raise
+            logger.warning("Rejecting journal entry %s after %d attempts: %s", entry["key"], entry["attempts"] + 1, e)
+            self.journal.record(entry["seq"], "rejected", error=error)
+            self._count(counts, "rejected")
+            return
+        self._record(entry, result, counts)
+
+    def _apply_chunk(self, chunk: List[tuple], counts: Dict[str, int]) -> None:
+        """Sends (entry, payload) pairs in one apply_entries call and records the results in order."""
+        if len(chunk) == 1:
+            self._apply_one(*chunk[0], counts)
+            return
+        try:
+            results = self.journal_dao.apply_entries(
+                [{"key": entry["key"], "op": entry["op"], "payload": payload} for entry, payload in chunk])
+        except Exception as e:
+            if is_transient(e):
+                self.journal.record_failure(chunk[0][0]["seq"], f"{type(e).__name__}: {e}")
+                raise
+            # Which entry the database refused is unknown: send them one at a time
+            for entry, payload in chunk:
+                self._apply_one(entry, payload, counts)
+            return
+        for entry, _ in chunk:
+            result = results.get(entry["key"])
+            if result is None:
+                # This entry and the ones after it stay pending, so none overtakes it
+                error = f"no result for journal entry {entry['key']}"
+                self.journal.record_failure(entry["seq"], error)
+                raise RuntimeError(error)
+            self._record(entry, result, counts)
+
+    def replay(self) -> Dict[str, int]:
+        """
+        Replays pending entries in order until none are left, sending runs
+        of them in one apply_entries call; a run ends before an entry that
+        refers to one in it, whose id is not known yet. Stops at the first
+        entry that cannot be sent (the error is re-raised), so later entries
+        never overtake it, unless the error is not transient and the entry
+        has had `max_attempts` tries: then it is rejected.
+        """
+        counts: Dict[str, int] = {}
+        with self._replay_lock:
+            while True:
+                batch = self.journal.pending()
+                if not batch:
+                    return counts
+                chunk: List[tuple] = []
+                for entry in batch:
+                    if chunk and any(entry["payload"].get(ref) in {e["key"] for e, _ in chunk} for ref in REFERENCES):
+                        self._apply_chunk(chunk, counts)
+                        chunk = []
+                    problem = self._resolve(entry)
+                    if problem:
+                        self.journal.record(entry["seq"], "rejected", error=problem)
+                        self._count(counts, "rejected")
+                        continue
+                    chunk.append((entry, {k: v for k, v in entry["payload"].items() if k not in REFERENCES}))
+                if chunk:
+                    self._apply_chunk(chunk, counts)
+
+    def _run(self) -> None:
+        delay = 0.0
+        while not self._stopping.is_set():
+            self._wake.wait(delay or self.interval)
+            self._wake.clear()
+            try:
+                self.replay()
+                self.last_error, delay = None, 0.0
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                delay = min(self.max_backoff, max(1.0, delay * 2)) * random.uniform(0.8, 1.0)
+                logger.warning("Journal replay failed, retrying in %.1fs: %s", delay, e)
+            self.retry_in = delay
+
+    def start(self) -> "JournalService":
+        """Starts the background replicator (once)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="journal-replicator", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict:
+        """Journal counts and lag, plus the replicator's state."""
+        return dict(
+            self.journal.metrics(),
+            replicator_running=bool(self._thread and self._thread.is_alive()),
+            last_error=self.last_error,
+            retry_in=round(self.retry_in, 1),
+        )
@@ -2,6 +2,7 @@ from src.dao.Subscription_dao import SubscriptionDAO
 from src.dao.default_subscription_dao import DefaultSubscriptionDAO
 from src.dao.User_dao import UserDAO
 from src.dao.payment_dao import PaymentsDAO
+from src.dao.aggregate_dao import AggregateDAO
 
 class PaymentService:
     def __init__(self):
@@ -9,6 +10,7 @@ class PaymentService:
         self.default_dao = DefaultSubscriptionDAO()
         self.user_dao = UserDAO()
         self.payment_dao = PaymentsDAO()
+        self.aggregate_dao = AggregateDAO()
 
     def add_payment_for_subscription(self):
         try:
@@ -18,11 +20,6 @@ class PaymentService:
                 return
             subscription_id = int(subscription_id)
 
-            subscription = self.subscription_dao.get_subscription_by_id(subscription_id)
-            if not subscription:
-                print(f"No subscription found with ID {subscription_id}.")
-                return
-
             amount_input = input("Enter Payment Amount: ").strip()
             try:
                 amount = float(amount_input)
@@ -36,11 +33,12 @@ class PaymentService:
                 print("Invalid status. Must be Completed, Pending, or Failed.")
                 return
 
-            result = self.payment_dao.insert_payment(subscription_id, amount, method, status)
+            # The subscription is checked in the same request as the insert
+            result = self.payment_dao.insert_payment_checked(subscription_id, amount, method, status)
             if result:
                 print(f"✅ Payment of {amount} added for Subscription ID {subscription_id}.")
             else:
-                print("⚠️ Failed to add payment.")
+                print(f"No subscription found with ID {subscription_id}.")
 
         except Exception as e:
             print(f"Error adding payment: {e}")
@@ -0,0 +1,235 @@
+# src/services/payment_writer.py
+"""
+Buffered background writer for high-volume payment ingestion.
+
+`PaymentWriter.submit()` queues a payment and returns a Future at once.
+A background thread collects queued payments and writes them with one
+call (JournalDAO.apply_entries, see sql/journal.sql) when `batch_size`
+rows are waiting or `flush_interval` seconds after the first one arrived,
+so a backlog costs one round trip per batch instead of one per payment.
+Every payment carries its own idempotency key, so a batch can be sent
+again without writing any payment twice.
+
+- Backpressure: at most `max_pending` payments wait in the queue; submit()
+  blocks (or raises WriterFull after `timeout`) until the writer catches up.
+- Retries: transient errors (connection errors, timeouts, 429/5xx) are
+  retried with exponential backoff, including ones where the batch may
+  already have been written; after `max_retries` the batch's futures fail
+  with the last error.
+- Per-row status: each future gets its own row, or PaymentRejected for a
+  payment the database refused (e.g. an unknown subscription_id), or
+  PaymentUnconfirmed if the response did not mention it.
+- Shutdown: close() (also run at interpreter exit, or by leaving a `with`
+  block) stops accepting payments and writes everything already queued.
+"""
+import atexit
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.dao.journal_dao import JournalDAO
+from src.dao.resilience import is_transient
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.2  # seconds
+DEFAULT_MAX_PENDING = 10_000
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds, doubled on each retry
+
+_FLUSH = object()  # queue marker: write what is buffered now
+
+
+class WriterFull(RuntimeError):
+    """submit() timed out waiting for room in the queue."""
+
+
+class WriterClosed(RuntimeError):
+    """submit() was called after close()."""
+
+
+class PaymentRejected(ValueError):
+    """The database refused the payment (unknown subscription or invalid values)."""
+
+
+class PaymentUnconfirmed(RuntimeError):
+    """The batch was sent but its response did not report this payment."""
+
+
+class PaymentWriter:
+    def __init__(self, journal_dao: Optional[JournalDAO] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_pending: int = DEFAULT_MAX_PENDING,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF):
+        self.journal_dao = journal_dao or JournalDAO()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {"written": 0, "failed": 0, "batches": 0, "retries": 0}  # updated by the writer thread
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="payment-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> "PaymentWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Producer side ---
+    def submit(self, subscription_id: int, amount: float, method: str, status: str,
+               payment_date: Optional[str] = None, timeout: Optional[float] = None) -> Future:
+        """
+        Queues a payment and returns a Future for the created row. The
+        payment date defaults to the time of submission, not of the write.
+        Blocks while `max_pending` payments are waiting.
+        """
+        if self._closed:
+            raise WriterClosed("The payment writer is closed")
+        entry = {
+            "key": f"payment:{uuid.uuid4()}",
+            "op": "insert_payment",
+            "payload": {
+                "subscription_id": subscription_id,
+                "amount": amount,
+                "payment_date": payment_date or datetime.now(timezone.utc).isoformat(),
+                "method": method,
+                "status": status,
+            },
+        }
+        future: Future = Future()
+        try:
+            self._queue.put((entry, future), timeout=timeout)
+        except queue.Full:
+            raise WriterFull(f"No room in the payment queue after {timeout}s")
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Writes everything submitted so far; False if that took longer than `timeout`."""
+        if self._closed:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        done: Future = Future()
+        self._queue.put((_FLUSH, done))
+        try:
+            done.result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stops accepting payments and waits until the queued ones are written."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    # --- Writer thread ---
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._reject_late()
+                return
+            batch: List[Tuple[Dict, Future]] = []
+            flushes: List[Future] = []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # Collect until the batch is full, the interval is over or a flush is asked for
+            while True:
+                if item is None:
+                    stop = True
+                elif item[0] is _FLUSH:
+                    flushes.append(item[1])
+                else:
+                    batch.append(item)
+                if stop or flushes or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for done in flushes:
+                done.set_result(None)
+            if stop:
+                self._reject_late()
+                return
+
+    def _reject_late(self) -> None:
+        # Payments that raced close() into the queue behind the stop marker
+        while True:
+            try:
+                entry, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is _FLUSH:
+                future.set_result(None)
+            else:
+                self._fail(future, WriterClosed("The payment writer was closed before this payment was written"))
+
+    def _apply(self, entries: List[Dict]) -> Dict[str, Dict]:
+        """One call for the batch, retried with backoff on transient errors (safe: every row has a key)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.journal_dao.apply_entries(entries)
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                # Jitter keeps several writers from retrying in lockstep
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+
+    def _write(self, batch: List[Tuple[Dict, Future]]) -> None:
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        try:
+            results = self._apply([entry for entry, _ in batch])
+        except Exception as e:
+            if is_transient(e) or len(batch) == 1:
+                for _, future in batch:
+                    self._fail(future, e)
+                return
+            # The call failed as a whole: retry row by row so only the
+            # offending rows fail
+            for entry, future in batch:
+                try:
+                    self._settle(entry, future, self._apply([entry]))
+                except Exception as row_error:
+                    self._fail(future, row_error)
+            return
+        for entry, future in batch:
+            self._settle(entry, future, results)
+
+    def _settle(self, entry: Dict, future: Future, results: Dict[str, Dict]) -> None:
+        result = results.get(entry["key"])
+        if result is None:
+            # Never resolve without a row: the caller could not tell it from a write
+            self._fail(future, PaymentUnconfirmed(f"No result for payment {entry['key']}; it may not have been written"))
+        elif result["status"] in ("applied", "duplicate"):
+            self._resolve(future, dict(entry["payload"], id=result["row_id"]))
+        else:
+            payload = entry["payload"]
+            self._fail(future, PaymentRejected(
+                f"Payment for subscription {payload['subscription_id']} was refused "
+                "(unknown subscription or invalid values)"
+            ))
+
+    def _resolve(self, future: Future, row: Dict) -> None:
+        self.stats["written"] += 1
+        future.set_result(row)
+
+    def _fail(self, future: Future, error: Exception) -> None:
+        self.stats["failed"] += 1
+        future.set_exception(error)
@@ -0,0 +1,187 @@
+"""
+Renewal and expiry index over subscriptions.
+
+Subscriptions are kept in two sorted lists, one keyed on the next renewal
+date (derived from start_date and plan_type, as in billing_service) of
+the active ones and one on the end_date of all of them, whatever their
+status (most expired subscriptions are already marked Expired or
+Cancelled), so "due in the next N days" and "expired since X" are a
+binary search plus the matching rows instead of a scan of every
+subscription. Renewal keys that fall into the past are rolled forward
+lazily, the next time a query reaches them.
+
+The index is built once from the table and then follows
+SubscriptionDAO.add_subscription(s) through write listeners
+(src/dao/events.py). Writes made by other processes are picked up when
+the index is rebuilt, every `max_age` seconds.
+"""
+import bisect
+import calendar
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.dao.events import on_write, remove_listener
+from src.dao.Subscription_dao import SubscriptionDAO
+
+PLAN_MONTHS = {"monthly": 1, "yearly": 12}
+COLUMNS = ["id", "user_id", "name", "plan_type", "cost", "start_date", "end_date", "status"]
+DEFAULT_MAX_AGE = 300  # seconds, same as the query cache TTL
+
+
+def _parse(value) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _is_active(sub: Dict) -> bool:
+    return str(sub.get("status") or "Active").lower() == "active"
+
+
+def _add_months(day: date, start_day: int, months: int) -> date:
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(start_day, calendar.monthrange(year, month)[1]))
+
+
+def next_renewal(start: date, plan_type: str, end: Optional[date], today: date) -> Optional[date]:
+    """First billing date on or after `today`, or None once the plan has ended."""
+    step = PLAN_MONTHS.get(str(plan_type).lower())
+    if step is None:
+        return None
+    if start >= today:
+        due = start
+    else:
+        months = (today.year - start.year) * 12 + today.month - start.month
+        due = _add_months(start, start.day, months - months % step)
+        if due < today:
+            due = _add_months(start, start.day, months - months % step + step)
+    return due if end is None or due <= end else None
+
+
+class RenewalIndex:
+    """Sorted (date ordinal, subscription id) keys with O(log n) range queries."""
+
+    def __init__(self):
+        self._renewals: List[Tuple[int, int]] = []
+        self._expiries: List[Tuple[int, int]] = []
+        self._subs: Dict[int, Dict] = {}
+        self._keys: Dict[int, Tuple[Optional[Tuple], Optional[Tuple]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def add(self, sub: Dict, today: Optional[date] = None) -> None:
+        """Adds or replaces a subscription; only active ones get a renewal date, undated ones are left out."""
+        today = today or date.today()
+        with self._lock:
+            self.remove(sub["id"])
+            start, end = _parse(sub.get("start_date")), _parse(sub.get("end_date"))
+            if start is None:
+                return
+            renewal = next_renewal(start, sub.get("plan_type"), end, today) if _is_active(sub) else None
+            renewal_key = (renewal.toordinal(), sub["id"]) if renewal else None
+            expiry_key = (end.toordinal(), sub["id"]) if end else None
+            if renewal_key:
+                bisect.insort(self._renewals, renewal_key)
+            if expiry_key:
+                bisect.insort(self._expiries, expiry_key)
+            self._subs[sub["id"]] = dict(sub, next_renewal=renewal.isoformat() if renewal else None)
+            self._keys[sub["id"]] = (renewal_key, expiry_key)
+
+    def remove(self, subscription_id: int) -> None:
+        with self._lock:
+            keys = self._keys.pop(subscription_id, None)
+            self._subs.pop(subscription_id, None)
+            if not keys:
+                return
+            for sorted_keys, key in zip((self._renewals, self._expiries), keys):
+                if key:
+                    i = bisect.bisect_left(sorted_keys, key)
+                    if i < len(sorted_keys) and sorted_keys[i] == key:
+                        del sorted_keys[i]
+
+    def _roll_forward(self, today: date) -> None:
+        # Renewals that are now in the past move on to their next cycle
+        cut = bisect.bisect_left(self._renewals, (today.toordinal(),))
+        for _, subscription_id in self._renewals[:cut]:
+            self.add(self._subs[subscription_id], today)
+
+    def due_within(self, days: int, today: Optional[date] = None) -> List[Dict]:
+        """Subscriptions renewing between today and today + days, soonest first."""
+        today = today or date.today()
+        with self._lock:
+            self._roll_forward(today)
+            lo = bisect.bisect_left(self._renewals, (today.toordinal(),))
+            hi = bisect.bisect_left(self._renewals, ((today + timedelta(days=days)).toordinal() + 1,))
+            return [self._subs[subscription_id] for _, subscription_id in self._renewals[lo:hi]]
+
+    def expiring_within(self, days: int, today: Optional[date] = None) -> List[Dict]:
+        """Active subscriptions whose end_date is between today and today + days."""
+        today = today or date.today()
+        return self._expiries_between(today, today + timedelta(days=days), active_only=True)
+
+    def expired_since(self, since: date, today: Optional[date] = None) -> List[Dict]:
+        """Subscriptions of any status whose end_date is on or after `since` and before today."""
+        today = today or date.today()
+        return self._expiries_between(since, today - timedelta(days=1))
+
+    def _expiries_between(self, first: date, last: date, active_only: bool = False) -> List[Dict]:
+        with self._lock:
+            lo = bisect.bisect_left(self._expiries, (first.toordinal(),))
+            hi = bisect.bisect_left(self._expiries, (last.toordinal() + 1,))
+            subs = (self._subs[subscription_id] for _, subscription_id in self._expiries[lo:hi])
+            return [sub for sub in subs if _is_active(sub)] if active_only else list(subs)
+
+
+class RenewalService:
+    """Builds the index from the subscriptions table and keeps it up to date."""
+
+    def __init__(self, subscription_dao: Optional[SubscriptionDAO] = None, max_age: float = DEFAULT_MAX_AGE):
+        self.subscription_dao = subscription_dao or SubscriptionDAO()
+        self.max_age = max_age
+        self.index: Optional[RenewalIndex] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        on_write("subscriptions", self._on_write)
+
+    def close(self) -> None:
+        remove_listener("subscriptions", self._on_write)
+
+    def _on_write(self, action: str, rows: List[Dict]) -> None:
+        index = self.index
+        if index is None:
+            return
+        for row in rows:
+            if action == "delete":
+                index.remove(row["id"])
+            else:
+                index.add(row)
+
+    def get_index(self) -> RenewalIndex:
+        """The current index, rebuilt from the table when it is older than max_age."""
+        with self._lock:
+            if self.index is None or time.monotonic() - self._built_at > self.max_age:
+                index = RenewalIndex()
+                today = date.today()
+                for sub in self.subscription_dao.iter_subscriptions(columns=COLUMNS):
+                    index.add(sub, today)
+                self.index, self._built_at = index, time.monotonic()
+            return self.index
+
+    def due_within(self, days: int) -> List[Dict]:
+        return self.get_index().due_within(days)
+
+    def expiring_within(self, days: int) -> List[Dict]:
+        return self.get_index().expiring_within(days)
+
+    def expired_since(self, since: date) -> List[Dict]:
+        return self.get_index().expired_since(since)
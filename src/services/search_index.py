@@ -0,0 +1,111 @@
+# src/services/search_index.py
+"""
+In-memory type-ahead search over users or subscriptions, keyed by id.
+
+Every word of the searchable fields (names, emails) goes into a sorted
+token list for prefix lookups, and every three-letter run of the text
+into a trigram -> positions map for matches inside words. A query word
+shorter than three letters is a binary search over the tokens; a longer
+one intersects the posting lists of its trigrams and checks the few
+survivors, so a lookup touches only the matching entries. The index is
+built once per data refresh and never modified afterwards.
+"""
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+DEFAULT_LIMIT = 20
+_WORD = re.compile(r"[^\W_]+")
+_NONE = np.zeros(0, dtype=np.int32)
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Prefix and trigram index over the `fields` of each entry."""
+
+    def __init__(self, ids: Sequence[int], labels: Sequence[str], fields: Iterable[Sequence[str]]):
+        self._ids: List[int] = [int(i) for i in ids]
+        self._labels: Dict[int, str] = dict(zip(self._ids, labels))
+        self._text: List[str] = []
+        tokens = []
+        postings: Dict[str, List[int]] = {}
+        for pos, values in enumerate(fields):
+            text = "\t".join(str(v).lower() for v in values if v is not None)
+            self._text.append(text)
+            words = set(_WORD.findall(text)) | {w for w in text.split("\t") if w}
+            tokens.extend((word, pos) for word in words)
+            for gram in _trigrams(text):
+                postings.setdefault(gram, []).append(pos)
+        tokens.sort()
+        self._tokens = [token for token, _ in tokens]
+        self._token_pos = np.asarray([pos for _, pos in tokens], dtype=np.int32)
+        self._postings = {gram: np.asarray(p, dtype=np.int32) for gram, p in postings.items()}
+        # Rank of each entry in label order: the tie-break and the empty-query listing
+        order = sorted(range(len(self._ids)), key=lambda pos: str(labels[pos]).lower())
+        self._order = order
+        self._rank = np.empty(len(order), dtype=np.int32)
+        self._rank[order] = np.arange(len(order), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, entry_id) -> bool:
+        return entry_id in self._labels
+
+    def label(self, entry_id: int) -> str:
+        return self._labels.get(entry_id, f"#{entry_id}")
+
+    def _prefix(self, word: str) -> np.ndarray:
+        lo = bisect.bisect_left(self._tokens, word)
+        hi = bisect.bisect_left(self._tokens, word + "\uffff")
+        return np.unique(self._token_pos[lo:hi])
+
+    def _substring(self, word: str) -> np.ndarray:
+        lists = []
+        for gram in _trigrams(word):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return _NONE
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if not len(candidates):
+                return _NONE
+        if len(word) == 3:
+            return candidates
+        # Longer words: the trigrams can all be present without being adjacent
+        text = self._text
+        return np.asarray([pos for pos in candidates.tolist() if word in text[pos]], dtype=np.int32)
+
+    def search(self, query: Optional[str], limit: int = DEFAULT_LIMIT) -> List[int]:
+        """
+        Ids of up to `limit` entries containing every word of `query`, entries
+        with a word starting with the query's first word first, then in label
+        order. An empty query lists the first entries in label order.
+        """
+        words = (query or "").lower().split()
+        if not words:
+            return [self._ids[pos] for pos in self._order[:limit]]
+        leading = self._prefix(words[0])
+        matches = None
+        for word in sorted(words, key=len, reverse=True):
+            if word is words[0] and len(word) < 3:
+                found = leading
+            else:
+                found = self._prefix(word) if len(word) < 3 else self._substring(word)
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+            if not len(matches):
+                return []
+        # Sort key: label rank, pushed back by len(self) unless a word starts with the query
+        keys = self._rank[matches] + len(self._ids) * ~np.isin(matches, leading, assume_unique=True)
+        if len(keys) > limit:
+            top = np.argpartition(keys, limit)[:limit]
+            matches, keys = matches[top], keys[top]
+        return [self._ids[pos] for pos in matches[np.argsort(keys, kind="stable")].tolist()]
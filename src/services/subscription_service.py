@@ -4,6 +4,8 @@ from src.dao.Subscription_dao import SubscriptionDAO
 from src.dao.default_subscription_dao import DefaultSubscriptionDAO
 from src.dao.User_dao import UserDAO
 from src.dao.payment_dao import PaymentsDAO
+from src.dao.aggregate_dao import AggregateDAO
+from src.dao.fanout import fan_out
 
 class SubscriptionService:
     def __init__(self):
@@ -11,6 +13,7 @@ class SubscriptionService:
         self.default_dao = DefaultSubscriptionDAO()
         self.user_dao = UserDAO()
         self.payment_dao = PaymentsDAO()
+        self.aggregate_dao = AggregateDAO()
 
     def add_subscription_for_user(self):
         user_id = input("Enter the User ID to add subscription for: ").strip()
@@ -110,19 +113,18 @@ class SubscriptionService:
             return
         user_id = int(user_id)
 
-        # Step 2: Check if user exists
-        user = self.user_dao.get_user_by_id(user_id)
+        # Step 2: Look up the user and their spend summary together
+        user, spend = fan_out(
+            lambda: self.user_dao.get_user_by_id(user_id, columns=["id", "name"]),
+            lambda: self.aggregate_dao.get_user_spend(user_id),
+        )
         if not user:
             print(f"❌ User ID {user_id} does not exist.")
             return
-
-        # Step 3: Get payments for all subscriptions of this user
-        subs = self.subscription_dao.get_subscriptions_by_user(user_id)
-        if not subs:
-            print(f"⚠️ User ID {user_id} has no subscriptions.")
+        if not spend["payment_count"]:
+            print(f"⚠️ User ID {user_id} has no payments.")
             return
 
-        sub_ids = [s["id"] for s in subs]
-        total = self.payment_dao.get_total_spend_for_subscriptions(sub_ids)
-
-        print(f"\n💰 Total Spend for User ID {user_id} ({user['name']}): {total:.2f}")
+        print(f"\n💰 Total Spend for User ID {user_id} ({user['name']}): {spend['completed_total']:.2f}")
+        print(f"   Pending: {spend['pending_total']:.2f}  Failed: {spend['failed_total']:.2f}  "
+              f"Payments: {spend['payment_count']}  Last payment: {spend['last_payment_date']}")
@@ -0,0 +1,277 @@
+"""
+Incremental sync of the Supabase tables into a local read replica.
+
+Each table keeps two watermarks in the replica's sync_state table: the
+highest id copied (new rows) and the highest updated_at seen (edited rows).
+Deletes are picked up from the deleted_rows tombstone table. Both need the
+columns and triggers in sql/sync.sql; tables without them are still synced
+for inserts only. After the first full copy, a sync only transfers rows
+that changed since the previous one.
+
+updated_at and deleted_at are stamped when a statement runs, not when its
+transaction commits, so a row can become visible after a later-stamped
+one has been synced. Edited rows and tombstones are therefore read again
+from `overlap` seconds before the watermark; copying and deleting are
+idempotent, and re-read rows the replica already has are skipped.
+
+Enable it for the dashboard with REPLICA_ENABLED=true (or a [replica]
+section in secrets.toml); REPLICA_PATH and REPLICA_INTERVAL set the SQLite
+file and the minimum number of seconds between syncs, REPLICA_OVERLAP the
+overlap.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from src.config import get_settings, get_supabase
+from src.dao.pagination import DEFAULT_PAGE_SIZE, iter_keyset
+from src.dao.query_cache import query_cache
+
+logger = logging.getLogger(__name__)
+
+# Parents first, so inserts never reference a row the replica lacks yet
+TABLES = ("users", "subscriptions", "payments", "defaultsubscriptions")
+TOMBSTONES = "deleted_rows"
+STATE_TABLE = "sync_state"
+
+DEFAULT_REPLICA_PATH = "replica.db"
+DEFAULT_INTERVAL = 30.0
+DEFAULT_OVERLAP = 300.0  # seconds; longer-running write transactions can still be missed
+
+_STATE_SCHEMA = """
+create table if not exists sync_state (
+    table_name text primary key,
+    last_id integer,
+    last_updated_at text
+)
+"""
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _rewind(stamp: str, seconds: float) -> str:
+    """An ISO timestamp `seconds` earlier, in the millisecond format the stamps use."""
+    try:
+        parsed = datetime.fromisoformat(str(stamp).replace("Z", "+00:00"))
+    except ValueError:
+        return stamp
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed.astimezone(timezone.utc) - timedelta(seconds=seconds)).isoformat(timespec="milliseconds")
+
+
+class SyncService:
+    """Keeps a local replica (SQLite or memory client) in step with the source."""
+
+    def __init__(self, replica, source=None, page_size: int = DEFAULT_PAGE_SIZE, min_interval: float = 0.0,
+                 overlap: float = DEFAULT_OVERLAP):
+        self.replica = replica
+        self._source = source
+        self.page_size = page_size
+        self.min_interval = min_interval
+        self.overlap = overlap
+        self.last_sync: Optional[float] = None
+        self._lock = threading.Lock()
+        self._seen_generation = None
+        self._columns: Dict[str, Optional[set]] = {}
+
+        if hasattr(replica, "query"):
+            replica.query(_STATE_SCHEMA)
+            # The replica mirrors whatever order changes arrive in
+            replica.query("pragma foreign_keys = off")
+
+    @classmethod
+    def from_settings(cls) -> Optional["SyncService"]:
+        """Builds the replica from the [replica] settings, or None if it is disabled."""
+        settings = get_settings("replica")
+        if not _truthy(settings.get("enabled", False)):
+            return None
+        from src.backends.sqlite import SQLiteClient
+        replica = SQLiteClient(settings.get("path", DEFAULT_REPLICA_PATH))
+        return cls(replica, min_interval=float(settings.get("interval", DEFAULT_INTERVAL)),
+                   overlap=float(settings.get("overlap", DEFAULT_OVERLAP)))
+
+    @property
+    def source(self):
+        return self._source if self._source is not None else get_supabase()
+
+    # --- Watermarks ---
+    def _load_state(self) -> Dict[str, Dict]:
+        resp = self.replica.table(STATE_TABLE).select("*").execute()
+        return {row["table_name"]: row for row in resp.data or []}
+
+    def _save_state(self, table: str, last_id, last_updated_at) -> None:
+        self.replica.table(STATE_TABLE).upsert(
+            {"table_name": table, "last_id": last_id, "last_updated_at": last_updated_at},
+            on_conflict="table_name",
+        ).execute()
+
+    def _replica_columns(self, table: str) -> Optional[set]:
+        """Columns the replica can store, or None if it accepts anything."""
+        if table not in self._columns:
+            if hasattr(self.replica, "query"):
+                self._columns[table] = {c["name"] for c in self.replica.query(f"pragma table_info({table})")}
+            else:
+                self._columns[table] = None
+        return self._columns[table]
+
+    # --- Copying ---
+    def _upsert(self, table: str, rows: List[Dict]) -> None:
+        columns = self._replica_columns(table)
+        if columns:
+            rows = [{k: v for k, v in row.items() if k in columns} for row in rows]
+        for start in range(0, len(rows), self.page_size):
+            self.replica.table(table).upsert(rows[start:start + self.page_size], on_conflict="id").execute()
+
+    def _unchanged(self, table: str, rows: List[Dict]) -> set:
+        """
+        Ids of rows the replica already holds with the same values. updated_at
+        is left out: an edit made in the same millisecond as the copied
+        version keeps it, and a SQLite replica restamps rows written with an
+        unchanged one.
+        """
+        held = self.replica.table(table).select("*").in_("id", [row["id"] for row in rows]).execute().data
+        by_id = {row["id"]: row for row in held or []}
+        return {
+            row["id"] for row in rows
+            if row["id"] in by_id and all(str(by_id[row["id"]][k]) == str(v) for k, v in row.items()
+                                          if k != "updated_at" and k in by_id[row["id"]])
+        }
+
+    def _copy(self, table: str, rows, counts: Dict[str, int], key: str, skip_unchanged: bool = False):
+        """
+        Writes rows to the replica in pages; returns the highest (id, updated_at)
+        seen. With skip_unchanged, rows the replica already has are not written.
+        """
+        last_id, newest, buffer = None, None, []
+
+        def flush():
+            if skip_unchanged:
+                unchanged = self._unchanged(table, buffer)
+                buffer[:] = [row for row in buffer if row["id"] not in unchanged]
+            if buffer:
+                self._upsert(table, buffer)
+                counts[key] += len(buffer)
+            buffer.clear()
+
+        for row in rows:
+            last_id = row["id"]
+            stamp = row.get("updated_at")
+            if stamp is not None and (newest is None or str(stamp) > newest):
+                newest = str(stamp)
+            buffer.append(row)
+            if len(buffer) >= self.page_size:
+                flush()
+        flush()
+        return last_id, newest
+
+    def _sync_table(self, table: str, state: Optional[Dict]) -> Dict[str, int]:
+        counts = {"inserted": 0, "updated": 0, "deleted": 0}
+        last_id = state["last_id"] if state else None
+        last_updated_at = state["last_updated_at"] if state else None
+        source = self.source
+        stamps = [last_updated_at]
+
+        # Step 1: rows edited since the last sync, among those already copied,
+        # with the overlap that catches late commits (including late inserts
+        # below last_id)
+        if last_id is not None and last_updated_at is not None:
+            since = _rewind(last_updated_at, self.overlap)
+            edited = iter_keyset(source, table, page_size=self.page_size,
+                                 filters=[("gte", "updated_at", since), ("lte", "id", last_id)])
+            stamps.append(self._copy(table, edited, counts, "updated", skip_unchanged=True)[1])
+
+        # Step 2: rows added since the last sync
+        added = iter_keyset(source, table, page_size=self.page_size, after_id=last_id)
+        new_last_id, newest = self._copy(table, added, counts, "inserted")
+        stamps.append(newest)
+
+        stamps = [s for s in stamps if s is not None]
+        self._save_state(table, new_last_id if new_last_id is not None else last_id, max(stamps) if stamps else None)
+        return counts
+
+    def _sync_deletes(self, state: Optional[Dict], results: Dict[str, Dict[str, int]]) -> None:
+        last_id = state["last_id"] if state else None
+        last_deleted_at = state["last_updated_at"] if state else None
+        # Tombstones from `overlap` before the newest one seen, as for edits;
+        # without a timestamp watermark yet, those after the last id
+        if last_deleted_at:
+            after_id, filters = None, [("gte", "deleted_at", _rewind(last_deleted_at, self.overlap))]
+        else:
+            after_id, filters = last_id, []
+        try:
+            tombstones = list(iter_keyset(self.source, TOMBSTONES, ["table_name", "row_id", "deleted_at"],
+                                          page_size=self.page_size, after_id=after_id, filters=filters))
+        except Exception as e:
+            logger.warning("Skipping deletes: %s is not available (%s). Run sql/sync.sql.", TOMBSTONES, e)
+            return
+        if not tombstones:
+            return
+
+        by_table: Dict[str, List] = {}
+        for row in tombstones:
+            by_table.setdefault(row["table_name"], []).append(row["row_id"])
+        # Children first
+        for table in reversed(TABLES):
+            ids = by_table.get(table)
+            if not ids:
+                continue
+            for start in range(0, len(ids), self.page_size):
+                deleted = self.replica.table(table).delete().in_("id", ids[start:start + self.page_size]).execute()
+                # Re-read tombstones find nothing left to delete
+                results[table]["deleted"] += len(deleted.data or [])
+        stamps = [str(row["deleted_at"]) for row in tombstones if row.get("deleted_at")] + [last_deleted_at]
+        stamps = [s for s in stamps if s is not None]
+        self._save_state(TOMBSTONES, max(last_id or 0, tombstones[-1]["id"]), max(stamps) if stamps else None)
+
+    # --- Public API ---
+    def sync(self) -> Dict[str, Dict[str, int]]:
+        """
+        Copies every change since the last sync into the replica and
+        returns {table: {"inserted", "updated", "deleted"}} counts.
+        """
+        with self._lock:
+            state = self._load_state()
+            if TOMBSTONES not in state:
+                # The first copy is already current, so older deletes are skipped
+                self._mark_tombstones_seen()
+            results = {table: self._sync_table(table, state.get(table)) for table in TABLES}
+            if TOMBSTONES in state:
+                self._sync_deletes(state[TOMBSTONES], results)
+
+            for table, counts in results.items():
+                if any(counts.values()):
+                    query_cache.invalidate(table)
+            self._seen_generation = query_cache.generation(TABLES)
+            self.last_sync = time.monotonic()
+            return results
+
+    def _mark_tombstones_seen(self) -> None:
+        """Starts the tombstone watermark at the newest entry, so old deletes are not replayed."""
+        try:
+            resp = self.source.table(TOMBSTONES).select("id").order("id", desc=True).limit(1).execute()
+        except Exception:
+            return
+        self._save_state(TOMBSTONES, resp.data[0]["id"] if resp.data else 0, None)
+
+    def refresh(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        Syncs if min_interval has passed or this process wrote to any table
+        since the last sync; otherwise does nothing and returns None.
+        """
+        due = self.last_sync is None or time.monotonic() - self.last_sync >= self.min_interval
+        if due or query_cache.generation(TABLES) != self._seen_generation:
+            return self.sync()
+        return None
+
+    def rebuild(self) -> Dict[str, Dict[str, int]]:
+        """Empties the replica and copies everything again."""
+        with self._lock:
+            for table in reversed(TABLES):
+                self.replica.table(table).delete().gte("id", 0).execute()
+            self.replica.table(STATE_TABLE).delete().neq("table_name", "").execute()
+        return self.sync()
@@ -1,4 +1,5 @@
 # src/services/user_service.py
+import itertools
 import re
 from src.dao.User_dao import UserDAO  
 from src.dao.Subscription_dao import SubscriptionDAO
@@ -25,32 +26,29 @@ class UserService:
                 print("Invalid email format. Please enter a valid email.")
                 continue
             
-            
-            if self.user_dao.get_user_by_email(email):
+            # Checked and created in one request; None means the email is taken
+            if self.user_dao.create_user_if_new(name, email) is None:
                 print("Email already exists. Please enter a different email.")
                 continue
             
             break  
         
-        
-        resp=self.user_dao.create_user(name, email)
-        if(resp):
-            print(f"User '{name}' with email '{email}' added successfully!")
-        else:
-            print("User not created")
+        print(f"User '{name}' with email '{email}' added successfully!")
 
     def list_users(self):
         
-        users = self.user_dao.get_all_users() 
+        # Stream users page by page so large tables are never held in memory
+        users = self.user_dao.iter_users(columns=["id", "name", "email"], prefetch=True)
         
-        if not users:
+        first = next(users, None)
+        if first is None:
             print("No users found.")
             return
         
         print("\n=== Registered Users ===")
         print(f"{'ID':<5} {'Name':<25} {'Email'}")
         print("-" * 50)
-        for user in users:
+        for user in itertools.chain([first], users):
             print(f"{user['id']:<5} {user['name']:<25} {user['email']}")
         print("-" * 50)
 
@@ -62,21 +60,11 @@ class UserService:
             return
         user_id = int(user_id)
 
-        # Step 1: Verify user exists
-        user = self.user_dao.get_user_by_id(user_id)
-        if not user:
-            print(f"❌ User ID {user_id} does not exist.")
-            return
-
-        # Step 2: Check if user has any subscriptions
-        subs = self.subscription_dao.get_subscriptions_by_user(user_id)
-        if subs:
-            print(f"⚠️ Cannot delete User ID {user_id} — they still have subscriptions.")
-            return
-
-        # Step 3: Delete the user
-        success = self.user_dao.delete_user(user_id)
-        if success:
+        # Existence and subscription checks run in the same server-side call
+        status = self.user_dao.delete_user_if_unsubscribed(user_id)
+        if status == "deleted":
             print(f"✅ User ID {user_id} deleted successfully.")
+        elif status == "not_found":
+            print(f"❌ User ID {user_id} does not exist.")
         else:
-            print(f"❌ Failed to delete User ID {user_id}.")
+            print(f"⚠️ Cannot delete User ID {user_id} — they still have subscriptions.")
@@ -0,0 +1,26 @@
+import pytest
+
+from src.backends.memory import MemoryClient
+from src.backends.sqlite import SQLiteClient
+from src.dao import resilience
+from src.dao.query_cache import query_cache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request):
+    """Each local backend in turn, empty."""
+    client = MemoryClient() if request.param == "memory" else SQLiteClient(":memory:")
+    yield client
+    if request.param == "sqlite":
+        client.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    # The cache and the shared breaker are process-wide
+    query_cache.clear()
+    query_cache.configure(ttl=300)
+    resilience._shared_breaker.failures, resilience._shared_breaker.opened_at = 0, None
+    yield
+    query_cache.clear()
+
@@ -0,0 +1,36 @@
+from src.dao.aggregate_dao import AggregateDAO
+from src.dao.payment_dao import PaymentsDAO
+from src.backends.memory import MemoryClient
+
+USERS = 250
+
+
+class CappedClient(MemoryClient):
+    # Function results are cut at max_rows (see RpcCall); the table reads the
+    # function stand-ins make "inside the database" are not
+    max_rows = 100
+
+
+def _client():
+    return CappedClient({
+        "users": [{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(USERS)],
+        "subscriptions": [{"user_id": i + 1, "name": "Music", "plan_type": "Monthly", "cost": 10.0} for i in range(USERS)],
+        "payments": [{"subscription_id": i + 1, "amount": float(i), "payment_date": "2025-01-01", "method": "UPI",
+                      "status": "Completed"} for i in range(USERS)],
+    })
+
+
+def test_per_user_results_are_not_cut_off_at_the_cap():
+    dao = AggregateDAO(_client())
+    assert dao.get_subscriptions_per_user() == {i: 1 for i in range(1, USERS + 1)}
+    spend = dao.get_spend_per_user()
+    assert len(spend) == USERS
+    assert spend[USERS] == USERS - 1
+    assert dao.get_spend_per_user(user_id=3) == {3: 2.0}
+
+
+def test_per_subscription_results_are_not_cut_off_at_the_cap():
+    client = _client()
+    assert len(AggregateDAO(client).get_spend_per_subscription()) == USERS
+    ids = list(range(1, USERS + 1))
+    assert PaymentsDAO(client).get_total_spend_for_subscriptions(ids) == sum(range(USERS))
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from src.services.billing_service import expand_schedule, reconcile
+
+
+def _subscriptions(*rows):
+    columns = ["id", "user_id", "name", "plan_type", "cost", "start_date", "end_date"]
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], columns=columns)
+
+
+def _due_dates(schedule, subscription_id=1):
+    rows = schedule[schedule["subscription_id"] == subscription_id]
+    return [str(day) for day in rows["due_date"].to_numpy(dtype="datetime64[D]")]
+
+
+def test_monthly_plan_is_clamped_to_the_end_of_shorter_months():
+    subs = _subscriptions((1, 1, "Music", "Monthly", 199.0, "2025-01-31", None))
+    schedule = expand_schedule(subs, as_of="2025-05-31")
+    assert _due_dates(schedule) == ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30", "2025-05-31"]
+
+
+def test_leap_years_keep_february_29():
+    subs = _subscriptions(
+        (1, 1, "Music", "Monthly", 199.0, "2024-01-30", None),
+        (2, 1, "Cloud", "Yearly", 999.0, "2024-02-29", None),
+    )
+    schedule = expand_schedule(subs, as_of="2026-03-01")
+    assert _due_dates(schedule)[:3] == ["2024-01-30", "2024-02-29", "2024-03-30"]
+    assert _due_dates(schedule, 2) == ["2024-02-29", "2025-02-28", "2026-02-28"]
+
+
+def test_schedule_stops_at_end_date_and_as_of():
+    subs = _subscriptions(
+        (1, 1, "Music", "Monthly", 199.0, "2025-01-31", "2025-03-30"),
+        (2, 1, "Video", "Monthly", 499.0, "2025-01-31", None),
+    )
+    schedule = expand_schedule(subs, as_of="2025-04-29")
+    assert _due_dates(schedule) == ["2025-01-31", "2025-02-28"]
+    assert _due_dates(schedule, 2) == ["2025-01-31", "2025-02-28", "2025-03-31"]
+
+
+def test_payments_are_matched_to_cycles_in_order():
+    subs = _subscriptions((1, 1, "Music", "Monthly", 100.0, "2025-01-31", None))
+    payments = pd.DataFrame([
+        {"id": 1, "subscription_id": 1, "amount": 100.0, "payment_date": "2025-01-31", "status": "Completed"},
+        {"id": 2, "subscription_id": 1, "amount": 100.0, "payment_date": "2025-03-20", "status": "Completed"},
+        {"id": 3, "subscription_id": 1, "amount": 50.0, "payment_date": "2025-03-31", "status": "Completed"},
+        {"id": 4, "subscription_id": 1, "amount": 100.0, "payment_date": "2025-04-01", "status": "Failed"},
+    ])
+    result = reconcile(expand_schedule(subs, as_of="2025-04-30"), payments, as_of="2025-04-30")
+    assert list(result["status"]) == ["paid", "late", "underpaid", "due"]
@@ -0,0 +1,74 @@
+import pytest
+
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.User_dao import UserDAO
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.query_cache import query_cache
+from src.services.dataset_service import DatasetService
+from test_pagination import CappedClient
+
+
+def _payment(subscription_id, amount=10.0):
+    return {"subscription_id": subscription_id, "amount": amount, "payment_date": "2025-01-01",
+            "method": "UPI", "status": "Completed"}
+
+
+@pytest.fixture
+def client():
+    return CappedClient({
+        "users": [{"name": "Ann", "email": "ann@example.com"}],
+        "subscriptions": [{"user_id": 1, "name": "Music", "plan_type": "Monthly", "cost": 10.0,
+                           "start_date": "2025-01-01", "end_date": "2025-12-31", "status": "Active"}],
+        "payments": [_payment(1) for _ in range(3)],
+    })
+
+
+@pytest.fixture
+def service(client):
+    service = DatasetService(UserDAO(client), SubscriptionDAO(client), PaymentsDAO(client))
+    yield service
+    service.close()
+
+
+def test_own_inserts_are_appended_with_one_lookup(client, service):
+    assert len(service.get().payments) == 3
+    dao = service.payment_dao
+    dao.insert_payments([_payment(1, 20.0), _payment(1, 30.0)])
+    dao.insert_payment(1, 40.0, "UPI", "Completed")
+
+    client.selects = 0
+    payments = service.get().payments
+    assert client.selects == 1
+    assert payments["amount"].tolist() == [10.0, 10.0, 10.0, 20.0, 30.0, 40.0]
+    assert len(service.get().payments_of(1)) == 6
+
+
+def test_other_payment_changes_reload_the_table(client, service):
+    service.get()
+    # A replica sync writes around the DAOs and only invalidates the cache
+    client.table("payments").update({"amount": 99.0}).eq("id", 1).execute()
+    client.table("payments").delete().eq("id", 2).execute()
+    query_cache.invalidate("payments")
+
+    payments = service.get().payments
+    assert payments["id"].tolist() == [1, 3]
+    assert payments["amount"].tolist() == [99.0, 10.0]
+
+
+def test_own_insert_next_to_an_outside_change_reloads(client, service):
+    service.get()
+    client.table("payments").delete().eq("id", 1).execute()
+    query_cache.invalidate("payments")
+    service.payment_dao.insert_payments([_payment(1, 20.0)])
+
+    assert service.get().payments["id"].tolist() == [2, 3, 4]
+
+
+def test_lower_id_committed_late_is_picked_up(client, service):
+    client.table("payments").delete().eq("id", 2).execute()
+    assert service.get().payments["id"].tolist() == [1, 3]
+    # Committed elsewhere after id 3 was, then seen by a sync
+    client.table("payments").insert(dict(_payment(1, 50.0), id=2)).execute()
+    query_cache.invalidate("payments")
+
+    assert service.get().payments["id"].tolist() == [1, 2, 3]
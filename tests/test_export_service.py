@@ -0,0 +1,60 @@
+import csv
+import io
+
+import pytest
+
+from src.cli.commands import build_parser
+from src.config import reset_supabase, set_supabase
+from src.services.export_service import ExportService
+from test_pagination import CappedClient
+
+PAYMENTS = 350
+
+
+@pytest.fixture
+def client():
+    client = CappedClient({
+        "users": [{"name": "Asha", "email": "asha@example.com"}],
+        "subscriptions": [{"user_id": 1, "name": "Music", "plan_type": "Monthly", "cost": 10.0, "status": "Active",
+                           "start_date": "2025-01-01", "end_date": "2026-01-01"}],
+        "payments": [{"subscription_id": 1, "amount": 10.0, "payment_date": f"2025-01-{i % 28 + 1:02d}",
+                      "method": "UPI", "status": "Completed" if i % 2 else "Failed"} for i in range(PAYMENTS)],
+    })
+    set_supabase(client)
+    yield client
+    reset_supabase()
+
+
+def _export(**options):
+    out = io.BytesIO()
+    report = ExportService().export("payments", out, "csv", **options)
+    return report, list(csv.DictReader(io.StringIO(out.getvalue().decode())))
+
+
+@pytest.mark.parametrize("page_size", [1, 100, 5000])
+def test_every_row_is_exported_whatever_the_page_size(client, page_size):
+    report, rows = _export(page_size=page_size)
+    assert report.rows == len(rows) == PAYMENTS
+    assert [int(row["id"]) for row in rows] == list(range(1, PAYMENTS + 1))
+
+
+def test_filters(client):
+    report, rows = _export(status="Completed", since="2025-01-02", until="2025-01-02")
+    assert {(row["status"], row["payment_date"][:10]) for row in rows} == {("Completed", "2025-01-02")}
+    assert report.rows == len(rows) > 0
+
+
+def test_page_size_below_one_is_refused(client):
+    with pytest.raises(ValueError):
+        _export(page_size=0)
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "5000"])
+def test_cli_refuses_page_sizes_outside_the_cap(value, capsys):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["export", "payments", "-", "--page-size", value])
+    assert "--page-size" in capsys.readouterr().err
+
+
+def test_cli_accepts_the_cap():
+    assert build_parser().parse_args(["export", "payments", "-", "--page-size", "1000"]).page_size == 1000
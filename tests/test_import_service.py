@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from src.dao.journal_dao import JournalDAO
+from src.services.import_service import ImportService
+
+
+class FlakyDAO(JournalDAO):
+    """Fails the `fail_on`-th apply_entries call with a connection error, after applying it."""
+
+    def __init__(self, client, fail_on):
+        super().__init__(client)
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def apply_entries(self, entries):
+        self.calls += 1
+        results = super().apply_entries(entries)
+        if self.calls == self.fail_on:
+            raise ConnectionError("response lost")
+        return results
+
+
+def _service(journal_dao):
+    service = ImportService()
+    service.journal_dao = journal_dao
+    return service
+
+
+def _write_users(tmp_path, rows):
+    path = tmp_path / "users.csv"
+    path.write_text("name,email\n" + "".join(f"{name},{email}\n" for name, email in rows), encoding="utf-8")
+    return str(path)
+
+
+def _emails(backend):
+    return [row["email"] for row in backend.table("users").select("email").order("id").execute().data]
+
+
+def test_invalid_and_refused_rows_are_reported(tmp_path, backend):
+    backend.table("users").insert({"name": "Taken", "email": "taken@example.com"}).execute()
+    path = _write_users(tmp_path, [("Asha", "asha@example.com"), ("", "nobody@example.com"),
+                                   ("Ravi", "not-an-email"), ("Again", "taken@example.com")])
+
+    report = _service(JournalDAO(backend)).import_file(path, "users", batch_size=2)
+    assert (report.rows_read, report.inserted) == (4, 1)
+    assert [row for row, _ in report.errors] == [2, 3, 4]
+    assert "already exists" in report.errors[-1][1]
+    assert not os.path.exists(ImportService.checkpoint_path(path))
+
+
+def test_transient_error_stops_and_the_resume_inserts_nothing_twice(tmp_path, backend):
+    path = _write_users(tmp_path, [(f"User {i}", f"user{i}@example.com") for i in range(5)])
+
+    # The second batch is applied but its response is lost
+    with pytest.raises(ConnectionError):
+        _service(FlakyDAO(backend, fail_on=2)).import_file(path, "users", batch_size=2)
+    assert os.path.exists(ImportService.checkpoint_path(path))
+
+    report = _service(JournalDAO(backend)).import_file(path, "users", batch_size=2)
+    assert report.resumed_from == 2
+    assert (report.rows_read, report.inserted, report.errors) == (3, 3, [])
+    assert _emails(backend) == [f"user{i}@example.com" for i in range(5)]
@@ -0,0 +1,49 @@
+import contextvars
+
+from src.backends.memory import MemoryClient
+from src.dao import instrumentation
+from src.dao.instrumentation import BATCH_ALTERNATIVES, tracing
+from src.dao.Subscription_dao import SubscriptionDAO
+from src.dao.User_dao import UserDAO
+
+
+def _client():
+    return MemoryClient({
+        "users": [{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(8)],
+        "subscriptions": [{"user_id": i % 8 + 1, "name": f"Sub {i}"} for i in range(12)],
+    })
+
+
+def test_every_suggestion_names_an_existing_batch_method():
+    from src.dao.aggregate_dao import AggregateDAO
+    from src.dao.payment_dao import PaymentsDAO
+    classes = {cls.__name__: cls for cls in (UserDAO, SubscriptionDAO, PaymentsDAO, AggregateDAO)}
+    for suggestion in BATCH_ALTERNATIVES.values():
+        cls, method = suggestion.split(".")
+        assert hasattr(classes[cls], method), suggestion
+
+
+def test_lookups_by_id_are_flagged_with_the_batched_method():
+    dao = UserDAO(_client())
+    with tracing("page") as trace:
+        for user_id in range(1, 7):
+            dao.get_user_by_id(user_id)
+    assert trace.n_plus_one()[0]["suggestion"] == "UserDAO.get_users_by_ids"
+
+
+def test_batched_lookups_by_id():
+    client = _client()
+    users = UserDAO(client).get_users_by_ids([5, 2, 99, 2], columns=["name"])
+    assert [(u["id"], u["name"]) for u in users] == [(2, "User 1"), (5, "User 4")]
+    subs = SubscriptionDAO(client).get_subscriptions_by_ids(range(1, 20), columns=["name"], shape="rows")
+    assert [s.name for s in subs] == [f"Sub {i}" for i in range(12)]
+
+
+def test_generator_closed_in_another_context():
+    dao = UserDAO(_client())
+    with tracing("page") as trace:
+        rows = dao.iter_users(page_size=3)
+        assert contextvars.copy_context().run(next, rows)["id"] == 1
+        assert instrumentation._current_call.get() is None  # not left set for the consumer
+        contextvars.copy_context().run(rows.close)
+    assert [(c.method, c.rows) for c in trace.calls] == [("UserDAO.iter_users", 1)]
@@ -0,0 +1,175 @@
+import pytest
+
+from src.dao.journal_dao import JournalDAO
+from src.services.journal_service import JournalService, WriteJournal
+
+
+@pytest.fixture
+def service(backend):
+    journal = WriteJournal(":memory:")
+    yield JournalService(journal, JournalDAO(backend))
+    journal.close()
+
+
+def _statuses(service):
+    return [(e["op"], e["status"]) for e in reversed(service.journal.entries())]
+
+
+def test_replay_applies_entries_and_their_references(service, backend):
+    user = service.create_user("Asha", "asha@example.com")
+    sub = service.add_subscription(None, "Music", "Monthly", 199.0, "2025-01-01", "2026-01-01",
+                                   user_key=user["journal_key"])
+    service.insert_payment(None, 199.0, "UPI", "Completed", "2025-01-01", subscription_key=sub["journal_key"])
+
+    assert service.replay() == {"applied": 3}
+    payment = backend.table("payments").select("*").execute().data[0]
+    subscription = backend.table("subscriptions").select("*").execute().data[0]
+    assert payment["subscription_id"] == subscription["id"]
+    assert subscription["user_id"] == service.journal.get(user["journal_key"])["row_id"]
+
+
+def test_applying_a_key_twice_is_a_duplicate(service, backend):
+    dao = service.journal_dao
+    first = dao.apply_entry("k1", "create_user", {"name": "Asha", "email": "asha@example.com"})
+    again = dao.apply_entry("k1", "create_user", {"name": "Asha", "email": "asha@example.com"})
+    assert first["status"] == "applied"
+    assert again == {"status": "duplicate", "row_id": first["row_id"]}
+    assert len(backend.table("users").select("id").execute().data) == 1
+
+
+def test_replay_after_a_lost_response_does_not_insert_twice(service, backend):
+    entry = service.create_user("Asha", "asha@example.com")
+    # The database applied it, but the replicator never heard back
+    service.journal_dao.apply_entry(entry["journal_key"], "create_user", {"name": "Asha", "email": "asha@example.com"})
+
+    assert service.replay() == {"duplicate": 1}
+    assert len(backend.table("users").select("id").execute().data) == 1
+
+
+def test_existing_email_is_a_conflict_that_resolves_to_the_user(service, backend):
+    existing = backend.table("users").insert({"name": "Asha", "email": "asha@example.com"}).execute().data[0]
+    user = service.create_user("Asha again", "asha@example.com")
+    service.add_subscription(None, "Music", "Monthly", 199.0, "2025-01-01", "2026-01-01", user_key=user["journal_key"])
+
+    assert service.replay() == {"conflict": 1, "applied": 1}
+    assert service.journal.get(user["journal_key"])["row_id"] == existing["id"]
+    assert backend.table("subscriptions").select("user_id").execute().data == [{"user_id": existing["id"]}]
+
+
+def test_refused_write_is_rejected_and_later_entries_still_apply(service):
+    service.insert_payment(999, 10.0, "UPI", "Completed", "2025-01-01")
+    service.create_user("Asha", "asha@example.com")
+
+    assert service.replay() == {"rejected": 1, "applied": 1}
+    assert _statuses(service) == [("insert_payment", "rejected"), ("create_user", "applied")]
+    assert service.replay() == {}
+
+
+def test_unknown_op_is_rejected(service):
+    assert service.journal_dao.apply_entry("k1", "drop_table", {}) == {"status": "rejected", "row_id": None}
+
+
+class FailingDAO(JournalDAO):
+    def __init__(self, client, error):
+        super().__init__(client)
+        self.error = error
+
+    def apply_entry(self, key, op, payload):
+        if payload.get("name") == "bad":
+            raise self.error
+        return super().apply_entry(key, op, payload)
+
+    def apply_entries(self, entries):
+        if any(entry["payload"].get("name") == "bad" for entry in entries):
+            raise self.error
+        return super().apply_entries(entries)
+
+
+def test_transient_error_keeps_the_entry_at_the_head(backend):
+    service = JournalService(WriteJournal(":memory:"), FailingDAO(backend, ConnectionError("down")), max_attempts=2)
+    service.create_user("bad", "bad@example.com")
+    service.create_user("Asha", "asha@example.com")
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            service.replay()
+    assert _statuses(service) == [("create_user", "pending"), ("create_user", "pending")]
+
+
+def test_permanent_error_is_rejected_after_max_attempts(backend):
+    service = JournalService(WriteJournal(":memory:"), FailingDAO(backend, ValueError("out of range")), max_attempts=2)
+    service.create_user("bad", "bad@example.com")
+    service.create_user("Asha", "asha@example.com")
+    with pytest.raises(ValueError):
+        service.replay()
+
+    assert service.replay() == {"rejected": 1, "applied": 1}
+    rejected = service.journal.entries(status="rejected")[0]
+    assert rejected["attempts"] == 2
+    assert "out of range" in rejected["error"]
+
+
+class CountingDAO(JournalDAO):
+    def __init__(self, client):
+        super().__init__(client)
+        self.calls = []
+
+    def apply_entry(self, key, op, payload):
+        self.calls.append(1)
+        return super().apply_entry(key, op, payload)
+
+    def apply_entries(self, entries):
+        self.calls.append(len(entries))
+        return super().apply_entries(entries)
+
+
+def test_replay_sends_runs_of_entries_in_one_call(backend):
+    service = JournalService(WriteJournal(":memory:"), CountingDAO(backend))
+    users = [service.create_user(f"User {i}", f"user{i}@example.com") for i in range(3)]
+    service.add_subscription(None, "Music", "Monthly", 199.0, "2025-01-01", "2026-01-01", user_key=users[0]["journal_key"])
+    service.add_subscription(None, "Video", "Monthly", 99.0, "2025-01-01", "2026-01-01", user_key=users[1]["journal_key"])
+
+    assert service.replay() == {"applied": 5}
+    # The subscriptions wait for the users they refer to
+    assert service.journal_dao.calls == [3, 2]
+    user_ids = [service.journal.get(u["journal_key"])["row_id"] for u in users]
+    rows = backend.table("subscriptions").select("name,user_id").order("id").execute().data
+    assert rows == [{"name": "Music", "user_id": user_ids[0]}, {"name": "Video", "user_id": user_ids[1]}]
+
+
+def test_entry_without_a_result_stays_pending_with_those_after_it(backend):
+    class LosingDAO(JournalDAO):
+        def apply_entries(self, entries):
+            results = super().apply_entries(entries)
+            results.pop(entries[1]["key"])
+            return results
+
+    service = JournalService(WriteJournal(":memory:"), LosingDAO(backend))
+    for i in range(3):
+        service.create_user(f"User {i}", f"user{i}@example.com")
+    with pytest.raises(RuntimeError):
+        service.replay()
+    assert _statuses(service) == [("create_user", "applied"), ("create_user", "pending"), ("create_user", "pending")]
+
+
+def test_batch_apply_reports_every_key(service, backend):
+    backend.table("users").insert({"name": "Asha", "email": "asha@example.com"}).execute()
+    service.journal_dao.apply_entries([{"key": "a", "op": "create_user", "payload": {"name": "R", "email": "r@example.com"}}])
+    results = service.journal_dao.apply_entries([
+        {"key": "a", "op": "create_user", "payload": {"name": "R", "email": "r@example.com"}},
+        {"key": "b", "op": "create_user", "payload": {"name": "A", "email": "asha@example.com"}},
+        {"key": "c", "op": "insert_payment", "payload": {"subscription_id": 999, "amount": 1.0, "method": "UPI",
+                                                         "status": "Completed", "payment_date": None}},
+        {"key": "d", "op": "create_user", "payload": {"name": "M", "email": "m@example.com"}},
+    ])
+    assert {key: result["status"] for key, result in results.items()} == {
+        "a": "duplicate", "b": "conflict", "c": "rejected", "d": "applied"}
+
+
+def test_prune_receipts_keeps_recent_ones(service, backend):
+    dao = service.journal_dao
+    dao.apply_entry("k1", "create_user", {"name": "Asha", "email": "asha@example.com"})
+    backend.table("write_receipts").update({"created_at": "2020-01-01T00:00:00.000+00:00"}).eq("idempotency_key", "k1").execute()
+    dao.apply_entry("k2", "create_user", {"name": "Ravi", "email": "ravi@example.com"})
+
+    assert dao.prune_receipts(30) == 1
+    assert [r["idempotency_key"] for r in backend.table("write_receipts").select("idempotency_key").execute().data] == ["k2"]
@@ -0,0 +1,57 @@
+import pytest
+
+from src.backends.memory import MemoryClient
+from src.dao.pagination import iter_keyset, page_size_for
+
+
+class CappedClient(MemoryClient):
+    """Returns at most max_rows rows per select, as PostgREST does."""
+
+    max_rows = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selects = 0
+
+    def _execute(self, query):
+        response = super()._execute(query)
+        if query.action == "select":
+            self.selects += 1
+            response.data = response.data[:self.max_rows]
+        return response
+
+
+@pytest.fixture
+def client():
+    return CappedClient({"users": [{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(350)]})
+
+
+def _ids(rows):
+    return [row["id"] for row in rows]
+
+
+@pytest.mark.parametrize("page_size", [1, 7, 100, 500, 5000])
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_every_row_comes_back_whatever_the_page_size(client, page_size, prefetch):
+    rows = list(iter_keyset(client, "users", "id,name", page_size=page_size, prefetch=prefetch))
+    assert _ids(rows) == list(range(1, 351))
+
+
+def test_pages_above_the_cap_are_clamped(client):
+    list(iter_keyset(client, "users", page_size=500))
+    assert client.selects == 4  # 100 + 100 + 100 + 50
+
+
+def test_filters_and_after_id(client):
+    rows = iter_keyset(client, "users", ["name"], page_size=10, after_id=340, filters=[("lte", "id", 345)])
+    assert [(row["id"], row["name"]) for row in rows] == [(i, f"User {i - 1}") for i in range(341, 346)]
+
+
+def test_empty_table(client):
+    assert list(iter_keyset(client, "payments")) == []
+
+
+def test_page_size_must_be_positive(client):
+    with pytest.raises(ValueError):
+        list(iter_keyset(client, "users", page_size=0))
+    assert page_size_for(MemoryClient(), 5000) == 5000  # no cap to clamp to
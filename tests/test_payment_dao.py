@@ -0,0 +1,33 @@
+from src.dao.payment_dao import PaymentsDAO
+from test_pagination import CappedClient
+
+
+def _client(payments_per_subscription=60, subscriptions=5):
+    return CappedClient({
+        "subscriptions": [{"user_id": 1, "name": f"Sub {i}"} for i in range(subscriptions)],
+        "payments": [
+            {"subscription_id": sub, "amount": 1.0, "payment_date": "2025-01-01", "method": "UPI",
+             "status": "Completed" if n % 2 else "Failed"}
+            for n in range(payments_per_subscription) for sub in range(1, subscriptions + 1)
+        ],
+    })
+
+
+def test_chunk_with_more_payments_than_the_cap_is_not_truncated():
+    dao = PaymentsDAO(_client())
+    payments = dao.get_payments_by_subscriptions([1, 2, 3, 4, 5], chunk_size=4)
+    assert len(payments) == 300
+    assert len({p["id"] for p in payments}) == 300
+
+
+def test_status_filter_and_columns():
+    dao = PaymentsDAO(_client())
+    payments = dao.get_payments_by_subscriptions(iter([2, 3]), status="Completed", columns=["subscription_id", "amount"])
+    assert len(payments) == 60
+    assert set(payments[0]) == {"subscription_id", "amount"}
+    assert dao.get_payments_by_subscriptions([2, 3], columns=["amount"], shape="columns") == {"amount": [1.0] * 120}
+
+
+def test_one_subscription_with_more_payments_than_the_cap():
+    dao = PaymentsDAO(_client(payments_per_subscription=250, subscriptions=1))
+    assert len(dao.get_payments_by_subscription(1)) == 250
@@ -0,0 +1,109 @@
+import httpx
+import pytest
+
+from src.backends.memory import MemoryClient
+from src.dao.journal_dao import JournalDAO
+from src.services.payment_writer import PaymentRejected, PaymentUnconfirmed, PaymentWriter, WriterClosed
+
+
+@pytest.fixture
+def client():
+    return MemoryClient({"subscriptions": [{"user_id": 1, "name": "Music"}]})
+
+
+def _writer(dao, **options):
+    # A long interval, so only flush() and close() write
+    return PaymentWriter(dao, **dict({"flush_interval": 60, "backoff": 0}, **options))
+
+
+def _payments(client):
+    return client.table("payments").select("*").execute().data
+
+
+def test_flush_writes_everything_submitted_in_one_batch(client):
+    with _writer(JournalDAO(client)) as writer:
+        futures = [writer.submit(1, 10.0 + i, "UPI", "Completed") for i in range(3)]
+        assert writer.flush(timeout=5)
+        assert all(f.done() for f in futures)
+        assert [f.result()["amount"] for f in futures] == [10.0, 11.0, 12.0]
+        assert writer.stats["batches"] == 1
+    assert len(_payments(client)) == 3
+
+
+def test_batch_size_triggers_a_write(client):
+    with _writer(JournalDAO(client), batch_size=2) as writer:
+        futures = [writer.submit(1, 10.0, "UPI", "Completed") for _ in range(2)]
+        assert futures[1].result(timeout=5)["id"]
+
+
+def test_close_writes_queued_payments_and_refuses_new_ones(client):
+    writer = _writer(JournalDAO(client))
+    futures = [writer.submit(1, 10.0, "UPI", "Completed") for _ in range(3)]
+    writer.close(timeout=5)
+
+    assert all(f.result(timeout=0)["id"] for f in futures)
+    assert len(_payments(client)) == 3
+    with pytest.raises(WriterClosed):
+        writer.submit(1, 10.0, "UPI", "Completed")
+    assert writer.flush(timeout=1)
+    writer.close()  # a second close is a no-op
+
+
+def test_refused_payment_fails_only_its_own_future(client):
+    with _writer(JournalDAO(client)) as writer:
+        good, bad = writer.submit(1, 10.0, "UPI", "Completed"), writer.submit(999, 10.0, "UPI", "Completed")
+        writer.flush(timeout=5)
+        assert good.result()["subscription_id"] == 1
+        with pytest.raises(PaymentRejected):
+            bad.result()
+        assert (writer.stats["written"], writer.stats["failed"]) == (1, 1)
+
+
+class LostResponseDAO(JournalDAO):
+    """Applies the first batch but loses its response."""
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.calls = 0
+
+    def apply_entries(self, entries):
+        self.calls += 1
+        results = super().apply_entries(entries)
+        if self.calls == 1:
+            raise httpx.ReadTimeout("response lost")
+        return results
+
+
+def test_retry_after_a_lost_response_does_not_write_twice(client):
+    dao = LostResponseDAO(client)
+    with _writer(dao) as writer:
+        futures = [writer.submit(1, 10.0, "UPI", "Completed") for _ in range(3)]
+        writer.flush(timeout=5)
+        ids = {f.result()["id"] for f in futures}
+    assert dao.calls == 2
+    assert writer.stats["retries"] == 1
+    assert {p["id"] for p in _payments(client)} == ids
+
+
+class ShortResponseDAO(JournalDAO):
+    def apply_entries(self, entries):
+        results = super().apply_entries(entries)
+        return {key: result for key, result in results.items() if key != entries[-1]["key"]}
+
+
+def test_payment_missing_from_the_response_is_not_reported_written(client):
+    with _writer(ShortResponseDAO(client)) as writer:
+        first, last = writer.submit(1, 10.0, "UPI", "Completed"), writer.submit(1, 11.0, "UPI", "Completed")
+        writer.flush(timeout=5)
+        assert first.result()["amount"] == 10.0
+        with pytest.raises(PaymentUnconfirmed):
+            last.result()
+
+
+def test_batch_larger_than_the_cap_is_fully_confirmed(client):
+    client.max_rows = 2  # function results are cut at max_rows, like PostgREST's
+    with _writer(JournalDAO(client)) as writer:
+        futures = [writer.submit(1, 10.0, "UPI", "Completed") for _ in range(5)]
+        writer.flush(timeout=5)
+        assert all(f.result()["id"] for f in futures)
+    assert len(_payments(client)) == 5
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from src.backends.memory import MemoryClient
+from src.dao.payment_dao import PaymentsDAO
+from src.dao.query_cache import cached_read, query_cache
+from src.dao.User_dao import UserDAO
+
+
+def _payment(subscription_id, amount=10.0):
+    return {"subscription_id": subscription_id, "amount": amount, "payment_date": "2025-01-01",
+            "method": "UPI", "status": "Completed"}
+
+
+def test_read_is_cached_until_the_table_is_written(backend):
+    dao = UserDAO(backend)
+    dao.create_users([{"name": "Asha", "email": "asha@example.com"}])
+    first = dao.get_all_users()
+    backend.table("users").insert({"name": "Ravi", "email": "ravi@example.com"}).execute()
+    assert dao.get_all_users() is first  # the direct insert bypassed the DAO
+
+    dao.create_users([{"name": "Mira", "email": "mira@example.com"}])
+    assert [u["name"] for u in dao.get_all_users()] == ["Asha", "Ravi", "Mira"]
+
+
+def test_scoped_write_keeps_entries_of_other_rows():
+    client = MemoryClient({"subscriptions": [{"user_id": 1, "name": "A"}, {"user_id": 1, "name": "B"}]})
+    dao = PaymentsDAO(client)
+    first, second = dao.get_payments_by_subscription(1), dao.get_payments_by_subscription(2)
+
+    dao.insert_payment(1, 10.0, "UPI", "Completed")
+    assert dao.get_payments_by_subscription(2) is second
+    assert dao.get_payments_by_subscription(1) is not first
+    assert len(dao.get_payments_by_subscription(1)) == 1
+
+
+def test_generator_arguments_reach_the_method_intact():
+    client = MemoryClient({"subscriptions": [{"user_id": 1, "name": "A"}, {"user_id": 1, "name": "B"}],
+                           "payments": [_payment(1), _payment(2, 5.0)]})
+    dao = PaymentsDAO(client)
+    assert dao.get_total_spend_for_subscriptions(i for i in (1, 2)) == 15.0
+
+
+def test_read_racing_a_write_is_not_stored():
+    calls = []
+
+    class DAO:
+        @cached_read("things")
+        def read(self):
+            calls.append(1)
+            query_cache.invalidate("things")  # a write lands while the read runs
+            return len(calls)
+
+    dao = DAO()
+    assert dao.read() == 1
+    assert dao.read() == 2
+
+
+def test_identical_concurrent_misses_share_one_call():
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    class DAO:
+        @cached_read("things")
+        def read(self):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "rows"
+
+    dao = DAO()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dao.read())) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["rows"] * 5
+    assert len(calls) == 1
@@ -0,0 +1,38 @@
+from datetime import date
+
+from src.services.renewal_service import RenewalIndex, next_renewal
+
+TODAY = date(2025, 6, 15)
+
+
+def _sub(id, start, end, plan_type="Monthly", status="Active"):
+    return {"id": id, "user_id": 1, "name": f"Sub {id}", "plan_type": plan_type, "cost": 10.0,
+            "start_date": start, "end_date": end, "status": status}
+
+
+def test_next_renewal_is_clamped_like_the_billing_schedule():
+    assert next_renewal(date(2025, 1, 31), "Monthly", None, date(2025, 2, 1)) == date(2025, 2, 28)
+    assert next_renewal(date(2025, 1, 31), "Monthly", None, date(2025, 3, 1)) == date(2025, 3, 31)
+    assert next_renewal(date(2024, 2, 29), "Yearly", None, date(2025, 1, 1)) == date(2025, 2, 28)
+    assert next_renewal(date(2025, 1, 31), "Monthly", date(2025, 2, 27), date(2025, 2, 1)) is None
+
+
+def test_expired_since_includes_every_status():
+    index = RenewalIndex()
+    index.add(_sub(1, "2025-01-01", "2025-06-01"), TODAY)
+    index.add(_sub(2, "2025-01-01", "2025-06-05", status="Expired"), TODAY)
+    index.add(_sub(3, "2025-01-01", "2025-06-10", status="Cancelled"), TODAY)
+    index.add(_sub(4, "2025-01-01", "2025-05-01", status="Cancelled"), TODAY)
+
+    assert [s["id"] for s in index.expired_since(date(2025, 6, 1), TODAY)] == [1, 2, 3]
+
+
+def test_only_active_subscriptions_renew_or_expire_soon():
+    index = RenewalIndex()
+    index.add(_sub(1, "2025-01-20", "2025-06-20"), TODAY)
+    index.add(_sub(2, "2025-01-18", "2025-06-20", status="Cancelled"), TODAY)
+
+    assert [s["id"] for s in index.due_within(7, TODAY)] == [1]
+    assert [s["id"] for s in index.expiring_within(7, TODAY)] == [1]
+    index.remove(1)
+    assert index.due_within(7, TODAY) == []
@@ -0,0 +1,115 @@
+import pytest
+
+from src.dao import resilience
+from src.dao.resilience import CircuitBreaker, CircuitOpen, is_transient, resilient, retry
+
+
+class Flaky:
+    """Fails with `error` the first `failures` calls, then returns "ok"."""
+
+    def __init__(self, failures, error=ConnectionError("down")):
+        self.failures, self.error, self.calls = failures, error, 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+class Client:
+    pass
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_transient_errors():
+    assert is_transient(ConnectionError())
+    assert is_transient(TimeoutError())
+    assert is_transient(APIError("503"))
+    assert is_transient(APIError(429))
+    assert not is_transient(APIError("23505"))
+    assert not is_transient(ValueError("bad query"))
+    assert not is_transient(CircuitOpen())
+
+
+def test_retry_gives_up_after_the_attempts():
+    assert retry(Flaky(2)) == "ok"
+    flaky = Flaky(3)
+    with pytest.raises(ConnectionError):
+        retry(flaky)
+    assert flaky.calls == 3
+
+
+def test_retry_raises_permanent_errors_at_once():
+    flaky = Flaky(1, ValueError("bad query"))
+    with pytest.raises(ValueError):
+        retry(flaky)
+    assert flaky.calls == 1
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(Flaky(1))
+    assert breaker.state == "open"
+    flaky = Flaky(0)
+    with pytest.raises(CircuitOpen):
+        breaker.call(flaky)
+    assert flaky.calls == 0
+
+
+def test_permanent_errors_do_not_trip_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(ValueError):
+        breaker.call(Flaky(1, ValueError("bad query")))
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_closes_or_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ConnectionError):
+        breaker.call(Flaky(1))
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        breaker.call(Flaky(1))
+    assert breaker.state == "open"  # a failed trial reopens it at once
+
+    clock[0] += 30
+    assert breaker.call(Flaky(0)) == "ok"
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_resilient_marks_errors_so_outer_calls_do_not_retry_them(clock):
+    inner = Flaky(10)
+    with pytest.raises(ConnectionError) as raised:
+        resilient(inner, Client())
+    assert inner.calls == resilience.DEFAULT_ATTEMPTS
+    assert not is_transient(raised.value)
+
+
+def test_breakers_are_per_client(clock):
+    first, second = Client(), Client()
+    resilience.breaker_for(first).opened_at = clock[0]
+    with pytest.raises(CircuitOpen):
+        resilient(Flaky(0), first)
+    assert resilient(Flaky(0), second) == "ok"
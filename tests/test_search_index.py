@@ -0,0 +1,38 @@
+from src.services.search_index import SearchIndex
+
+
+def _index():
+    people = [(1, "Priya Sharma", "priya@example.com"), (2, "Arjun Mehta", "arjun@shop.in"),
+              (3, "Sharmila Rao", "rao@example.com"), (4, "Ravi Kumar", "ravi.k@example.com"),
+              (5, "Armaan Singh", "armaan@shop.in")]
+    return SearchIndex([p[0] for p in people], [p[1] for p in people], [(p[1], p[2]) for p in people])
+
+
+def test_prefix_matches_rank_before_matches_inside_words():
+    # "Armaan" starts with the query; "Sharma" and "Sharmila" only contain it
+    assert _index().search("arm") == [5, 1, 3]
+    assert _index().search("sha") == [1, 3]
+
+
+def test_every_word_must_match():
+    assert _index().search("ra ku") == [4]
+    assert _index().search("priya mehta") == []
+
+
+def test_short_words_and_emails():
+    assert _index().search("r") == [4, 3]
+    assert _index().search("shop.in") == [2, 5]
+    assert _index().search("example.com") == [1, 4, 3]
+
+
+def test_empty_query_lists_entries_in_label_order():
+    index = _index()
+    assert index.search("") == [2, 5, 1, 4, 3]
+    assert index.search(None, limit=2) == [2, 5]
+    assert index.label(2) == "Arjun Mehta" and index.label(9) == "#9"
+
+
+def test_limit_keeps_the_best_ranked():
+    index = SearchIndex(range(100), [f"User {i:03}" for i in range(100)], [(f"User {i:03}",) for i in range(100)])
+    assert index.search("user", limit=3) == [0, 1, 2]
+    assert index.search("09") == list(range(90, 100))
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.backends.sqlite import SQLiteClient
+from src.services.sync_service import SyncService
+
+
+@pytest.fixture
+def source():
+    # The SQLite backend has the updated_at columns and deleted_rows triggers of sql/sync.sql
+    client = SQLiteClient(":memory:")
+    client.table("users").insert([{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(5)]).execute()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def sync(source, backend):
+    return SyncService(backend, source=source, page_size=2)
+
+
+def _ids(client, table="users"):
+    return sorted(row["id"] for row in client.table(table).select("id").execute().data)
+
+
+def test_first_sync_copies_everything(sync, backend):
+    assert sync.sync()["users"] == {"inserted": 5, "updated": 0, "deleted": 0}
+    assert _ids(backend) == [1, 2, 3, 4, 5]
+    assert sync.sync()["users"] == {"inserted": 0, "updated": 0, "deleted": 0}
+
+
+def test_edits_and_inserts_are_copied(sync, source, backend):
+    sync.sync()
+    source.table("users").update({"name": "Renamed"}).eq("id", 2).execute()
+    source.table("users").insert({"name": "New", "email": "new@example.com"}).execute()
+
+    assert sync.sync()["users"] == {"inserted": 1, "updated": 1, "deleted": 0}
+    assert backend.table("users").select("name").eq("id", 2).execute().data == [{"name": "Renamed"}]
+
+
+def test_edit_with_the_same_updated_at_is_copied(sync, source, backend):
+    sync.sync()
+    # Edited in the same millisecond as the copied version
+    stamp = source.table("users").select("updated_at").eq("id", 2).execute().data[0]["updated_at"]
+    source.table("users").update({"name": "Renamed"}).eq("id", 2).execute()
+    source.table("users").update({"updated_at": stamp}).eq("id", 2).execute()
+
+    assert sync.sync()["users"]["updated"] == 1
+    assert backend.table("users").select("name").eq("id", 2).execute().data == [{"name": "Renamed"}]
+    assert sync.sync()["users"]["updated"] == 0
+
+
+def test_tombstones_delete_replica_rows_once(sync, source, backend):
+    sync.sync()
+    source.table("users").delete().in_("id", [2, 4]).execute()
+
+    assert sync.sync()["users"]["deleted"] == 2
+    assert _ids(backend) == [1, 3, 5]
+    # The overlap re-reads the same tombstones; nothing is left to delete
+    assert sync.sync()["users"]["deleted"] == 0
+
+
+def test_deletes_before_the_first_sync_are_not_replayed(source, backend):
+    source.table("users").delete().eq("id", 1).execute()
+    sync = SyncService(backend, source=source)
+    sync.sync()
+    backend.table("users").insert({"id": 1, "name": "Local", "email": "local@example.com"}).execute()
+
+    assert sync.sync()["users"]["deleted"] == 0
+    assert 1 in _ids(backend)
+
+
+def test_late_commit_below_the_watermark_is_copied(sync, source, backend):
+    sync.sync()
+    watermark = {row["table_name"]: row for row in backend.table("sync_state").select("*").execute().data}
+    stamp = datetime.fromisoformat(watermark["users"]["last_updated_at"]) - timedelta(seconds=10)
+    # Stamped before the last sync, but only visible now
+    source.table("users").update({"name": "Late", "updated_at": stamp.isoformat(timespec="milliseconds")}).eq("id", 3).execute()
+
+    assert sync.sync()["users"]["updated"] == 1
+    assert backend.table("users").select("name").eq("id", 3).execute().data == [{"name": "Late"}]
+    assert sync.sync()["users"]["updated"] == 0
+
+
+def test_rebuild_copies_everything_again(sync, backend):
+    sync.sync()
+    backend.table("users").delete().eq("id", 1).execute()
+    assert sync.rebuild()["users"]["inserted"] == 5
+    assert _ids(backend) == [1, 2, 3, 4, 5]